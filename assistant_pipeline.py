@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Pipelined assistant engine
+Features: Capture, recognition, command dispatch and speech output run as separate
+stages connected by bounded queues, with back-pressure, barge-in and clean shutdown
+"""
+
+import sys
+import queue
+import threading
+
+# Marks the end of a stream of work items
+STOP = object()
+
+
+class AssistantPipeline:
+    """Run listen -> recognize -> act -> speak as overlapping stages"""
+
+    def __init__(self, capture, recognize, dispatch, speaker, queue_size=2, typed_input=True):
+        """
+        capture():        blocking, returns an audio clip or None on timeout
+        recognize(audio): returns the recognized text or None
+        dispatch(text):   runs the command, returns False to shut down
+        speaker:          TTSWorker, the speech output stage
+        """
+        self.capture = capture
+        self.recognize = recognize
+        self.dispatch = dispatch
+        self.speaker = speaker
+        self.typed_input = typed_input
+
+        # Small bounds keep latency low: a slow stage stalls the ones before it
+        self.audio_queue = queue.Queue(maxsize=queue_size)
+        self.text_queue = queue.Queue(maxsize=queue_size)
+
+        self.draining = threading.Event()  # stop taking new input, finish speaking
+        self.answer_lock = threading.Lock()
+        self.answers = None  # set while a command waits in ask() for a typed answer
+        self.stopped = threading.Event()   # everything has shut down
+        self.threads = []
+
+    def start(self, voice_input=True):
+        """Start all stage threads"""
+        stages = [('dispatch', self.dispatch_stage)]
+        if voice_input:
+            stages += [('capture', self.capture_stage), ('recognize', self.recognize_stage)]
+        for name, target in stages:
+            thread = threading.Thread(target=target, name=f"pipeline-{name}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+        # stdin reads cannot be interrupted, so this thread is never joined
+        if self.typed_input:
+            threading.Thread(target=self.typed_input_stage, name="pipeline-typed", daemon=True).start()
+        print("✓ Pipeline started")
+
+    def put(self, target_queue, item, stop_event=None):
+        """Block until the queue has room (back-pressure) unless the pipeline is stopping"""
+        stop_event = stop_event or self.draining
+        while not stop_event.is_set():
+            try:
+                target_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def get(self, source_queue, stop_event=None):
+        """Wait for the next item, returning STOP once the pipeline is stopping"""
+        stop_event = stop_event or self.draining
+        while not stop_event.is_set():
+            try:
+                return source_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return STOP
+
+    def capture_stage(self):
+        """Capture utterances while the previous ones are still being processed"""
+        while not self.draining.is_set():
+            try:
+                audio = self.capture()
+            except Exception as e:
+                print(f"❌ Capture stage error: {e}")
+                continue
+            if audio is not None:
+                self.put(self.audio_queue, audio)
+
+    def recognize_stage(self):
+        """Turn captured audio into text"""
+        while True:
+            audio = self.get(self.audio_queue)
+            if audio is STOP:
+                break
+            try:
+                text = self.recognize(audio)
+            except Exception as e:
+                print(f"❌ Recognition stage error: {e}")
+                continue
+            if text:
+                # Barge-in: a new command cuts off the answer still being spoken
+                self.speaker.interrupt()
+                self.put(self.text_queue, text)
+
+    def typed_input_stage(self):
+        """Accept typed commands alongside voice input"""
+        print("\n💬 Type a command at any time ('quit' to exit)")
+        while not self.draining.is_set():
+            line = sys.stdin.readline()
+            if not line:
+                break
+            with self.answer_lock:
+                answers = self.answers
+            if answers is not None:
+                # The running command asked for this line; it is not a new command
+                answers.put(line.rstrip('\n'))
+                continue
+            if line.strip():
+                self.speaker.interrupt()
+                self.put(self.text_queue, line.strip())
+
+    def ask(self, prompt):
+        """Read a typed answer for the running command, e.g. a reminder's title
+
+        While the typed-input stage is reading stdin, input() in a command
+        would race it for the same lines, so the stage hands the next line
+        over here instead. Returns '' if the pipeline stops while waiting.
+        """
+        if not self.typed_input:
+            return input(prompt)
+        answers = queue.Queue()
+        with self.answer_lock:
+            self.answers = answers
+        print(prompt, end='', flush=True)
+        try:
+            answer = self.get(answers)
+        finally:
+            with self.answer_lock:
+                self.answers = None
+        return '' if answer is STOP else answer
+
+    def dispatch_stage(self):
+        """Run commands one at a time; speech they produce is queued on the speaker, not awaited"""
+        while True:
+            command = self.get(self.text_queue)
+            if command is STOP:
+                break
+            try:
+                should_continue = self.dispatch(command)
+            except Exception as e:
+                print(f"❌ Unexpected error: {e}")
+                self.speaker.say("I encountered an unexpected error. Please try again.")
+                continue
+            if should_continue is False:
+                self.shutdown()
+                break
+
+    def shutdown(self):
+        """Stop taking input and let queued speech finish"""
+        self.draining.set()
+        self.speaker.wait_until_idle(timeout=30)
+        self.stopped.set()
+
+    def stop(self):
+        """Stop immediately, dropping queued work"""
+        self.draining.set()
+        self.speaker.interrupt()
+        self.stopped.set()
+
+    def wait(self, join_timeout=1):
+        """Block until the pipeline has shut down"""
+        # Short waits keep the main thread responsive to Ctrl+C
+        while not self.stopped.wait(0.2):
+            pass
+        for thread in self.threads:
+            thread.join(join_timeout)
+
+    def status(self):
+        """Return the current depth of each queue"""
+        return {
+            'audio': self.audio_queue.qsize(),
+            'text': self.text_queue.qsize(),
+            'speech': self.speaker.utterances.qsize(),
+        }
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Persistent microphone capture
+Features: One input stream opened for the whole session, a preallocated ring
+buffer with bounded memory, utterances endpointed by the VAD and sliced out of
+the buffer with pre-roll so the first syllable is never clipped
+"""
+
+import time
+import threading
+
+import numpy as np
+
+from vad import Endpointer
+
+
+class RingBuffer:
+    """Fixed-size int16 sample buffer addressed by absolute sample position"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.samples = np.zeros(capacity, dtype=np.int16)
+        self.written = 0  # total samples ever written; the buffer holds the last `capacity` of them
+
+    def write(self, samples):
+        samples = samples[-self.capacity:]
+        start = self.written % self.capacity
+        end = start + len(samples)
+        if end <= self.capacity:
+            self.samples[start:end] = samples
+        else:
+            split = self.capacity - start
+            self.samples[start:] = samples[:split]
+            self.samples[:end - self.capacity] = samples[split:]
+        self.written += len(samples)
+
+    def oldest(self):
+        """Absolute position of the oldest sample still held"""
+        return max(0, self.written - self.capacity)
+
+    def read(self, start, end):
+        """Copy of the samples in [start, end), clamped to what the buffer still holds"""
+        start = max(start, self.oldest())
+        end = min(end, self.written)
+        if end <= start:
+            return np.empty(0, dtype=np.int16)
+        first = start % self.capacity
+        last = first + (end - start)
+        if last <= self.capacity:
+            return self.samples[first:last].copy()
+        return np.concatenate([self.samples[first:], self.samples[:last - self.capacity]])
+
+
+class MicrophoneStream:
+    """Capture thread that keeps a speech_recognition Microphone open and fills a ring buffer"""
+
+    def __init__(self, microphone, buffer_seconds=30.0, pre_roll=0.3, endpointer=None):
+        self.microphone = microphone
+        self.sample_rate = microphone.SAMPLE_RATE
+        self.sample_width = microphone.SAMPLE_WIDTH
+        self.chunk = microphone.CHUNK
+        self.pre_roll = int(pre_roll * self.sample_rate)
+        self.ring = RingBuffer(int(buffer_seconds * self.sample_rate))
+        self.endpointer = endpointer or Endpointer(self.sample_rate)
+        self.endpoint_latency = None  # seconds of trailing silence before the last utterance was closed
+        self.listeners = []  # called with each raw chunk on the capture thread
+        self.condition = threading.Condition()
+        self.ready = threading.Event()
+        self.stopped = threading.Event()
+        self.error = None
+        self.thread = None
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def start(self, timeout=5):
+        """Open the stream and wait until it delivers audio"""
+        self.thread = threading.Thread(target=self.capture, name='mic-capture', daemon=True)
+        self.thread.start()
+        self.ready.wait(timeout)
+        if self.error:
+            raise self.error
+        return self
+
+    def capture(self):
+        try:
+            with self.microphone as source:
+                self.ready.set()
+                while not self.stopped.is_set():
+                    data = source.stream.read(self.chunk)
+                    with self.condition:
+                        self.ring.write(np.frombuffer(data, dtype=np.int16))
+                        self.condition.notify_all()
+                    for listener in self.listeners:
+                        try:
+                            listener(data)
+                        except Exception as e:
+                            print(f"✗ Error in audio listener: {e}")
+        except Exception as e:
+            self.error = e
+            print(f"✗ Microphone capture stopped: {e}")
+        finally:
+            self.stopped.set()
+            self.ready.set()
+            with self.condition:
+                self.condition.notify_all()
+
+    def position(self):
+        """Absolute sample position of the newest captured audio"""
+        with self.condition:
+            return self.ring.written
+
+    def wait_for(self, position, deadline=None):
+        """Block until audio up to position has been captured; False on timeout or stop"""
+        with self.condition:
+            while self.ring.written < position:
+                if self.stopped.is_set():
+                    return False
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.condition.wait(remaining if remaining is not None else 0.5)
+            return True
+
+    def read(self, start, end):
+        with self.condition:
+            return self.ring.read(start, end)
+
+    def listen(self, threshold, timeout=None):
+        """Return the raw bytes of the next utterance, or None on timeout
+
+        Scanning starts at the newest audio; the returned audio starts pre_roll
+        before the detected onset and ends at the last voiced frame. threshold
+        is a speech energy level, or a function returning the current one.
+        """
+        endpointer = self.endpointer
+        endpointer.reset()
+        base = position = self.position()
+        deadline = time.monotonic() + timeout if timeout else None
+
+        while not endpointer.ended:
+            # The deadline only applies while waiting for speech to begin
+            if not self.wait_for(position + self.chunk, deadline if endpointer.onset is None else None):
+                if endpointer.onset is None:
+                    return None
+                break
+            if position < self.ring.oldest():
+                # Fell a whole buffer behind; start over from the oldest audio still held
+                endpointer.reset()
+                base = position = self.ring.oldest()
+            level = threshold() if callable(threshold) else threshold
+            endpointer.feed(self.read(position, position + self.chunk), level)
+            position += self.chunk
+
+        end = endpointer.end if endpointer.ended else endpointer.offset
+        self.endpoint_latency = endpointer.latency()
+        return self.read(base + endpointer.onset - self.pre_roll, base + end).tobytes()
+
+    def stop(self, timeout=2):
+        self.stopped.set()
+        if self.thread:
+            self.thread.join(timeout)
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Headless end-to-end latency benchmark for the assistant core
+Builds VoiceAssistant or EnhancedVoiceAssistant with local stand-ins for the
+speech engine, Gemini, the weather/news APIs and speech recognition (see
+headless.py), each with a configurable artificial latency, then drives
+process_command / process_enhanced_command with scripted text commands and
+listen() with WAV files. No microphone, SAPI5 or network is needed.
+
+Reports p50/p95/p99 per stage and command throughput; command stages are
+split into [skill] and [ai] (answered by Gemini):
+  startup      construction until every background setup step is done
+  capture      listen(): fetching the next clip
+  recognize    listen(): speech recognition
+  dispatch     process_command() until it returns
+  first_speech dispatch start until the first utterance is queued
+  total        command start until all speech has been played
+  voice_total  like total, but starting before listen()
+
+Commands run for real apart from the stand-ins, so commands that would open
+a browser, shut down, prompt on stdin or send email are skipped.
+
+Usage:
+    python benchmarks/bench_assistant.py
+    python benchmarks/bench_assistant.py --assistant enhanced --repeat 5 --ai-latency 0.8
+    python benchmarks/bench_assistant.py --commands script.txt --wavs clips/*.wav   # clip.txt holds the transcript
+    python benchmarks/bench_assistant.py --json bench_results.jsonl   # append results to compare runs
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import wave
+import argparse
+import builtins
+import platform
+import tempfile
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SCRIPTS = {
+    'voice': [
+        "what time is it",
+        "what's the date today",
+        "system info",
+        "tell me something interesting about black holes",
+        "how do I boil an egg",
+        "explain recursion in one sentence",
+    ],
+    'enhanced': [
+        "what's the weather in london",
+        "show me the latest sports news",
+        "show my reminders",
+        "show my notes",
+        "tell me a joke",
+        "tell me something interesting about black holes",
+        "how do I boil an egg",
+    ],
+}
+
+# Intents with side effects outside the process (browser, power, email, files) or that prompt on stdin
+UNSAFE_INTENTS = {'exit', 'open', 'search', 'play', 'wikipedia', 'screenshot', 'shutdown', 'restart',
+                  'qr_code', 'email', 'preference'}
+
+
+def is_safe(assistant, command):
+    match = assistant.router.route(command.lower()) or assistant.classify_intent(command.lower())
+    if not match:
+        return True
+    if match.name in ('reminder', 'note'):
+        return match.slots.get('action') == 'list'
+    return match.name not in UNSAFE_INTENTS
+
+
+def refuse_input(prompt=''):
+    raise EOFError("stdin is not available in the headless benchmark")
+
+
+def write_clips(directory, commands, seconds=1.0, sample_rate=16000):
+    """Silent WAVs with the command as their sidecar transcript"""
+    paths = []
+    for index, command in enumerate(commands):
+        path = os.path.join(directory, f"clip_{index:02d}.wav")
+        with wave.open(path, 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(sample_rate)
+            f.writeframes(b'\0\0' * int(seconds * sample_rate))
+        with open(os.path.splitext(path)[0] + '.txt', 'w', encoding='utf-8') as f:
+            f.write(command)
+        paths.append(path)
+    return paths
+
+
+def run_command(assistant, process, command, started=None):
+    """Dispatch one command and wait for its speech; returns 'ai' or 'skill' and the total seconds
+
+    Stages are recorded per kind, since Gemini replies and local skills differ by orders of magnitude.
+    """
+    started = started or time.perf_counter()
+    assistant.first_speech = None
+    calls = assistant.model.calls
+    dispatch_started = time.perf_counter()
+    process(command)
+    dispatched = time.perf_counter()
+    assistant.tts.wait_until_idle(timeout=60)
+    # wait_until_idle() polls; the fake engine knows when speech really ended
+    finished = max(dispatched, assistant.tts.engine.finished_at or dispatched)
+
+    kind = 'ai' if assistant.model.calls > calls else 'skill'
+    assistant.timer.record(f'dispatch[{kind}]', dispatched - dispatch_started)
+    if assistant.first_speech is not None:
+        assistant.timer.record(f'first_speech[{kind}]', assistant.first_speech - dispatch_started)
+    return kind, finished - started
+
+
+def benchmark(args, workdir):
+    from headless import headless, load_clip
+    if args.assistant == 'voice':
+        from voice_assistant import VoiceAssistant as assistant_class
+    else:
+        from enhanced_voice_assistant import EnhancedVoiceAssistant as assistant_class
+
+    assistant_class = headless(assistant_class, ai_latency=args.ai_latency, ai_words_per_second=args.ai_wps,
+                               http_latency=args.http_latency, recognition_latency=args.recognition_latency,
+                               speech_wpm=args.speech_wpm)
+    started = time.perf_counter()
+    assistant = assistant_class()
+    assistant.startup.wait_all()
+    assistant.tts.ready.wait(10)
+    assistant.timer.record('startup', time.perf_counter() - started)
+    process = getattr(assistant, 'process_enhanced_command', None) or assistant.process_command
+
+    if args.commands:
+        with open(args.commands, encoding='utf-8') as f:
+            commands = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    else:
+        commands = SCRIPTS[args.assistant]
+    skipped = [command for command in commands if not is_safe(assistant, command)]
+    commands = [command for command in commands if command not in skipped]
+    clips = [load_clip(path) for path in (args.wavs or write_clips(workdir, commands))]
+    clips = [clip for clip in clips if is_safe(assistant, clip.transcript)]
+
+    handled = 0
+    run_started = time.perf_counter()
+    for _ in range(args.repeat):
+        # Otherwise every pass after the second gets the "requested this several times" suggestion
+        assistant.command_history.clear()
+        for command in commands:
+            kind, total = run_command(assistant, process, command)
+            assistant.timer.record(f'total[{kind}]', total)
+            handled += 1
+        for clip in clips:
+            assistant.feed([clip])
+            started = time.perf_counter()
+            text = assistant.timer.timed('listen', assistant.listen)
+            if text:
+                kind, total = run_command(assistant, process, text, started)
+                assistant.timer.record(f'voice_total[{kind}]', total)
+            handled += 1
+    elapsed = time.perf_counter() - run_started
+
+    http = assistant.http.summary() if hasattr(assistant, 'http') else {}
+    assistant.tts.shutdown()
+    return {
+        'stages': assistant.timer.summary(),
+        'commands': handled,
+        'throughput': handled / elapsed if elapsed else 0.0,
+        'skipped': skipped,
+        'ai_calls': assistant.model.calls,
+        'http': http,
+        'spans': assistant.metrics.summary(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--assistant', choices=sorted(SCRIPTS), default='voice')
+    parser.add_argument('--commands', help="text file with one command per line")
+    parser.add_argument('--wavs', nargs='*', help="recorded commands for listen(); name.txt holds each transcript")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--ai-latency', type=float, default=0.4, help="seconds before Gemini's first chunk")
+    parser.add_argument('--ai-wps', type=float, default=40.0, help="streamed Gemini words per second")
+    parser.add_argument('--http-latency', type=float, default=0.15, help="weather/news API seconds")
+    parser.add_argument('--recognition-latency', type=float, default=0.3, help="speech recognition seconds")
+    parser.add_argument('--speech-wpm', type=float, default=0, help="spoken words per minute (0: instant)")
+    parser.add_argument('--ai-cache', action='store_true', help="keep the AI response cache enabled")
+    parser.add_argument('--no-stream', action='store_true', help="disable streamed AI replies")
+    parser.add_argument('--json', help="append the results as one JSON line to this file")
+    parser.add_argument('--verbose', action='store_true', help="show the assistant's own output")
+    args = parser.parse_args()
+    if args.json:
+        args.json = os.path.abspath(args.json)
+    if args.commands:
+        args.commands = os.path.abspath(args.commands)
+    args.wavs = [os.path.abspath(path) for path in args.wavs or []]
+
+    os.environ.update({
+        'AI_CACHE': 'true' if args.ai_cache else 'false',
+        'STREAM_AI_RESPONSES': 'false' if args.no_stream else 'true',
+        'PHRASE_CACHE': 'false',
+        'PREWARM_SKILLS': '',
+        'WEATHER_API_KEY': 'headless',
+        'NEWS_API_KEY': 'headless',
+    })
+    # The Gemini limiter is off unless asked for, so it does not hide the stand-ins' own latency
+    os.environ.setdefault('GEMINI_RPM', '0')
+    os.environ.setdefault('GEMINI_MAX_IN_FLIGHT', '0')
+    builtins.input = refuse_input
+
+    # Databases, caches and the intent model are created in a scratch directory
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        try:
+            with output:
+                results = benchmark(args, workdir)
+        finally:
+            os.chdir(cwd)
+
+    for command in results['skipped']:
+        print(f"⏭ Skipped (side effects): {command}")
+    print(f"{'stage':<20} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for stage, entry in sorted(results['stages'].items()):
+        print(f"{stage:<20} {entry['count']:>6} {entry['p50_ms']:>9.1f} {entry['p95_ms']:>9.1f} {entry['p99_ms']:>9.1f}")
+    print(f"🚀 {results['commands']} commands, {results['throughput']:.2f} commands/s, "
+          f"{results['ai_calls']} Gemini calls")
+    for service, entry in results['http'].items():
+        print(f"🌐 {service}: {entry['requests']} requests, p50 {entry['p50_ms']:.0f}ms")
+
+    if args.json:
+        config = {key: value for key, value in vars(args).items() if key not in ('json', 'verbose')}
+        with open(args.json, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'time': time.time(), 'python': platform.python_version(),
+                                'config': config, **results}) + '\n')
+        print(f"📝 Appended results to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
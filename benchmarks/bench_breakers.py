@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Outage benchmark for the circuit breakers
+Runs the headless EnhancedVoiceAssistant (see headless.py) through three
+timed phases, cycling through a weather, a news, a Gemini and a spoken
+command, one every --interval seconds at most (like a user would):
+
+  healthy   every stand-in answers normally
+  outage    Gemini, the weather/news APIs and speech recognition all time
+            out after --timeout seconds
+  recovery  the services are back; breakers let a trial call through once
+            their reset timeout has passed
+
+The whole run is done with CIRCUIT_BREAKERS=true and again with
+CIRCUIT_BREAKERS=false. Reports p50/p95/p99 latency per phase and command,
+and per breaker how often it opened, how many calls it turned away and how
+long after the services came back it closed again.
+
+Usage:
+    python benchmarks/bench_breakers.py
+    python benchmarks/bench_breakers.py --outage 60 --timeout 5 --reset-timeout 10
+    python benchmarks/bench_breakers.py --json bench_results.jsonl
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import builtins
+import platform
+import tempfile
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_assistant import refuse_input, run_command, write_clips
+
+ROUND = [
+    ('weather', "what's the weather in london"),
+    ('news', "show me the latest sports news"),
+    ('ai', "tell me something interesting about black holes"),
+    ('voice', "what's the weather in paris"),
+]
+
+
+def set_outage(assistant, down):
+    """Take every remote stand-in down, or bring them back"""
+    for model in assistant.fake_models.values():
+        model.down = down
+    assistant.http.down = {'weather', 'news'} if down else set()
+    for backend in assistant.speech.backends:
+        backend.down = down
+
+
+def run_mode(args, breakers, workdir):
+    from headless import headless, load_clip
+    from enhanced_voice_assistant import EnhancedVoiceAssistant
+
+    os.environ['CIRCUIT_BREAKERS'] = 'true' if breakers else 'false'
+    assistant_class = headless(EnhancedVoiceAssistant, ai_latency=args.ai_latency, http_latency=args.http_latency,
+                               recognition_latency=args.recognition_latency, online_recognition=True)
+    assistant = assistant_class()
+    assistant.startup.wait_all()
+    assistant.tts.ready.wait(10)
+    for model in assistant.fake_models.values():
+        model.timeout = args.timeout
+    assistant.http.timeout = args.timeout
+    for backend in assistant.speech.backends:
+        backend.timeout = args.timeout
+    clip = load_clip(write_clips(workdir, [ROUND[-1][1]])[0])
+
+    phases = [('healthy', args.healthy, False), ('outage', args.outage, True), ('recovery', args.recovery, False)]
+    closed_after = {}
+    for phase, seconds, down in phases:
+        set_outage(assistant, down)
+        phase_started = time.perf_counter()
+        sent = 0
+        while time.perf_counter() - phase_started < seconds:
+            label, command = ROUND[sent % len(ROUND)]
+            sent += 1
+            assistant.command_history.clear()
+            started = time.perf_counter()
+            if label == 'voice':
+                assistant.feed([clip])
+                command = assistant.listen()
+            if command is None:
+                # No transcript: the user is asked to type instead
+                assistant.clips.clear()
+                assistant.timer.record(f"{phase}:{label}", time.perf_counter() - started)
+            else:
+                _, total = run_command(assistant, assistant.process_enhanced_command, command, started)
+                assistant.timer.record(f"{phase}:{label}", total)
+            if phase == 'recovery':
+                for name, summary in assistant.breakers.summary().items():
+                    if summary['state'] == 'closed' and name not in closed_after:
+                        closed_after[name] = time.perf_counter() - phase_started
+            time.sleep(max(0.0, args.interval - (time.perf_counter() - started)))
+
+    results = {
+        'stages': assistant.timer.summary(),
+        'breakers': assistant.breakers.summary(),
+        'closed_after': closed_after,
+        'gemini': assistant.model.summary(),
+        'cache': dict(assistant.lookup_cache.stats),
+    }
+    assistant.tts.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--healthy', type=float, default=10.0, help="seconds before the outage")
+    parser.add_argument('--outage', type=float, default=45.0, help="seconds the services are down")
+    parser.add_argument('--recovery', type=float, default=60.0, help="seconds after the services are back")
+    parser.add_argument('--interval', type=float, default=1.0, help="seconds between commands at most")
+    parser.add_argument('--timeout', type=float, default=1.0, help="seconds before a down service fails")
+    parser.add_argument('--failures', type=int, default=3, help="BREAKER_FAILURES")
+    parser.add_argument('--reset-timeout', type=float, default=15.0, help="BREAKER_RESET_TIMEOUT")
+    parser.add_argument('--ai-latency', type=float, default=0.4, help="seconds before Gemini's first chunk")
+    parser.add_argument('--http-latency', type=float, default=0.15, help="weather/news API seconds")
+    parser.add_argument('--recognition-latency', type=float, default=0.3, help="speech recognition seconds")
+    parser.add_argument('--json', help="append the results as one JSON line to this file")
+    parser.add_argument('--verbose', action='store_true', help="show the assistant's own output")
+    args = parser.parse_args()
+    if args.json:
+        args.json = os.path.abspath(args.json)
+
+    os.environ.update({
+        'AI_CACHE': 'false',
+        'STREAM_AI_RESPONSES': 'true',
+        'PHRASE_CACHE': 'false',
+        'PREWARM_SKILLS': '',
+        'WEATHER_API_KEY': 'headless',
+        'NEWS_API_KEY': 'headless',
+        # Every lookup goes to the service, so outages are not hidden by fresh cache entries
+        'WEATHER_CACHE_TTL': '0',
+        'WEATHER_STALE_TTL': '0',
+        'NEWS_CACHE_TTL': '0',
+        'NEWS_STALE_TTL': '0',
+        'BREAKER_FAILURES': str(args.failures),
+        'BREAKER_RESET_TIMEOUT': str(args.reset_timeout),
+    })
+    os.environ.setdefault('GEMINI_RPM', '0')
+    os.environ.setdefault('GEMINI_MAX_IN_FLIGHT', '0')
+    # One retry per Gemini request keeps an unprotected outage command within seconds
+    os.environ.setdefault('GEMINI_MAX_RETRIES', '1')
+    builtins.input = refuse_input
+
+    results = {}
+    for mode, breakers in (('breakers', True), ('no breakers', False)):
+        # Each mode gets fresh databases and caches
+        with tempfile.TemporaryDirectory() as workdir:
+            cwd = os.getcwd()
+            os.chdir(workdir)
+            output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+            try:
+                with output:
+                    results[mode] = run_mode(args, breakers, workdir)
+            finally:
+                os.chdir(cwd)
+
+    print(f"🧪 {args.outage:g}s outage, services time out after {args.timeout:g}s, "
+          f"breakers open after {args.failures} failures for {args.reset_timeout:g}s")
+    print(f"{'mode':<12} {'phase':<9} {'command':<8} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for mode, result in results.items():
+        stages = result['stages']
+        for phase in ('healthy', 'outage', 'recovery'):
+            for label, _ in ROUND:
+                entry = stages.get(f"{phase}:{label}")
+                if entry:
+                    print(f"{mode:<12} {phase:<9} {label:<8} {entry['count']:>6} {entry['p50_ms']:>9.0f} "
+                          f"{entry['p95_ms']:>9.0f} {entry['p99_ms']:>9.0f}")
+        for name, summary in sorted(result['breakers'].items()):
+            closed = result['closed_after'].get(name)
+            recovered = f"closed {closed:.1f}s after recovery" if closed is not None else f"still {summary['state']}"
+            print(f"🔌 {name}: opened {summary['opened']}x, {summary['rejected']} calls turned away, "
+                  f"{summary['failures']} failures, {recovered}")
+        print(f"📦 {mode}: {result['cache']['error_hits']} lookups answered from expired cache entries, "
+              f"{result['gemini']['failed']} Gemini requests failed")
+
+    if args.json:
+        config = {key: value for key, value in vars(args).items() if key not in ('json', 'verbose')}
+        with open(args.json, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'time': time.time(), 'python': platform.python_version(),
+                                'config': config, **results}) + '\n')
+        print(f"📝 Appended results to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Prompt size and follow-up recall of the conversation context
+Replays a scripted conversation (questions about a series of topics, each
+followed by follow-ups that refer back 1, 4 and 12 turns) through three ways
+of building the Gemini prompt:
+
+  stuffed   every stored preference as a dict, no conversation (the old enhanced prompt)
+  history   every stored preference plus every earlier turn verbatim
+  context   ConversationContext: relevant preferences, recent turns and a
+            summary of older ones within CONTEXT_TOKEN_BUDGET
+
+Reports per strategy the estimated prompt tokens (p50 and largest), the time
+to build a prompt, the share of follow-ups whose topic is still in the prompt
+besides the question itself, and the modelled time to first token when
+Gemini spends --prefill-ms per thousand prompt tokens on top of --ai-latency.
+
+Usage:
+    python benchmarks/bench_context.py
+    python benchmarks/bench_context.py --topics 40 --preferences 60 --budget 512 --max-turns 4
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conversation import ConversationContext, estimate_tokens
+from headless import StageTimer
+
+TOPICS = ['volcanoes', 'jupiter', 'penguins', 'the colosseum', 'photosynthesis', 'jazz', 'glaciers',
+          'octopuses', 'the printing press', 'saturn', 'coral reefs', 'chess', 'the amazon river',
+          'honeybees', 'lighthouses', 'the moon landing', 'tea ceremonies', 'earthquakes', 'origami', 'comets']
+INSTRUCTIONS = "You are Jarvis, a helpful voice assistant. Respond naturally: {}"
+
+
+def keyword(topic):
+    """The word a follow-up uses to refer back to a topic"""
+    return topic.split(' part ')[0].split()[-1]
+
+
+def reply_about(topic):
+    return (f"{topic.capitalize()} are a fascinating subject with a long history. Scientists and historians "
+            f"have studied {topic} for centuries, and new discoveries keep changing what we know. "
+            f"Many people find {topic} interesting because of how they connect to everyday life.")
+
+
+def script(topics):
+    """(question, topic the question depends on or None) in conversation order"""
+    turns = []
+    for index, topic in enumerate(topics):
+        turns.append((f"tell me about {topic}", None))
+        turns.append(("why is that important", topic))
+        for back in (4, 12):
+            if index >= back and index % back == 0:
+                turns.append((f"going back to what you said about {keyword(topics[index - back])}, "
+                              f"how does it compare", topics[index - back]))
+    return turns
+
+
+def preferences(count):
+    prefs = {'name': 'Sam', 'default_city': 'Lisbon', 'voice_rate': '180', 'voice_volume': '0.8',
+             'news_category': 'science'}
+    for index in range(max(0, count - len(prefs))):
+        prefs[f"favourite_{index}"] = f"setting value number {index}"
+    return prefs
+
+
+def run(strategy, turns, prefs, args):
+    timer = StageTimer()
+    context = ConversationContext(args.budget, args.max_turns, args.summary_tokens, idle_reset=3600)
+    history = []
+    tokens = []
+    recalled = followups = 0
+    for question, topic in turns:
+        instructions = INSTRUCTIONS.format(question)
+        started = time.perf_counter()
+        if strategy == 'stuffed':
+            prompt = f"User preferences: {prefs}. {instructions}"
+        elif strategy == 'history':
+            exchanges = '\n'.join(f"User: {user}\nYou: {reply}" for user, reply in history)
+            prompt = f"User preferences: {prefs}.\n{exchanges}\n{instructions}"
+        else:
+            prompt = context.prompt(instructions, question, prefs)
+        timer.record('build', time.perf_counter() - started)
+
+        count = estimate_tokens(prompt)
+        tokens.append(count)
+        timer.record('first_token', args.ai_latency + count / 1000 * args.prefill_ms / 1000)
+        if topic:
+            followups += 1
+            recalled += keyword(topic) in prompt.replace(instructions, '').lower()
+
+        reply = reply_about(topic or question[len('tell me about '):])
+        history.append((question, reply))
+        context.remember(question, reply)
+
+    tokens.sort()
+    return {
+        'p50_tokens': tokens[len(tokens) // 2],
+        'max_tokens': tokens[-1],
+        'recall': recalled / followups if followups else 0.0,
+        'stages': timer.summary(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--topics', type=int, default=20, help="topics in the conversation (repeats the list)")
+    parser.add_argument('--preferences', type=int, default=30, help="stored user preferences")
+    parser.add_argument('--budget', type=int, default=1024, help="CONTEXT_TOKEN_BUDGET")
+    parser.add_argument('--max-turns', type=int, default=6, help="CONTEXT_MAX_TURNS")
+    parser.add_argument('--summary-tokens', type=int, default=150, help="CONTEXT_SUMMARY_TOKENS")
+    parser.add_argument('--ai-latency', type=float, default=0.4, help="seconds to first token for an empty prompt")
+    parser.add_argument('--prefill-ms', type=float, default=50.0, help="extra milliseconds per 1000 prompt tokens")
+    args = parser.parse_args()
+
+    topics = [TOPICS[index % len(TOPICS)] + ('' if index < len(TOPICS) else f" part {index // len(TOPICS) + 1}")
+              for index in range(args.topics)]
+    turns = script(topics)
+    prefs = preferences(args.preferences)
+
+    print(f"🧪 {len(turns)} questions, {sum(1 for _, topic in turns if topic)} follow-ups, "
+          f"{len(prefs)} stored preferences, budget {args.budget} tokens")
+    print(f"{'strategy':<9} {'p50 tok':>8} {'max tok':>8} {'recall':>7} {'build p50 us':>13} "
+          f"{'first token p50 ms':>19} {'p99 ms':>8}")
+    for strategy in ('stuffed', 'history', 'context'):
+        result = run(strategy, turns, prefs, args)
+        build = result['stages']['build']
+        first = result['stages']['first_token']
+        print(f"{strategy:<9} {result['p50_tokens']:>8} {result['max_tokens']:>8} {result['recall']:>7.0%} "
+              f"{build['p50_ms'] * 1000:>13.0f} {first['p50_ms']:>19.1f} {first['p99_ms']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
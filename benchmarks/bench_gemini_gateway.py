@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Gemini gateway under a rate-limited quota
+Many threads send requests at once to a local fake Gemini (see headless.py)
+that answers 429 beyond --quota requests per second, with a retry-after hint
+unless --no-hint is given. Each run is done twice:
+
+  direct   every caller calls the model itself, as before the gateway
+  gateway  callers share one GeminiGateway (token bucket, in-flight cap, backoff)
+
+Reports per mode: answered vs failed requests, 429s the server sent,
+retries, p50/p95/p99 latency of answered requests, the time spent waiting
+for a slot and the deepest queue.
+
+Usage:
+    python benchmarks/bench_gemini_gateway.py
+    python benchmarks/bench_gemini_gateway.py --callers 32 --requests 4 --quota 5 --rpm 300 --max-in-flight 4
+    python benchmarks/bench_gemini_gateway.py --rpm 0 --no-hint   # no client-side limit: backoff alone
+"""
+
+import io
+import os
+import sys
+import time
+import argparse
+import threading
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from headless import FakeModel, QuotaModel, StageTimer
+from gemini_gateway import GeminiGateway
+from metrics import Metrics
+
+
+def run(model, callers, requests):
+    """Fire callers x requests calls from concurrent threads; returns the timer and outcome counts"""
+    timer = StageTimer()
+    outcomes = {'answered': 0, 'failed': 0}
+    lock = threading.Lock()
+    start = threading.Barrier(callers)
+
+    def caller():
+        start.wait()
+        for _ in range(requests):
+            started = time.perf_counter()
+            try:
+                model.generate_content("what is the capital of france").text
+                outcome = 'answered'
+                timer.record('latency', time.perf_counter() - started)
+            except Exception:  # RateLimited from the gateway, the raw 429 when calling directly
+                outcome = 'failed'
+            with lock:
+                outcomes[outcome] += 1
+
+    threads = [threading.Thread(target=caller) for _ in range(callers)]
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # one retry line per 429
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    outcomes['seconds'] = time.perf_counter() - started
+    return timer, outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--callers', type=int, default=16, help="concurrent threads")
+    parser.add_argument('--requests', type=int, default=4, help="requests per thread")
+    parser.add_argument('--quota', type=float, default=4.0, help="requests per second the fake server accepts")
+    parser.add_argument('--latency', type=float, default=0.3, help="seconds per answered request")
+    parser.add_argument('--rpm', type=float, default=None,
+                        help="gateway requests per minute (default: the quota; 0 disables the bucket)")
+    parser.add_argument('--burst', type=int, default=None, help="gateway bucket size (default: the quota)")
+    parser.add_argument('--max-in-flight', type=int, default=4)
+    parser.add_argument('--max-retries', type=int, default=3)
+    parser.add_argument('--queue-timeout', type=float, default=60.0)
+    parser.add_argument('--no-hint', action='store_true', help="429s carry no retry-after")
+    args = parser.parse_args()
+    rpm = args.quota * 60 if args.rpm is None else args.rpm
+    burst = args.burst or max(1, int(args.quota))
+
+    def server():
+        return QuotaModel(FakeModel(args.latency, 0), args.quota, burst=max(1, int(args.quota)),
+                          hint=not args.no_hint)
+
+    print(f"🧪 {args.callers} callers x {args.requests} requests against a quota of {args.quota:g}/s")
+    print(f"{'mode':<8} {'answered':>9} {'failed':>7} {'429s':>6} {'retries':>8} {'seconds':>8} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'wait p95':>9} {'max queue':>9}")
+
+    direct = server()
+    timer, outcomes = run(direct, args.callers, args.requests)
+    latency = timer.summary().get('latency', {'p50_ms': 0, 'p95_ms': 0, 'p99_ms': 0})
+    print(f"{'direct':<8} {outcomes['answered']:>9} {outcomes['failed']:>7} {direct.rejected:>6} {0:>8} "
+          f"{outcomes['seconds']:>8.1f} {latency['p50_ms']:>9.0f} {latency['p95_ms']:>9.0f} "
+          f"{latency['p99_ms']:>9.0f} {'-':>9} {'-':>9}")
+
+    limited = server()
+    metrics = Metrics()
+    gateway = GeminiGateway(limited, requests_per_minute=rpm, burst=burst, max_in_flight=args.max_in_flight,
+                            max_retries=args.max_retries, queue_timeout=args.queue_timeout, metrics=metrics)
+    timer, outcomes = run(gateway, args.callers, args.requests)
+    latency = timer.summary().get('latency', {'p50_ms': 0, 'p95_ms': 0, 'p99_ms': 0})
+    summary = gateway.summary()
+    wait = metrics.summary().get('gemini_wait', {'p95_ms': 0})
+    print(f"{'gateway':<8} {outcomes['answered']:>9} {outcomes['failed']:>7} {limited.rejected:>6} "
+          f"{summary['retries']:>8} {outcomes['seconds']:>8.1f} {latency['p50_ms']:>9.0f} "
+          f"{latency['p95_ms']:>9.0f} {latency['p99_ms']:>9.0f} {wait['p95_ms']:>9.0f} "
+          f"{summary['max_queue_depth']:>9}")
+
+
+if __name__ == '__main__':
+    main()
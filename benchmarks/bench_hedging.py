@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tail latency of tiered and hedged Gemini requests
+Concurrent callers send a mix of short questions and demanding ones
+("explain ...") to local fake models (see headless.py) where a --tail
+fraction of requests takes --tail-latency seconds instead of the usual
+latency. Each run is repeated in three modes:
+
+  single   one model, one request per question (as before the router)
+  hedged   one model; a duplicate is sent when a request is slower than the
+           recent p95 and the first answer wins
+  tiered   hedged, and demanding questions go to a stronger, slower model
+
+Reports per mode p50/p95/p99 latency, hedge rate, how often the hedge won
+and the latency saved (time the losing request took after the winner
+answered), and how the questions were split between the tiers.
+
+Usage:
+    python benchmarks/bench_hedging.py
+    python benchmarks/bench_hedging.py --requests 400 --tail 0.04 --tail-latency 8 --stream
+"""
+
+import io
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from headless import FakeModel, StageTimer
+from gemini_gateway import GeminiGateway
+from model_router import ModelRouter, Tier
+from metrics import Metrics
+
+SIMPLE = ["what is the capital of france", "how tall is mount everest", "who wrote hamlet",
+          "what is the boiling point of water"]
+DEMANDING = ["explain how vaccines train the immune system", "compare nuclear and solar power",
+             "write a short poem about autumn"]
+
+
+def run(router, questions, callers, stream):
+    """Send every question from `callers` threads; returns the latency timer"""
+    timer = StageTimer()
+    remaining = list(questions)
+    lock = threading.Lock()
+
+    def caller():
+        while True:
+            with lock:
+                if not remaining:
+                    return
+                question = remaining.pop()
+            started = time.perf_counter()
+            response = router.generate_content(f"Respond naturally: {question}", stream=stream, query=question)
+            if stream:
+                next(iter(response))
+            else:
+                response.text
+            timer.record('latency', time.perf_counter() - started)
+
+    threads = [threading.Thread(target=caller) for _ in range(callers)]
+    with contextlib.redirect_stdout(io.StringIO()):  # one line per hedge
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return timer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=300)
+    parser.add_argument('--callers', type=int, default=8, help="concurrent threads")
+    parser.add_argument('--demanding', type=float, default=0.3, help="share of demanding questions")
+    parser.add_argument('--fast-latency', type=float, default=0.3, help="fast model seconds to answer")
+    parser.add_argument('--strong-latency', type=float, default=0.9, help="strong model seconds to answer")
+    parser.add_argument('--tail', type=float, default=0.02, help="share of requests that are slow")
+    parser.add_argument('--tail-latency', type=float, default=3.0, help="seconds a slow request takes")
+    parser.add_argument('--hedge-delay', type=float, default=1.0, help="hedge delay until p95 is known")
+    parser.add_argument('--max-hedge-rate', type=float, default=0.1)
+    parser.add_argument('--stream', action='store_true', help="measure time to the first streamed chunk")
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    questions = [random.choice(DEMANDING if random.random() < args.demanding else SIMPLE)
+                 for _ in range(args.requests)]
+
+    def tier(name, latency):
+        model = FakeModel(latency, 0, tail=args.tail, tail_first_token=args.tail_latency)
+        return Tier(name, GeminiGateway(model, requests_per_minute=0, max_in_flight=0))
+
+    print(f"🧪 {args.requests} questions ({args.demanding:.0%} demanding) from {args.callers} callers, "
+          f"{args.tail:.0%} of requests take {args.tail_latency:g}s")
+    print(f"{'mode':<8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'hedged':>7} {'wins':>5} "
+          f"{'saved s':>8} {'deadline':>8}  tiers")
+    for mode in ('single', 'hedged', 'tiered'):
+        tiers = [tier('fast', args.fast_latency)]
+        if mode == 'tiered':
+            tiers.append(tier('strong', args.strong_latency))
+        router = ModelRouter(tiers, deadline=30, hedging=mode != 'single', hedge_delay=args.hedge_delay,
+                             max_hedge_rate=args.max_hedge_rate, workers=args.callers * 2 + 4, metrics=Metrics())
+        latency = run(router, questions, args.callers, args.stream).summary()['latency']
+        time.sleep(args.tail_latency)  # losing requests finish and report what they would have cost
+        summary = router.summary()
+        tiers = ', '.join(f"{name} {count}" for name, count in summary['tiers'].items())
+        print(f"{mode:<8} {latency['p50_ms']:>8.0f} {latency['p95_ms']:>8.0f} {latency['p99_ms']:>8.0f} "
+              f"{summary['hedge_rate']:>7.1%} {summary['hedge_wins']:>5} {summary['saved_ms'] / 1000:>8.1f} "
+              f"{summary['deadline_exceeded']:>8}  {tiers}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Intent router micro-benchmark
+Routes thousands of synthetic commands through IntentRouter and through a
+linear if/elif-style substring chain, for growing numbers of intents.
+
+Usage: python benchmarks/bench_intent_router.py [--commands 5000] [--seed 7]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intent_router import IntentRouter, tokenize
+
+
+def make_vocabulary(rng, size):
+    """Random pronounceable-ish words"""
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rng.choice(letters) for _ in range(rng.randint(3, 8))))
+    return sorted(words)
+
+
+def make_table(rng, vocabulary, intent_count):
+    """Synthetic intent table with 1-3 phrases of 1-3 words per intent"""
+    table = []
+    for index in range(intent_count):
+        phrases = [' '.join(rng.sample(vocabulary, rng.randint(1, 3))) for _ in range(rng.randint(1, 3))]
+        table.append({'name': f"intent_{index}", 'phrases': phrases, 'priority': intent_count - index})
+    return table
+
+
+def make_commands(rng, vocabulary, table, count):
+    """Commands of 4-12 filler words, most of them containing one intent phrase"""
+    commands = []
+    for _ in range(count):
+        words = rng.sample(vocabulary, rng.randint(4, 12))
+        if rng.random() < 0.8:
+            phrase = rng.choice(rng.choice(table)['phrases'])
+            position = rng.randint(0, len(words))
+            words[position:position] = phrase.split()
+        commands.append(' '.join(words))
+    return commands
+
+
+def linear_route(table, command):
+    """What the old if/elif chain does: test every intent in order"""
+    padded = f" {command} "
+    for row in table:
+        if any(f" {phrase} " in padded for phrase in row['phrases']):
+            return row['name']
+    return None
+
+
+def reference_route(table, command):
+    """Brute-force whole-word matcher used to check the router's answers"""
+    tokens = tokenize(command)
+    best = None
+    for row in table:
+        for phrase in row['phrases']:
+            words = phrase.split()
+            for start in range(len(tokens) - len(words) + 1):
+                if tokens[start:start + len(words)] == words:
+                    rank = (row['priority'], len(words), -start)
+                    if best is None or rank > best[0]:
+                        best = (rank, row['name'])
+    return best[1] if best else None
+
+
+def time_per_command(route, commands):
+    """Average microseconds per routed command"""
+    started = time.perf_counter()
+    for command in commands:
+        route(command)
+    return (time.perf_counter() - started) / len(commands) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--commands', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(rng, 5000)
+
+    print(f"{'intents':>8} {'build ms':>9} {'router us/cmd':>14} {'linear us/cmd':>14} {'mismatches':>11}")
+    for intent_count in (10, 100, 1000, 5000):
+        table = make_table(rng, vocabulary, intent_count)
+        commands = make_commands(rng, vocabulary, table, args.commands)
+
+        started = time.perf_counter()
+        router = IntentRouter(table)
+        build_ms = (time.perf_counter() - started) * 1000
+
+        def route(command):
+            match = router.route(command)
+            return match.name if match else None
+
+        mismatches = sum(route(c) != reference_route(table, c) for c in commands[:200])
+        router_us = time_per_command(route, commands)
+        linear_us = time_per_command(lambda c: linear_route(table, c), commands)
+        print(f"{intent_count:>8} {build_ms:>9.1f} {router_us:>14.1f} {linear_us:>14.1f} {mismatches:>11}")
+
+
+if __name__ == '__main__':
+    main()
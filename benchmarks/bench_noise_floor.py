@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Noise-floor estimator check on synthetic audio
+Writes WAV files of background noise at several levels with speech-like bursts
+on top, runs each through NoiseFloorEstimator in microphone-sized chunks and
+reports how close the estimated floor gets to the true noise level and how
+quickly the threshold settles, both from scratch and from a stale saved
+threshold of 4000. Also covers a room that gets louder midway.
+
+Usage: python benchmarks/bench_noise_floor.py [--out DIR] [--wav FILE ...]
+"""
+
+import os
+import sys
+import wave
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from noise_calibration import estimate_from_wav
+
+SAMPLE_RATE = 16000
+CHUNK = 1024
+
+
+def noise(rng, seconds, rms):
+    """Gaussian background noise with the given RMS level"""
+    return rng.normal(0.0, rms, int(seconds * SAMPLE_RATE))
+
+
+def add_speech_bursts(rng, signal, level, share=0.4):
+    """Overlay amplitude-modulated tone bursts on roughly share of the signal"""
+    position = int(rng.uniform(0.5, 1.5) * SAMPLE_RATE)
+    while position < len(signal):
+        length = int(rng.uniform(0.4, 2.0) * SAMPLE_RATE)
+        t = np.arange(min(length, len(signal) - position)) / SAMPLE_RATE
+        pitch = rng.uniform(110, 240)
+        envelope = 0.5 * (1 + np.sin(2 * np.pi * 4 * t))  # syllable-rate modulation
+        burst = level * envelope * (np.sin(2 * np.pi * pitch * t) + 0.5 * np.sin(4 * np.pi * pitch * t))
+        signal[position:position + len(t)] += burst
+        position += int(length / share)
+    return signal
+
+
+def write_wav(path, signal):
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(np.clip(signal, -32768, 32767).astype(np.int16).tobytes())
+
+
+def settle_seconds(history, tolerance=0.2):
+    """Seconds until the threshold stays within tolerance of its final value"""
+    final = history[-1]
+    for index in range(len(history) - 1, -1, -1):
+        if abs(history[index] - final) > tolerance * final:
+            return (index + 1) * CHUNK / SAMPLE_RATE
+    return 0.0
+
+
+def make_cases(rng, directory):
+    """(path, true noise RMS at the end of the file) for each synthetic recording"""
+    cases = []
+    for rms in (30, 100, 400, 1500):
+        path = os.path.join(directory, f"noise_{rms}.wav")
+        write_wav(path, add_speech_bursts(rng, noise(rng, 20, rms), level=rms * 8 + 2000))
+        cases.append((path, rms))
+
+    # A quiet room where a fan switches on halfway through
+    path = os.path.join(directory, "noise_step_80_to_600.wav")
+    signal = np.concatenate([noise(rng, 10, 80), noise(rng, 10, 600)])
+    write_wav(path, add_speech_bursts(rng, signal, level=6000))
+    cases.append((path, 600))
+    return cases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--out', help="keep the generated WAV files in this directory")
+    parser.add_argument('--wav', nargs='*', default=[], help="also run these recordings (true level unknown)")
+    parser.add_argument('--seed', type=int, default=3)
+    args = parser.parse_args()
+
+    directory = args.out or tempfile.mkdtemp(prefix='noise_floor_')
+    os.makedirs(directory, exist_ok=True)
+    cases = make_cases(np.random.default_rng(args.seed), directory) + [(path, None) for path in args.wav]
+
+    print(f"{'file':<28} {'true rms':>9} {'floor':>8} {'error':>7} {'threshold':>10} "
+          f"{'settled s':>10} {'from 4000 s':>12}")
+    for path, true_rms in cases:
+        estimator, history = estimate_from_wav(path, CHUNK)
+        _, stale_history = estimate_from_wav(path, CHUNK, initial_threshold=4000)
+        error = f"{(estimator.noise_floor - true_rms) / true_rms:+.0%}" if true_rms else '?'
+        print(f"{os.path.basename(path):<28} {true_rms or '?':>9} {estimator.noise_floor:>8.0f} {error:>7} "
+              f"{estimator.threshold:>10.0f} {settle_seconds(history):>10.1f} {settle_seconds(stale_history):>12.1f}")
+
+    if not args.out:
+        print(f"(generated files are in {directory})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Reminder scheduler load time, wakeups and firing accuracy
+Fills a temporary database with --completed old reminders and --reminders
+pending ones spread over the next --days days, --overdue of them already past
+due and --due of them falling due during the --window seconds the run lasts.
+Each run is repeated in two modes:
+
+  poll   a thread wakes every second and checks every pending reminder
+         (how the schedule library ran reminders before)
+  heap   ReminderScheduler: a min-heap and one thread that sleeps until the
+         next reminder is due
+
+Reports per mode the time to load pending reminders at startup, thread
+wakeups, CPU time used while waiting, how late reminders fired (p50/p99),
+and how many reminders were marked completed.
+
+Usage:
+    python benchmarks/bench_reminders.py
+    python benchmarks/bench_reminders.py --reminders 50000 --completed 1000000 --due 100 --window 60
+"""
+
+import os
+import io
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import datetime
+import tempfile
+import threading
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from headless import StageTimer
+from reminder_scheduler import ReminderScheduler
+from storage import Storage
+
+
+def build_database(path, args):
+    """Reminders table as the assistant creates it, filled with old and pending reminders"""
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS reminders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            datetime TEXT NOT NULL,
+            completed INTEGER DEFAULT 0
+        )
+    ''')
+    now = time.time()
+
+    def when(offset):
+        return datetime.datetime.fromtimestamp(now + offset).isoformat()
+
+    rows = [('old', '', when(-random.uniform(60, args.days * 86400)), 1) for _ in range(args.completed)]
+    rows += [('overdue', '', when(-random.uniform(60, 86400)), 0) for _ in range(args.overdue)]
+    rows += [('due', '', when(random.uniform(5, args.window - 1)), 0) for _ in range(args.due)]
+    rows += [('later', 'not due during the run', when(random.uniform(args.window + 60, args.days * 86400)), 0)
+             for _ in range(args.reminders - args.overdue - args.due)]
+    random.shuffle(rows)
+    conn.executemany("INSERT INTO reminders (title, description, datetime, completed) VALUES (?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+class PollingScheduler:
+    """The old approach: wake every second and check every pending reminder"""
+
+    def __init__(self, alert, db_path):
+        self.alert = alert
+        self.db_path = db_path
+        self.jobs = []
+        self.running = False
+        self.stats = {'wakeups': 0, 'fired': 0}
+
+    def load(self):
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute("SELECT id, title, description, datetime FROM reminders WHERE completed = 0").fetchall()
+        conn.close()
+        self.jobs = [[datetime.datetime.fromisoformat(when).timestamp(), reminder_id, title, description, False]
+                     for reminder_id, title, description, when in rows]
+        return len(self.jobs)
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def run(self):
+        conn = sqlite3.connect(self.db_path)
+        while self.running:
+            now = time.time()
+            self.stats['wakeups'] += 1
+            fired = []
+            for job in self.jobs:
+                if not job[4] and job[0] <= now:
+                    job[4] = True
+                    self.alert(job[1], job[2], job[3], now - job[0])
+                    fired.append((job[1],))
+            if fired:
+                conn.executemany("UPDATE reminders SET completed = 1 WHERE id = ?", fired)
+                conn.commit()
+                self.stats['fired'] += len(fired)
+            time.sleep(1)
+        conn.close()
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+
+
+def completed(path):
+    conn = sqlite3.connect(path)
+    count = conn.execute("SELECT COUNT(*) FROM reminders WHERE completed = 1").fetchone()[0]
+    conn.close()
+    return count
+
+
+def run(mode, path, args):
+    timer = StageTimer()
+    before = completed(path)
+
+    def alert(reminder_id, title, description, late):
+        if title == 'due':
+            timer.record('late', late)
+
+    storage = None
+    if mode == 'heap':
+        with contextlib.redirect_stdout(io.StringIO()):  # migration lines
+            storage = Storage(path)  # builds the indexes, once per database
+        scheduler = ReminderScheduler(alert, storage)
+    else:
+        scheduler = PollingScheduler(alert, path)
+    started = time.perf_counter()
+    loaded = scheduler.load()
+    load_ms = (time.perf_counter() - started) * 1000
+
+    scheduler.start()
+    time.sleep(1)  # overdue reminders fire first
+    cpu = time.process_time()
+    time.sleep(args.window - 1)
+    cpu_ms = (time.process_time() - cpu) * 1000
+    scheduler.stop()
+    if storage:
+        storage.close()
+    late = timer.summary().get('late', {'p50_ms': 0.0, 'p99_ms': 0.0})
+    return {'loaded': loaded, 'load_ms': load_ms, 'wakeups': scheduler.stats['wakeups'], 'cpu_ms': cpu_ms,
+            'late_p50': late['p50_ms'], 'late_p99': late['p99_ms'], 'completed': completed(path) - before}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--reminders', type=int, default=20000, help="pending reminders")
+    parser.add_argument('--completed', type=int, default=300000, help="old reminders already completed")
+    parser.add_argument('--overdue', type=int, default=100, help="pending reminders already past due")
+    parser.add_argument('--due', type=int, default=10, help="reminders falling due during the run")
+    parser.add_argument('--days', type=float, default=365, help="spread of reminder times")
+    parser.add_argument('--window', type=float, default=30, help="seconds each mode runs")
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"🧪 {args.reminders} pending reminders ({args.overdue} overdue, {args.due} due within "
+          f"{args.window:g}s), {args.completed} completed")
+    print(f"{'mode':<5} {'loaded':>7} {'load ms':>8} {'wakeups':>8} {'cpu ms':>8} {'late p50 ms':>12} "
+          f"{'late p99 ms':>12} {'completed':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in ('poll', 'heap'):
+            random.seed(args.seed)
+            path = os.path.join(directory, f"{mode}.db")
+            build_database(path, args)
+            result = run(mode, path, args)
+            print(f"{mode:<5} {result['loaded']:>7} {result['load_ms']:>8.1f} {result['wakeups']:>8} "
+                  f"{result['cpu_ms']:>8.1f} {result['late_p50']:>12.1f} {result['late_p99']:>12.1f} "
+                  f"{result['completed']:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Concurrent-session load test for the multi-session server
+Starts server.py in-process around a headless assistant (local stand-ins for
+Gemini, the weather/news APIs and the speech engine, see headless.py), or
+targets a running server with --connect, then opens N WebSocket sessions at
+once, each sending its own sequence of text commands. Repeated for every
+concurrency level given with --sessions.
+
+Per level it reports:
+  throughput   commands completed per second across all sessions
+  first_reply  command sent until the first reply text arrives
+  first_audio  command sent until the first synthesized audio arrives
+  command      command sent until "done"
+
+Usage:
+    python benchmarks/bench_server.py
+    python benchmarks/bench_server.py --sessions 1 8 32 --commands-per-session 20 --workers 16
+    python benchmarks/bench_server.py --assistant enhanced --ai-latency 0.8 --json bench_results.jsonl
+    GEMINI_RPM=240 python benchmarks/bench_server.py --ai-quota 4   # quota errors behind the limiter
+    python benchmarks/bench_server.py --connect 127.0.0.1:8765 --token secret   # a real server
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import builtins
+import platform
+import tempfile
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_assistant import SCRIPTS, refuse_input
+from headless import StageTimer, FakeSpeechEngine
+from server import AssistantServer, SpeechSynthesizer, connect, server_assistant
+
+
+async def run_session(host, port, token, commands, timer, audio):
+    """Send commands one after another on one WebSocket, recording per-command latencies"""
+    path = '/ws' if audio else '/ws?audio=false'
+    socket = await connect(host, port, path, token)
+    greeting = json.loads(await socket.receive())
+    expect_audio = audio and greeting.get('audio')
+    completed = 0
+    for command in commands:
+        started = time.perf_counter()
+        await socket.send_json({'text': command})
+        first_reply = first_audio = None
+        while True:
+            message = await socket.receive()
+            if message is None:
+                return completed
+            now = time.perf_counter()
+            if isinstance(message, bytes):
+                if first_audio is None:
+                    first_audio = now
+                continue
+            data = json.loads(message)
+            if data['type'] == 'reply' and first_reply is None:
+                first_reply = now
+            elif data['type'] == 'done':
+                break
+        timer.record('command', now - started)
+        if first_reply is not None:
+            timer.record('first_reply', first_reply - started)
+        if expect_audio and first_audio is not None:
+            timer.record('first_audio', first_audio - started)
+        completed += 1
+    await socket.close()
+    return completed
+
+
+async def run_level(host, port, token, sessions, commands, per_session, audio):
+    timer = StageTimer()
+    plans = [[commands[(offset + index) % len(commands)] for index in range(per_session)]
+             for offset in range(sessions)]
+    started = time.perf_counter()
+    completed = await asyncio.gather(*(run_session(host, port, token, plan, timer, audio) for plan in plans))
+    elapsed = time.perf_counter() - started
+    return {
+        'sessions': sessions,
+        'commands': sum(completed),
+        'seconds': round(elapsed, 3),
+        'throughput': sum(completed) / elapsed if elapsed else 0.0,
+        'stages': timer.summary(),
+    }
+
+
+async def benchmark(args):
+    server = None
+    if args.connect:
+        host, port = args.connect.rsplit(':', 1)
+        port = int(port)
+    else:
+        from headless import headless
+        if args.assistant == 'voice':
+            from voice_assistant import VoiceAssistant as assistant_class
+        else:
+            from enhanced_voice_assistant import EnhancedVoiceAssistant as assistant_class
+        assistant_class = headless(server_assistant(assistant_class), ai_latency=args.ai_latency,
+                                   ai_words_per_second=args.ai_wps, http_latency=args.http_latency,
+                                   ai_quota=args.ai_quota)
+        assistant = assistant_class()
+        assistant.startup.wait_all()
+        synthesizer = SpeechSynthesizer(metrics=assistant.metrics,
+                                        engine_factory=lambda: FakeSpeechEngine()).start()
+        server = AssistantServer(assistant, synthesizer, workers=args.workers,
+                                 max_sessions=sum(args.sessions))
+        host, port = await server.start('127.0.0.1', 0)
+
+    commands = SCRIPTS[args.assistant]
+    if args.commands:
+        with open(args.commands, encoding='utf-8') as f:
+            commands = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+    levels = []
+    try:
+        for sessions in args.sessions:
+            levels.append(await run_level(host, port, args.token, sessions, commands,
+                                          args.commands_per_session, not args.no_audio))
+    finally:
+        if server:
+            await server.stop()
+            server.close()
+    return {'levels': levels, 'spans': server.assistant.metrics.summary() if server else {},
+            'gemini': server.assistant.model.summary() if server else {}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--assistant', choices=sorted(SCRIPTS), default='voice')
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 4, 16, 32],
+                        help="concurrent sessions per level")
+    parser.add_argument('--commands-per-session', type=int, default=10)
+    parser.add_argument('--commands', help="text file with one command per line")
+    parser.add_argument('--workers', type=int, default=8, help="server worker threads")
+    parser.add_argument('--ai-latency', type=float, default=0.4, help="seconds before Gemini's first chunk")
+    parser.add_argument('--ai-wps', type=float, default=40.0, help="streamed Gemini words per second")
+    parser.add_argument('--http-latency', type=float, default=0.15, help="weather/news API seconds")
+    parser.add_argument('--ai-quota', type=float, help="Gemini requests per second before the fake answers 429")
+    parser.add_argument('--no-audio', action='store_true', help="ask for text replies only")
+    parser.add_argument('--connect', help="host:port of a running server instead of an in-process one")
+    parser.add_argument('--token', help="SERVER_TOKEN of the server")
+    parser.add_argument('--json', help="append the results as one JSON line to this file")
+    parser.add_argument('--verbose', action='store_true', help="show the assistant's own output")
+    args = parser.parse_args()
+    if args.json:
+        args.json = os.path.abspath(args.json)
+    if args.commands:
+        args.commands = os.path.abspath(args.commands)
+
+    os.environ.update({
+        'AI_CACHE': 'false',
+        'STREAM_AI_RESPONSES': 'true',
+        'PHRASE_CACHE': 'false',
+        'PREWARM_SKILLS': '',
+        'WEATHER_API_KEY': 'headless',
+        'NEWS_API_KEY': 'headless',
+    })
+    # The Gemini limiter is off unless asked for, so it does not hide the stand-ins' own latency
+    os.environ.setdefault('GEMINI_RPM', '0')
+    os.environ.setdefault('GEMINI_MAX_IN_FLIGHT', '0')
+    builtins.input = refuse_input
+
+    # Databases, caches and the intent model are created in a scratch directory
+    with tempfile.TemporaryDirectory() as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        try:
+            with output:
+                results = asyncio.run(benchmark(args))
+        finally:
+            os.chdir(cwd)
+
+    print(f"{'sessions':>8} {'commands':>9} {'cmd/s':>8} {'stage':<12} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for level in results['levels']:
+        for position, (stage, entry) in enumerate(sorted(level['stages'].items())):
+            prefix = (f"{level['sessions']:>8} {level['commands']:>9} {level['throughput']:>8.2f}"
+                      if position == 0 else " " * 27)
+            print(f"{prefix} {stage:<12} {entry['p50_ms']:>9.1f} {entry['p95_ms']:>9.1f} {entry['p99_ms']:>9.1f}")
+    gemini = results['gemini']
+    if gemini:
+        print(f"🤖 Gemini: {gemini['requests']} requests, {gemini['retries']} retries, "
+              f"{gemini['rate_limited']} rate limited, deepest queue {gemini['max_queue_depth']}")
+
+    if args.json:
+        config = {key: value for key, value in vars(args).items() if key not in ('json', 'verbose', 'token')}
+        with open(args.json, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'time': time.time(), 'python': platform.python_version(),
+                                'config': config, **results}) + '\n')
+        print(f"📝 Appended results to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
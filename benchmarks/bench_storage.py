@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Insert and query throughput of the assistant database
+Each mode starts from an empty database in --dir and:
+
+  1. inserts --timed-inserts notes and reminders, one row per call, from
+     --writers threads (as concurrent commands and server sessions do)
+  2. fills the tables up to --notes and --reminders rows in bulk (untimed)
+  3. runs --queries reads from --readers threads (pending reminders soonest
+     first, most recent notes) while one thread keeps adding notes
+
+Modes:
+
+  old       one shared connection behind a lock, rollback journal, a commit
+            per insert, no indexes (the database before storage.py)
+  storage   Storage: WAL, one writer thread committing queued writes in
+            batches, a read connection per thread, indexed queries
+
+Reports per mode inserts per second with p50/p99 insert latency, then
+queries per second with p50/p99 query latency and the writes made meanwhile.
+
+Usage:
+    python benchmarks/bench_storage.py
+    python benchmarks/bench_storage.py --notes 200000 --reminders 200000 --writers 16 --readers 8
+"""
+
+import io
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import datetime
+import tempfile
+import threading
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from headless import StageTimer
+from storage import Storage, MIGRATIONS
+
+INSERT_NOTE = "INSERT INTO notes (title, content, created_at) VALUES (?, ?, ?)"
+INSERT_REMINDER = "INSERT INTO reminders (title, description, datetime, completed) VALUES (?, ?, ?, ?)"
+QUERIES = [
+    "SELECT * FROM reminders WHERE completed = 0 ORDER BY datetime LIMIT 20",
+    "SELECT * FROM notes ORDER BY created_at DESC LIMIT 5",
+]
+
+
+class SharedConnection:
+    """The old setup: one connection for every thread, each write committed on its own"""
+
+    def __init__(self, db_path):
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.lock = threading.Lock()
+        for statement in MIGRATIONS[0][2]:  # tables only
+            self.conn.execute(statement)
+        self.conn.commit()
+
+    def execute(self, sql, params=()):
+        with self.lock:
+            cursor = self.conn.execute(sql, params)
+            self.conn.commit()
+            return cursor.lastrowid
+
+    def execute_many(self, sql, rows):
+        with self.lock:
+            self.conn.executemany(sql, rows)
+            self.conn.commit()
+
+    def query(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def close(self):
+        self.conn.close()
+
+
+def note(index, now):
+    created = datetime.datetime.fromtimestamp(now - random.uniform(0, 365 * 86400)).isoformat()
+    return (f"note {index}", f"content of note number {index} " * 4, created)
+
+
+def reminder(index, now):
+    when = datetime.datetime.fromtimestamp(now + random.uniform(-365, 365) * 86400).isoformat()
+    return (f"reminder {index}", "", when, 1 if when < datetime.datetime.now().isoformat() else 0)
+
+
+def in_threads(count, target):
+    threads = [threading.Thread(target=target, args=(index,)) for index in range(count)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def run(mode, path, args):
+    timer = StageTimer()
+    now = time.time()
+    random.seed(args.seed)
+    with contextlib.redirect_stdout(io.StringIO()):  # migration lines
+        db = Storage(path, batch_size=args.batch_size) if mode == 'storage' else SharedConnection(path)
+
+    def writer(index):
+        for row in range(index, args.timed_inserts, args.writers):
+            sql, values = (INSERT_NOTE, note(row, now)) if row % 2 else (INSERT_REMINDER, reminder(row, now))
+            timer.timed('insert', db.execute, sql, values)
+
+    insert_seconds = in_threads(args.writers, writer)
+
+    inserted = args.timed_inserts
+    for total, sql, make in ((args.notes, INSERT_NOTE, note), (args.reminders, INSERT_REMINDER, reminder)):
+        rows = [make(row, now) for row in range(max(0, total - inserted // 2))]
+        for start in range(0, len(rows), 10000):
+            db.execute_many(sql, rows[start:start + 10000])
+
+    done = threading.Event()
+    background = {'writes': 0}
+
+    def background_writer():
+        while not done.is_set():
+            db.execute(INSERT_NOTE, note(background['writes'], now))
+            background['writes'] += 1
+
+    def reader(index):
+        for query in range(index, args.queries, args.readers):
+            timer.timed('query', db.query, QUERIES[query % len(QUERIES)])
+
+    writing = threading.Thread(target=background_writer)
+    writing.start()
+    query_seconds = in_threads(args.readers, reader)
+    done.set()
+    writing.join()
+    db.close()
+
+    stages = timer.summary()
+    return {'inserts_per_s': args.timed_inserts / insert_seconds, 'insert': stages['insert'],
+            'queries_per_s': args.queries / query_seconds, 'query': stages['query'],
+            'background_writes': background['writes']}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--notes', type=int, default=100000)
+    parser.add_argument('--reminders', type=int, default=100000)
+    parser.add_argument('--timed-inserts', type=int, default=5000, help="rows inserted one per call")
+    parser.add_argument('--writers', type=int, default=8, help="threads inserting")
+    parser.add_argument('--readers', type=int, default=4, help="threads querying")
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=256, help="STORAGE_BATCH_SIZE")
+    parser.add_argument('--dir', default=None, help="where to create the databases (default: a temp dir)")
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"🧪 {args.notes} notes and {args.reminders} reminders; {args.timed_inserts} timed inserts from "
+          f"{args.writers} threads, {args.queries} queries from {args.readers} threads")
+    print(f"{'mode':<8} {'inserts/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'queries/s':>10} {'p50 ms':>8} "
+          f"{'p99 ms':>8} {'writes meanwhile':>17}")
+    with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+        for mode in ('old', 'storage'):
+            result = run(mode, os.path.join(directory, f"{mode}.db"), args)
+            insert, query = result['insert'], result['query']
+            print(f"{mode:<8} {result['inserts_per_s']:>10.0f} {insert['p50_ms']:>8.2f} {insert['p99_ms']:>8.2f} "
+                  f"{result['queries_per_s']:>10.0f} {query['p50_ms']:>8.2f} {query['p99_ms']:>8.2f} "
+                  f"{result['background_writes']:>17}")
+
+
+if __name__ == '__main__':
+    main()
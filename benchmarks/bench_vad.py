@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+VAD accuracy and endpoint-latency benchmark
+Runs every WAV in a folder through the VAD the way the capture thread does:
+microphone-sized chunks, the noise-floor estimate updated as audio arrives,
+one utterance endpointed at a time. Each WAV needs a sidecar JSON with its
+labeled speech segments in seconds: {"segments": [[0.8, 2.1], ...]}.
+
+Reports frame-level accuracy, utterances found, false starts, utterances cut
+short or split, endpoint latency (end decision minus true end of speech,
+for utterances that were not cut) overall and for short commands, for the
+adaptive VAD and for a baseline that mimics the old Recognizer settings
+(energy only, fixed 0.8s pause, 5s phrase limit).
+
+Usage:
+    python benchmarks/bench_vad.py DIR
+    python benchmarks/bench_vad.py --generate DIR   # write a synthetic labeled set first
+"""
+
+import os
+import sys
+import json
+import glob
+import wave
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from noise_calibration import NoiseFloorEstimator, read_wav
+from vad import Endpointer, speech_mask, frame_length_for
+
+CHUNK = 1024
+SAMPLE_RATE = 16000
+
+CONFIGS = {
+    'adaptive': {},
+    'baseline': {'min_hangover': 0.8, 'max_hangover': 0.8, 'hangover_growth': 0.0, 'max_utterance': 5.0,
+                 'zcr_max': 1.01, 'loud_ratio': 1.0},
+}
+
+
+def load_labels(path):
+    with open(os.path.splitext(path)[0] + '.json', encoding='utf-8') as f:
+        return [tuple(segment) for segment in json.load(f)['segments']]
+
+
+def endpoint_stream(samples, sample_rate, options):
+    """Endpoint utterances one after another; returns [(onset s, end s, decided at s)] and the final threshold"""
+    estimator = NoiseFloorEstimator(sample_rate)
+    endpointer = Endpointer(sample_rate, **options)
+    utterances = []
+    base = 0
+    for start in range(0, len(samples), CHUNK):
+        chunk = samples[start:start + CHUNK]
+        threshold = estimator.update(chunk.tobytes())
+        if endpointer.feed(chunk, threshold):
+            decided = start + len(chunk)
+            utterances.append(((base + endpointer.onset) / sample_rate, (base + endpointer.end) / sample_rate,
+                               decided / sample_rate))
+            endpointer.reset()
+            base = decided
+    return utterances, estimator.threshold
+
+
+def frame_truth(labels, frames, frame_seconds):
+    truth = np.zeros(frames, dtype=bool)
+    for start, end in labels:
+        truth[int(start / frame_seconds):int(np.ceil(end / frame_seconds))] = True
+    return truth
+
+
+def score(paths, options):
+    totals = {'frames': 0, 'correct': 0, 'labeled': 0, 'found': 0, 'false_starts': 0, 'cut_short': 0}
+    latencies = []
+    mask_options = {key: options[key] for key in ('zcr_max', 'loud_ratio') if key in options}
+    for path in paths:
+        data, sample_rate, _ = read_wav(path)
+        samples = np.frombuffer(data, dtype=np.int16)
+        labels = load_labels(path)
+        utterances, threshold = endpoint_stream(samples, sample_rate, options)
+
+        hangover_frames = int(options.get('max_hangover', 0.8) * 1000 / 20)
+        mask = speech_mask(samples, sample_rate, threshold, hangover_frames=hangover_frames, **mask_options)
+        truth = frame_truth(labels, len(mask), frame_length_for(sample_rate) / sample_rate)
+        totals['frames'] += len(mask)
+        totals['correct'] += int((mask == truth).sum())
+
+        totals['labeled'] += len(labels)
+        covered = set()
+        for start, stop in labels:
+            pieces = [u for u in utterances if u[0] < stop and u[1] > start]
+            covered.update(pieces)
+            if not pieces:
+                continue
+            totals['found'] += 1
+            if len(pieces) > 1 or pieces[-1][1] < stop - 0.1:
+                # Split into several utterances or closed before the speaker finished
+                totals['cut_short'] += 1
+            else:
+                latencies.append((pieces[-1][2] - stop, stop - start))
+        totals['false_starts'] += len(set(utterances) - covered)
+    return totals, latencies
+
+
+def write_synthetic_set(directory, count=12, seed=5):
+    """Noise plus voiced bursts: short commands and long dictation with pauses, and some hiss/clicks"""
+    rng = np.random.default_rng(seed)
+    os.makedirs(directory, exist_ok=True)
+    for index in range(count):
+        noise_rms = rng.choice([40, 150, 500])
+        signal = rng.normal(0, noise_rms, int(SAMPLE_RATE * 45)).astype(np.float32)
+        segments = []
+        position = rng.uniform(1.5, 3.0)
+        while position < 26:
+            dictation = rng.random() < 0.3
+            pieces = rng.integers(3, 7) if dictation else 1
+            start = position
+            for piece in range(pieces):
+                length = rng.uniform(0.8, 1.8) if dictation else rng.uniform(0.5, 1.8)
+                t = np.arange(int(length * SAMPLE_RATE)) / SAMPLE_RATE
+                pitch = rng.uniform(100, 250)
+                envelope = 0.6 + 0.4 * np.sin(2 * np.pi * 4 * t)
+                burst = noise_rms * 10 * envelope * (np.sin(2 * np.pi * pitch * t) + 0.4 * np.sin(6 * np.pi * pitch * t))
+                offset = int(position * SAMPLE_RATE)
+                signal[offset:offset + len(t)] += burst[:len(signal) - offset]
+                position += length
+                if piece < pieces - 1:
+                    position += rng.uniform(0.2, 0.45)  # pause between phrases of the same dictation
+            segments.append([round(start, 3), round(position, 3)])
+            position += rng.uniform(2.0, 4.0)
+            if rng.random() < 0.3:
+                # A burst of hiss between utterances, which should not start one
+                offset = int((position - 1.0) * SAMPLE_RATE)
+                signal[offset:offset + 4000] += rng.normal(0, noise_rms * 6, 4000)
+
+        path = os.path.join(directory, f"synthetic_{index:02d}.wav")
+        with wave.open(path, 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(SAMPLE_RATE)
+            f.writeframes(np.clip(signal, -32768, 32767).astype(np.int16).tobytes())
+        with open(os.path.splitext(path)[0] + '.json', 'w', encoding='utf-8') as f:
+            json.dump({'segments': segments}, f)
+    print(f"📝 Wrote {count} labeled recordings to {directory}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('directory')
+    parser.add_argument('--generate', action='store_true', help="write a synthetic labeled set into DIR first")
+    args = parser.parse_args()
+
+    if args.generate:
+        write_synthetic_set(args.directory)
+    paths = sorted(path for path in glob.glob(os.path.join(args.directory, '*.wav'))
+                   if os.path.exists(os.path.splitext(path)[0] + '.json'))
+    if not paths:
+        parser.error(f"no labeled WAV files in {args.directory}")
+
+    print(f"{'config':<10} {'frame acc':>9} {'found':>9} {'false':>6} {'cut':>5} "
+          f"{'latency ms':>11} {'p95 ms':>7} {'short cmd ms':>13}")
+    for name, options in CONFIGS.items():
+        totals, latencies = score(paths, options)
+        overall = sorted(latency for latency, _ in latencies) or [0.0]
+        short = [latency for latency, length in latencies if length < 2.0] or [0.0]
+        mean_ms = sum(overall) / len(overall) * 1000
+        p95_ms = overall[int(0.95 * (len(overall) - 1))] * 1000
+        print(f"{name:<10} {totals['correct'] / totals['frames']:>9.1%} "
+              f"{totals['found']:>4}/{totals['labeled']:<4} {totals['false_starts']:>6} {totals['cut_short']:>5} "
+              f"{mean_ms:>11.0f} {p95_ms:>7.0f} {sum(short) / len(short) * 1000:>13.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Wake-word detection rate, false triggers and CPU cost
+Runs recordings through the same path the assistant uses while waiting for
+its name: noise-floor estimate and VAD on every chunk, the wake-word matcher
+only on utterances the VAD finds.
+
+  - positives: files that each start with the wake word (optionally followed by a command)
+  - negatives: background speech/noise that never contains it; false triggers are
+    reported per hour of this audio
+  - CPU: process time spent per second of audio (percent of one core), for the
+    always-on stream part and for the matcher, plus how many utterances were
+    kept away from cloud recognition
+
+Usage:
+    python benchmarks/bench_wake_word.py --enroll a.wav b.wav c.wav --positive p*.wav --negative chatter.wav
+    python benchmarks/bench_wake_word.py            # synthetic voice-like recordings
+"""
+
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from noise_calibration import NoiseFloorEstimator
+from vad import Endpointer
+from wake_word import WakeWordDetector, load_recording
+
+CHUNK = 1024
+SAMPLE_RATE = 16000
+
+# Rough formant pairs (Hz) for a few vowels
+VOWELS = {'a': (730, 1090), 'i': (270, 2290), 'u': (300, 870), 'e': (530, 1840), 'o': (570, 840)}
+WAKE_WORD = [('a', 0.28), ('i', 0.30)]
+
+
+def vowel(rng, name, seconds, pitch):
+    """Harmonic source shaped by two formant resonances, with a syllable envelope"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    first, second = VOWELS[name]
+    glide = pitch * (1 + 0.08 * np.sin(np.pi * t / seconds))
+    phase = 2 * np.pi * np.cumsum(glide) / SAMPLE_RATE
+    wave_ = np.zeros_like(t)
+    for harmonic in range(1, int(3500 / pitch)):
+        frequency = harmonic * pitch
+        gain = np.exp(-((frequency - first) / 120) ** 2) + 0.6 * np.exp(-((frequency - second) / 180) ** 2) + 0.02
+        wave_ += gain * np.sin(harmonic * phase)
+    envelope = np.sin(np.pi * t / seconds) ** 0.5
+    return wave_ * envelope * rng.uniform(3000, 6000) / (np.abs(wave_).max() + 1e-9)
+
+
+def say(rng, syllables, pitch=None, speed=None):
+    pitch = pitch or rng.uniform(100, 220)
+    speed = speed or rng.uniform(0.85, 1.15)
+    gap = np.zeros(int(0.03 * SAMPLE_RATE))
+    parts = []
+    for name, seconds in syllables:
+        parts += [vowel(rng, name, seconds * speed, pitch), gap]
+    return np.concatenate(parts)
+
+
+def random_words(rng, count):
+    """Syllable sequences that never contain the wake word's vowel pair"""
+    wake = [name for name, _ in WAKE_WORD]
+    syllables = []
+    while len(syllables) < count:
+        name = str(rng.choice(list(VOWELS)))
+        if syllables and [syllables[-1][0], name] == wake:
+            continue
+        syllables.append((name, float(rng.uniform(0.15, 0.35))))
+    return syllables
+
+
+def with_noise(rng, signal, noise_rms, lead=1.0, tail=1.0):
+    padded = np.concatenate([np.zeros(int(lead * SAMPLE_RATE)), signal, np.zeros(int(tail * SAMPLE_RATE))])
+    return np.clip(padded + rng.normal(0, noise_rms, len(padded)), -32768, 32767).astype(np.int16)
+
+
+def synthetic_set(seed=11):
+    """The enrolled speaker says the wake word with varying pitch and speed; chatter comes from anyone"""
+    rng = np.random.default_rng(seed)
+
+    def wake():
+        return say(rng, WAKE_WORD, pitch=rng.uniform(135, 165), speed=rng.uniform(0.9, 1.1))
+
+    enroll = [(with_noise(rng, wake(), 60, 0.3, 0.3), SAMPLE_RATE) for _ in range(3)]
+    positives = []
+    for index in range(40):
+        command = say(rng, random_words(rng, int(rng.integers(2, 7)))) if index % 2 else np.zeros(0)
+        pause = np.zeros(int(rng.uniform(0.1, 0.4) * SAMPLE_RATE)) if len(command) else np.zeros(0)
+        signal = np.concatenate([wake(), pause, command])
+        positives.append((with_noise(rng, signal, rng.choice([40, 150, 400])), SAMPLE_RATE))
+
+    # Ten minutes of chatter: random words and phrases separated by pauses
+    pieces = []
+    while sum(len(piece) for piece in pieces) < 600 * SAMPLE_RATE:
+        pieces.append(say(rng, random_words(rng, int(rng.integers(1, 9)))))
+        pieces.append(np.zeros(int(rng.uniform(0.3, 3.0) * SAMPLE_RATE)))
+    negatives = [(with_noise(rng, np.concatenate(pieces), 150), SAMPLE_RATE)]
+    return enroll, positives, negatives
+
+
+def run_stream(detector, samples, sample_rate):
+    """Feed audio chunk by chunk like the capture thread; returns triggers, utterances and CPU seconds"""
+    estimator = NoiseFloorEstimator(sample_rate)
+    endpointer = Endpointer(sample_rate)
+    stream_cpu = matcher_cpu = 0.0
+    triggers = utterances = 0
+    base = 0
+    for start in range(0, len(samples), CHUNK):
+        chunk = samples[start:start + CHUNK]
+        started = time.process_time()
+        threshold = estimator.update(chunk.tobytes())
+        ended = endpointer.feed(chunk, threshold)
+        stream_cpu += time.process_time() - started
+        if not ended:
+            continue
+
+        utterances += 1
+        onset = max(0, base + endpointer.onset - int(0.3 * sample_rate))
+        started = time.process_time()
+        triggered, _, _ = detector.detect(samples[onset:base + endpointer.end], sample_rate)
+        matcher_cpu += time.process_time() - started
+        triggers += triggered
+        endpointer.reset()
+        base = start + len(chunk)
+    return triggers, utterances, stream_cpu, matcher_cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--enroll', nargs='*', default=[])
+    parser.add_argument('--positive', nargs='*', default=[])
+    parser.add_argument('--negative', nargs='*', default=[])
+    parser.add_argument('--margin', type=float, default=1.3, help="enrollment threshold margin")
+    args = parser.parse_args()
+
+    if args.enroll:
+        enroll = [load_recording(path) for path in args.enroll]
+        positives = [load_recording(path) for path in args.positive]
+        negatives = [load_recording(path) for path in args.negative]
+    else:
+        print("🧪 Using synthetic voice-like recordings")
+        enroll, positives, negatives = synthetic_set()
+
+    detector = WakeWordDetector.enroll(enroll, args.margin)
+    print(f"✓ Enrolled {len(detector.templates)} recordings, threshold {detector.threshold:.2f}")
+
+    detected = 0
+    for samples, sample_rate in positives:
+        triggers, _, _, _ = run_stream(detector, samples, sample_rate)
+        detected += triggers > 0
+    if positives:
+        print(f"🎯 Detected the wake word in {detected}/{len(positives)} positive recordings "
+              f"({detected / len(positives):.0%})")
+
+    seconds = triggers = utterances = stream_cpu = matcher_cpu = 0
+    for samples, sample_rate in negatives:
+        found, count, stream, matcher = run_stream(detector, samples, sample_rate)
+        seconds += len(samples) / sample_rate
+        triggers += found
+        utterances += count
+        stream_cpu += stream
+        matcher_cpu += matcher
+    if seconds:
+        print(f"🚫 False triggers: {triggers} in {seconds / 60:.1f} min of negative audio "
+              f"({triggers / seconds * 3600:.1f}/hour)")
+        print(f"☁ Recognition calls avoided: {utterances - triggers} of {utterances} utterances")
+        print(f"⚙ CPU while waiting: stream + VAD {stream_cpu / seconds:.2%} of a core, "
+              f"wake-word matching {matcher_cpu / seconds:.2%} "
+              f"({matcher_cpu / max(utterances, 1) * 1000:.1f}ms per utterance)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Circuit breakers for the assistant's external dependencies
+Features: Closed/open/half-open breaker per dependency, immediate CircuitOpen
+while a dependency is down instead of waiting for another timeout, a single
+trial call after the reset timeout (doubling while it keeps failing), state
+changes exported as metrics
+"""
+
+import os
+import time
+import threading
+
+from metrics import Metrics
+
+CLOSED, HALF_OPEN, OPEN = 'closed', 'half_open', 'open'
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}  # exported as the breaker_<name>_state gauge
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling a dependency whose breaker is open"""
+
+    def __init__(self, name, retry_in):
+        super().__init__(f"{name} is unavailable (circuit open, next try in {retry_in:.0f}s)")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Stops calling a dependency after failure_threshold failures in a row
+
+    Closed: calls go through and consecutive failures are counted.
+    Open: calls fail immediately with CircuitOpen for reset_timeout seconds.
+    Half-open: one trial call goes through; success closes the breaker, failure
+    opens it again for twice as long (up to max_reset_timeout).
+    """
+
+    def __init__(self, name, failure_threshold=3, reset_timeout=30.0, max_reset_timeout=300.0, metrics=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.metrics = metrics or Metrics(enabled=False)
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_started = None
+        self.counts = {'calls': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+
+    def transition(self, state):
+        """Change state; the caller holds the lock"""
+        previous, self.state = self.state, state
+        if state == OPEN:
+            self.opened_at = time.monotonic()
+            self.counts['opened'] += 1
+            self.metrics.increment(f"breaker_{self.name}_opened")
+            print(f"🔌 {self.name} circuit open for {self.reset_timeout:.0f}s after {self.failures} failures")
+        elif state == CLOSED and previous != CLOSED:
+            print(f"🔌 {self.name} circuit closed, service recovered")
+        self.metrics.gauge(f"breaker_{self.name}_state", STATE_VALUES[state])
+
+    def retry_in(self):
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self):
+        """True when a call may go ahead now; counts a rejection otherwise"""
+        with self.lock:
+            if self.state == OPEN and self.retry_in() <= 0:
+                self.transition(HALF_OPEN)
+                self.trial_started = None
+            if self.state == HALF_OPEN:
+                # One trial at a time; a trial that never reported back is replaced after reset_timeout
+                now = time.monotonic()
+                if self.trial_started is None or now - self.trial_started > self.reset_timeout:
+                    self.trial_started = now
+                    self.counts['calls'] += 1
+                    return True
+            elif self.state == CLOSED:
+                self.counts['calls'] += 1
+                return True
+            self.counts['rejected'] += 1
+            return False
+
+    def check(self):
+        """Raise CircuitOpen unless a call may go ahead"""
+        if not self.allow():
+            raise CircuitOpen(self.name, self.retry_in())
+
+    def is_open(self):
+        with self.lock:
+            return self.state == OPEN and self.retry_in() > 0
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.reset_timeout = self.base_reset_timeout
+            if self.state != CLOSED:
+                self.transition(CLOSED)
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.counts['failures'] += 1
+            if self.state == HALF_OPEN:
+                self.reset_timeout = min(self.max_reset_timeout, self.reset_timeout * 2)
+                self.transition(OPEN)
+            elif self.state == CLOSED and self.failures >= self.failure_threshold:
+                self.transition(OPEN)
+
+    def call(self, function, *args, ignore=(), **kwargs):
+        """Call function through the breaker
+
+        Exceptions in `ignore` mean the dependency answered (e.g. "page not
+        found") and count as success; they are re-raised either way.
+        """
+        self.check()
+        try:
+            result = function(*args, **kwargs)
+        except ignore:
+            self.record_success()
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def summary(self):
+        with self.lock:
+            return dict(self.counts, state=self.state, retry_in=round(self.retry_in(), 1) if self.state == OPEN else 0)
+
+
+class Breakers:
+    """One breaker per dependency name, created on first use; disabled breakers never open"""
+
+    def __init__(self, enabled=True, failure_threshold=3, reset_timeout=30.0, metrics=None):
+        self.enabled = enabled
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.metrics = metrics
+        self.breakers = {}
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, metrics=None):
+        return cls(
+            enabled=os.getenv('CIRCUIT_BREAKERS', 'true').lower() == 'true',
+            failure_threshold=int(os.getenv('BREAKER_FAILURES', 3)),
+            reset_timeout=float(os.getenv('BREAKER_RESET_TIMEOUT', 30)),
+            metrics=metrics
+        )
+
+    def get(self, name):
+        """The breaker for a dependency, or None while breakers are disabled"""
+        if not self.enabled:
+            return None
+        with self.lock:
+            breaker = self.breakers.get(name)
+            if breaker is None:
+                breaker = self.breakers[name] = CircuitBreaker(name, self.failure_threshold, self.reset_timeout,
+                                                               metrics=self.metrics)
+            return breaker
+
+    def call(self, name, function, *args, **kwargs):
+        breaker = self.get(name)
+        if breaker is None:
+            kwargs.pop('ignore', None)
+            return function(*args, **kwargs)
+        return breaker.call(function, *args, **kwargs)
+
+    def is_open(self, name):
+        breaker = self.get(name)
+        return breaker is not None and breaker.is_open()
+
+    def summary(self):
+        with self.lock:
+            breakers = dict(self.breakers)
+        return {name: breaker.summary() for name, breaker in breakers.items()}
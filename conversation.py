@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Conversation context for Gemini prompts
+Features: Rolling window of recent turns, older turns folded into a running
+summary (optionally condensed by Gemini in the background), only the user
+preferences that bear on the question, everything trimmed to a token budget,
+and prompt size and reply latency reported per request
+"""
+
+import os
+import re
+import time
+import threading
+from collections import deque
+
+from metrics import Metrics
+
+# Words in a question that make a preference worth sending, beyond the words of its own key and value
+PREFERENCE_TOPICS = {
+    'default_city': ('weather', 'temperature', 'rain', 'forecast', 'local', 'near', 'nearby', 'here',
+                     'where', 'time', 'travel', 'restaurant', 'restaurants', 'events'),
+    'news_category': ('news', 'headlines', 'happening'),
+    'language': ('translate', 'say', 'word', 'language'),
+}
+# Sent with every question
+ALWAYS_INCLUDED = ('name', 'user_name')
+# Speech engine settings mean nothing to the model
+NEVER_INCLUDED = ('voice_rate', 'voice_volume', 'voice_gender')
+
+# Words that point back at earlier turns ("what about her", "why is that"); questions this short do too
+FOLLOW_UP_WORDS = {'it', 'its', 'that', 'this', 'these', 'those', 'they', 'them', 'their', 'he', 'him', 'his',
+                   'she', 'her', 'there', 'then', 'else', 'another', 'same', 'also'}
+FOLLOW_UP_MAX_WORDS = 3
+
+STOP_WORDS = {'a', 'an', 'the', 'is', 'are', 'was', 'to', 'of', 'in', 'on', 'for', 'and', 'or', 'me', 'my',
+              'i', 'you', 'it', 'what', 'how', 'do', 'does', 'can', 'tell', 'about', 'please', 'default'}
+
+
+def estimate_tokens(text):
+    """Rough Gemini token count: about four characters per token for English text"""
+    return (len(text) + 3) // 4
+
+
+def content_words(text):
+    return set(re.findall(r"[a-z0-9']+", str(text).lower())) - STOP_WORDS
+
+
+def first_sentence(text, max_words=25):
+    """The opening sentence of a reply, cut to max_words"""
+    sentence = re.split(r'(?<=[.!?])\s', text.strip(), maxsplit=1)[0]
+    words = sentence.split()
+    return ' '.join(words[:max_words]) + ('...' if len(words) > max_words else '')
+
+
+def is_follow_up(query):
+    """Whether a question leans on the conversation so far rather than standing alone"""
+    words = re.findall(r"[a-z0-9']+", str(query).lower())
+    return len(words) <= FOLLOW_UP_MAX_WORDS or bool(FOLLOW_UP_WORDS.intersection(words))
+
+
+def relevant_preferences(query, preferences):
+    """The preferences worth sending with query, as (key, value) pairs"""
+    words = content_words(query)
+    selected = []
+    for key, value in preferences.items():
+        if key in NEVER_INCLUDED:
+            continue
+        topics = content_words(key.replace('_', ' ')) | set(PREFERENCE_TOPICS.get(key, ()))
+        if key in ALWAYS_INCLUDED or words & topics or words & content_words(value):
+            selected.append((key, value))
+    return selected
+
+
+def trim_to_tokens(text, tokens):
+    """Cut text to about `tokens` tokens, keeping its end (the most recent part)"""
+    if estimate_tokens(text) <= tokens:
+        return text
+    return '...' + text[-max(0, tokens * 4 - 3):]
+
+
+class ConversationContext:
+    """What Gemini is told besides the question, within token_budget tokens per prompt
+
+    The last max_turns exchanges are kept verbatim. Older ones are folded into
+    a running summary of at most summary_tokens tokens: one line per turn, and
+    when those overflow either the oldest lines are dropped or, with a
+    summarizer, they are condensed in a background thread. The conversation
+    starts over after idle_reset seconds without a turn.
+
+    Prompts are filled in order of importance: the question and instructions,
+    the caller's extra context, relevant preferences, the most recent turns,
+    then the summary.
+    """
+
+    def __init__(self, token_budget=1024, max_turns=6, summary_tokens=150, idle_reset=600.0,
+                 summarizer=None, metrics=None):
+        self.token_budget = token_budget
+        self.max_turns = max_turns
+        self.summary_tokens = summary_tokens
+        self.idle_reset = idle_reset
+        self.summarizer = summarizer
+        self.metrics = metrics or Metrics(enabled=False)
+        self.lock = threading.Lock()
+        self.turns = deque()  # (user, reply), oldest first
+        self.summary_lines = []  # folded turns not yet condensed, oldest first
+        self.condensed = ''  # summarizer output covering everything folded before summary_lines
+        self.condensing = False
+        self.last_turn_at = None
+        self.last_prompt = {'tokens': 0, 'turns': 0, 'preferences': 0, 'summary': False}
+        self.stats = {'requests': 0, 'prompt_tokens': 0, 'max_prompt_tokens': 0, 'folded': 0, 'condensed': 0,
+                      'seconds': 0.0}
+
+    @classmethod
+    def from_env(cls, metrics=None, summarizer=None):
+        use_summarizer = os.getenv('CONTEXT_SUMMARIZER', 'extract').lower() == 'gemini'
+        return cls(
+            token_budget=int(os.getenv('CONTEXT_TOKEN_BUDGET', 1024)),
+            max_turns=int(os.getenv('CONTEXT_MAX_TURNS', 6)),
+            summary_tokens=int(os.getenv('CONTEXT_SUMMARY_TOKENS', 150)),
+            idle_reset=float(os.getenv('CONTEXT_IDLE_RESET', 600)),
+            summarizer=summarizer if use_summarizer else None,
+            metrics=metrics
+        )
+
+    def fork(self):
+        """An empty conversation with the same settings, e.g. for another server session"""
+        return type(self)(self.token_budget, self.max_turns, self.summary_tokens, self.idle_reset,
+                          self.summarizer, self.metrics)
+
+    def expire(self):
+        """Forget the conversation after idle_reset seconds of silence; the caller holds the lock"""
+        if self.last_turn_at is not None and time.monotonic() - self.last_turn_at > self.idle_reset:
+            self.turns.clear()
+            self.summary_lines = []
+            self.condensed = ''
+            self.last_turn_at = None
+
+    def summary_text(self):
+        """The running summary; the caller holds the lock"""
+        return ' '.join(filter(None, [self.condensed] + self.summary_lines))
+
+    def history_key(self):
+        """The conversation so far as one string, e.g. to key cached replies"""
+        with self.lock:
+            self.expire()
+            return ' | '.join([self.summary_text()] + [f"{user} => {reply}" for user, reply in self.turns])
+
+    def cache_key(self, query):
+        """History to key a cached reply to query by: the conversation for follow-ups, nothing otherwise
+
+        A question that stands alone gets the same answer whatever came before,
+        so it can be answered from the cache in the middle of a conversation.
+        """
+        return self.history_key() if is_follow_up(query) else ''
+
+    def prompt(self, instructions, query, preferences=None, extra=None):
+        """The full prompt: context within the token budget, then instructions (which contain the query)"""
+        budget = self.token_budget - estimate_tokens(instructions)
+        sections = []
+        if extra:
+            extra = trim_to_tokens(extra, max(0, budget))
+            sections.append(extra)
+            budget -= estimate_tokens(extra)
+
+        chosen = []
+        for key, value in relevant_preferences(query, preferences or {}):
+            line = f"{key.replace('_', ' ')}: {value}"
+            if estimate_tokens(line) + 1 > budget:
+                break
+            chosen.append(line)
+            budget -= estimate_tokens(line) + 1
+        if chosen:
+            sections.append("User preferences: " + '; '.join(chosen) + '.')
+
+        with self.lock:
+            self.expire()
+            turns = list(self.turns)
+            summary = self.summary_text()
+
+        recent = []
+        for user, reply in reversed(turns):
+            exchange = f"User: {user}\nYou: {reply}"
+            if estimate_tokens(exchange) > budget:
+                break
+            recent.insert(0, exchange)
+            budget -= estimate_tokens(exchange)
+        summary = trim_to_tokens(summary, min(budget, self.summary_tokens)) if summary and budget > 8 else ''
+        if summary:
+            sections.append(f"Earlier in this conversation: {summary}")
+        if recent:
+            sections.append("Recent conversation:\n" + '\n'.join(recent))
+
+        full = '\n'.join(sections + [instructions])
+        self.last_prompt = {'tokens': estimate_tokens(full), 'turns': len(recent), 'preferences': len(chosen),
+                            'summary': bool(summary)}
+        return full
+
+    def remember(self, query, reply, seconds=None):
+        """Add a finished exchange and report the size of the prompt that produced it"""
+        with self.lock:
+            self.expire()
+            self.turns.append((query, reply))
+            self.last_turn_at = time.monotonic()
+            while len(self.turns) > self.max_turns:
+                user, answer = self.turns.popleft()
+                self.summary_lines.append(f"User asked {user}; you said: {first_sentence(answer)}")
+                self.stats['folded'] += 1
+            condense = self.fold_overflow()
+        if condense:
+            threading.Thread(target=self.condense, args=condense, name='condense-context', daemon=True).start()
+        if seconds is not None:
+            self.report(seconds)
+
+    def fold_overflow(self):
+        """Keep the summary under summary_tokens; returns the lines to condense, if a summarizer should.
+        The caller holds the lock."""
+        if estimate_tokens(self.summary_text()) <= self.summary_tokens:
+            return None
+        if self.summarizer and not self.condensing:
+            self.condensing = True
+            return (self.condensed, list(self.summary_lines))
+        # No summarizer (or one already running): the oldest details go first
+        while len(self.summary_lines) > 1 and estimate_tokens(self.summary_text()) > self.summary_tokens:
+            self.summary_lines.pop(0)
+        return None
+
+    def condense(self, previous, lines):
+        """Ask the summarizer for a shorter summary of previous + lines, off the command path"""
+        words = max(20, self.summary_tokens * 3 // 5)
+        try:
+            condensed = self.summarizer(' '.join(filter(None, [previous] + lines)), words)
+        except Exception as e:
+            print(f"✗ Could not condense the conversation summary: {e}")
+            condensed = None
+        with self.lock:
+            self.condensing = False
+            if condensed and self.summary_lines[:len(lines)] == lines:
+                self.condensed = trim_to_tokens(condensed.strip(), self.summary_tokens)
+                del self.summary_lines[:len(lines)]
+                self.stats['condensed'] += 1
+
+    def report(self, seconds):
+        """Record the last prompt's size and the reply latency"""
+        tokens = self.last_prompt['tokens']
+        with self.lock:
+            self.stats['requests'] += 1
+            self.stats['prompt_tokens'] += tokens
+            self.stats['max_prompt_tokens'] = max(self.stats['max_prompt_tokens'], tokens)
+            self.stats['seconds'] += seconds
+        self.metrics.gauge('prompt_tokens', tokens)
+        self.metrics.increment('prompt_tokens', tokens)
+        turns = self.last_prompt['turns']
+        print(f"🧠 Prompt ~{tokens} tokens ({turns} recent turn{'' if turns == 1 else 's'}, "
+              f"{self.last_prompt['preferences']} preferences"
+              f"{', summary' if self.last_prompt['summary'] else ''}), reply in {seconds * 1000:.0f}ms")
+
+    def summary(self):
+        """Requests, average and largest prompt, average latency"""
+        with self.lock:
+            stats = dict(self.stats)
+            turns = len(self.turns)
+        requests = stats['requests'] or 1
+        return dict(stats, turns=turns, avg_prompt_tokens=round(stats['prompt_tokens'] / requests, 1),
+                    avg_ms=round(stats['seconds'] * 1000 / requests, 1))
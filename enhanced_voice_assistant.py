@@ -14,143 +14,276 @@ import time
 import subprocess
 import json
 import smtplib
-import sqlite3
 from pathlib import Path
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import threading
-import schedule
+import logging
 
 # Core libraries
 import speech_recognition as sr
-import pyttsx3
 import psutil
 from dotenv import load_dotenv
 
 # AI and web libraries
 import google.generativeai as genai
-import wikipedia
-import pywhatkit
-import pyautogui
 import requests
 from datetime import timedelta
 
-# Enhanced libraries
-import pyjokes
-import qrcode
-from PIL import Image
-import cv2
-import numpy as np
+from speech_streaming import StreamingSpeaker, EMPTY_REPLY
+from assistant_pipeline import AssistantPipeline
+from tts_worker import TTSWorker
+from phrase_cache import PhraseCache
+from http_client import HttpClient
+from lookup_cache import LookupCache
+from reminder_scheduler import ReminderScheduler
+from storage import Storage
+from intent_router import IntentRouter, IntentMatch
+from response_cache import ResponseCache
+from startup import Startup
+from skills import SkillRegistry
+from metrics import Metrics, traced
+from speech_backends import SpeechRecognizer, create_backends
+from gemini_gateway import GeminiGateway, RateLimited, BUSY_REPLY, UNAVAILABLE_REPLY
+from circuit_breaker import Breakers, CircuitOpen
+from conversation import ConversationContext
+from model_router import ModelRouter, DeadlineExceeded, SLOW_REPLY
 
 # Load environment variables
 load_dotenv()
 
+# Training phrases for the local intent classifier, found even when started from another directory
+INTENT_EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'intent_examples.json')
+
+# Intent table for process_enhanced_command; the highest priority wins when several intents match
+ENHANCED_INTENTS = [
+    {'name': 'performance', 'phrases': ['performance report', 'performance stats', 'latency report'],
+     'priority': 95},
+    {'name': 'weather', 'phrases': ['weather', 'temperature', 'forecast'], 'priority': 90,
+     'slots': {'city': r"\b(?:in|at)\s+(?!the\b)([a-z][a-z .'-]*?)(?:\s+(?:today|tonight|tomorrow|now|please))?$"}},
+    {'name': 'news', 'phrases': ['news', 'headlines'], 'priority': 80,
+     'slots': {'category': {'sports': 'sports', 'technology': 'technology', 'tech': 'technology',
+                            'business': 'business', 'health': 'health', 'entertainment': 'entertainment'}}},
+    {'name': 'reminder', 'phrases': ['remind me', 'reminder', 'reminders'], 'priority': 70,
+     'slots': {'action': {'show': 'list', 'list': 'list'}}},
+    {'name': 'note', 'phrases': ['note', 'notes'], 'priority': 60,
+     'slots': {'action': {'show': 'list', 'list': 'list'}}},
+    {'name': 'joke', 'phrases': ['joke', 'jokes', 'make me laugh'], 'priority': 50, 'modules': ['pyjokes']},
+    {'name': 'qr_code', 'phrases': ['qr code'], 'priority': 40, 'modules': ['qrcode', 'PIL']},
+    {'name': 'email', 'phrases': ['email', 'send email', 'send an email'], 'priority': 30},
+    {'name': 'preference', 'phrases': ['set preference', 'configure'], 'priority': 20},
+    {'name': 'exit', 'phrases': ['exit', 'quit', 'goodbye', 'bye'], 'priority': 10},
+]
+
 class EnhancedVoiceAssistant:
     def __init__(self):
         """Initialize the enhanced voice assistant"""
-        self.setup_database()
-        self.setup_ai()
-        self.setup_voice()
-        self.setup_speech_recognition()
+        self.metrics = Metrics.from_env().start()
+        # Dependencies that keep failing are skipped for a while instead of timing out on every command
+        self.breakers = Breakers.from_env(self.metrics)
+        # Recent turns, a running summary and relevant preferences, within a token budget per prompt
+        self.conversation = ConversationContext.from_env(self.metrics, self.summarize_conversation)
+        # The database stays on this thread; slower subsystems start in the background
+        # and startup.ready(name) waits for the one a caller needs
+        self.startup = Startup()
+        self.startup.run('database', self.setup_database)
+        self.user_preferences = self.startup.run('preferences', self.load_user_preferences)
         self.load_config()
         self.command_history = []
         self.start_time = datetime.datetime.now()
         self.reminders = []
-        self.user_preferences = self.load_user_preferences()
-        self.setup_scheduler()
+        self.streaming_speaker = StreamingSpeaker(self.speak)
+        self.pipeline = None  # Set while run_pipelined() is active
+
+        self.skills = SkillRegistry(ENHANCED_INTENTS)
+
+        self.startup.submit('voice', self.setup_voice)
+        self.startup.submit('speech_recognition', self.setup_speech_recognition)
+        self.startup.submit('ai', self.setup_ai)
+        self.startup.submit('response_cache', self.setup_response_cache)
+        self.startup.submit('intents', self.setup_intents)
+        self.skills.prewarm([skill.strip() for skill in os.getenv('PREWARM_SKILLS', '').split(',')])
+        self.startup.submit('lookups', self.setup_lookups)
+        # Before seal(), so the scheduler's timing is part of the startup report
+        self.startup.run('scheduler', self.setup_scheduler)
+        self.startup.seal()
         
     def setup_database(self):
-        """Initialize SQLite database for storing user data"""
-        self.conn = sqlite3.connect('assistant_data.db')
-        self.cursor = self.conn.cursor()
-        
-        # Create tables
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS reminders (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                description TEXT,
-                datetime TEXT NOT NULL,
-                completed INTEGER DEFAULT 0
-            )
-        ''')
-        
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS notes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                content TEXT,
-                created_at TEXT NOT NULL,
-                updated_at TEXT
-            )
-        ''')
-        
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_preferences (
-                key TEXT PRIMARY KEY,
-                value TEXT
-            )
-        ''')
-        
-        self.conn.commit()
-        print("✓ Database initialized")
+        """Open the database (WAL, one batching writer thread) and bring its schema up to date"""
+        self.storage = Storage.from_env('assistant_data.db', self.metrics)
+        print(f"✓ Database initialized (schema v{self.storage.version})")
     
     def setup_ai(self):
         """Configure Gemini AI with enhanced prompts"""
+        self.model_name = os.getenv('GEMINI_MODEL', 'gemini-1.5-flash')
         try:
             genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-            self.model = genai.GenerativeModel('gemini-1.5-flash')
+            # Every caller of a model goes through one limiter so bursts queue instead of exhausting
+            # its quota; the router picks the model per question and hedges slow requests
+            self.model = ModelRouter.from_env(
+                lambda name: GeminiGateway.from_env(genai.GenerativeModel(name), self.metrics,
+                                                    self.breakers.get('gemini')),
+                self.model_name, self.metrics)
             print("✓ Gemini AI configured successfully")
         except Exception as e:
             print(f"✗ Error configuring Gemini AI: {e}")
             self.model = None
     
     def setup_voice(self):
-        """Initialize enhanced text-to-speech"""
-        try:
-            self.engine = pyttsx3.init('sapi5')
-            voices = self.engine.getProperty('voices')
-            
-            # Set voice properties
-            voice_preference = self.user_preferences.get('voice_gender', 'female')
-            if voice_preference == 'female' and len(voices) > 1:
-                self.engine.setProperty('voice', voices[1].id)
-            elif voice_preference == 'male' and len(voices) > 0:
-                self.engine.setProperty('voice', voices[0].id)
-            
-            self.engine.setProperty('rate', int(self.user_preferences.get('voice_rate', 200)))
-            self.engine.setProperty('volume', float(self.user_preferences.get('voice_volume', 0.9)))
-            print("✓ Enhanced text-to-speech initialized")
-        except Exception as e:
-            print(f"✗ Error initializing voice engine: {e}")
-            self.engine = None
+        """Start the text-to-speech worker that owns the engine"""
+        phrase_cache = None
+        if os.getenv('PHRASE_CACHE', 'true').lower() == 'true':
+            phrase_cache = PhraseCache(os.getenv('PHRASE_CACHE_DIR', 'tts_cache'))
+        self.tts = TTSWorker(
+            name=os.getenv('ASSISTANT_NAME', 'Jarvis'),
+            rate=int(self.user_preferences.get('voice_rate', 200)),
+            volume=float(self.user_preferences.get('voice_volume', 0.9)),
+            voice_gender=self.user_preferences.get('voice_gender', 'female'),
+            phrase_cache=phrase_cache,
+            metrics=self.metrics
+        ).start()
+        self.tts.warm_phrases(self.cached_phrases())
     
     def setup_speech_recognition(self):
         """Initialize speech recognition with improved settings"""
+        self.calibration = None
+        self.mic_stream = None
+        self.wake_word = None
+        self.speech = None
         try:
             self.recognizer = sr.Recognizer()
             self.microphone = sr.Microphone()
             
             # Enhanced recognition settings
-            self.recognizer.energy_threshold = 4000
             self.recognizer.pause_threshold = 0.8
             self.recognizer.phrase_threshold = 0.3
             self.recognizer.non_speaking_duration = 0.5
-            
-            with self.microphone as source:
-                self.recognizer.adjust_for_ambient_noise(source, duration=1)
+            self.setup_speech_backends()
+            self.setup_noise_calibration()
+            self.start_mic_stream()
             print("✓ Enhanced speech recognition initialized")
         except Exception as e:
             print(f"✗ Error initializing speech recognition: {e}")
             self.recognizer = None
     
+    def setup_speech_backends(self):
+        """Recognition backends in preference order, e.g. google,vosk to fall back to offline"""
+        names = os.getenv('SPEECH_BACKENDS', 'google').split(',')
+        self.speech = SpeechRecognizer(
+            create_backends(names, self.recognizer, os.getenv('SPEECH_LANGUAGE', 'en-US'),
+                            os.getenv('VOSK_MODEL', 'vosk-model')),
+            race=os.getenv('SPEECH_RACE', 'false').lower() == 'true',
+            min_confidence=float(os.getenv('SPEECH_MIN_CONFIDENCE', 0.6)),
+            breakers=self.breakers
+        )
+        mode = 'racing' if self.speech.race else 'in order'
+        print(f"✓ Speech backends: {', '.join(backend.name for backend in self.speech.backends)} ({mode})")
+
+    def setup_noise_calibration(self):
+        """Start from this microphone's saved threshold, or a default for a new one; never blocks to calibrate"""
+        calibration = self.skills.module('noise_calibration')
+        store = calibration.CalibrationStore(os.getenv('MIC_CALIBRATION_FILE', 'mic_calibration.json'))
+        self.calibration = calibration.AmbientCalibration(
+            store, calibration.device_key(self.microphone),
+            self.microphone.SAMPLE_RATE, self.microphone.SAMPLE_WIDTH
+        )
+        # Captured audio keeps refining the threshold instead of the recognizer's own adjustment
+        self.recognizer.energy_threshold = self.calibration.threshold
+        self.recognizer.dynamic_energy_threshold = False
+        origin = 'saved' if self.calibration.loaded else 'default for a new device'
+        print(f"✓ Microphone threshold {self.calibration.threshold:.0f} ({origin})")
+
+    def adapt_energy_threshold(self, data):
+        """Refine the speech threshold from captured audio"""
+        if self.calibration:
+            self.recognizer.energy_threshold = self.calibration.observe(data)
+
+    def start_mic_stream(self):
+        """Keep the microphone open for the whole session, feeding the noise estimate as it goes"""
+        if os.getenv('MIC_STREAM', 'true').lower() != 'true':
+            return
+        audio_capture = self.skills.module('audio_capture')
+        vad = self.skills.module('vad')
+        # Short commands end after a short pause; longer dictation may pause for longer
+        endpointer = vad.Endpointer(
+            self.microphone.SAMPLE_RATE,
+            min_hangover=float(os.getenv('VAD_MIN_PAUSE', 0.3)),
+            max_hangover=float(os.getenv('VAD_MAX_PAUSE', 0.8)),
+            max_utterance=float(os.getenv('MAX_UTTERANCE_SECONDS', 30))
+        )
+        self.mic_stream = audio_capture.MicrophoneStream(
+            self.microphone,
+            buffer_seconds=float(os.getenv('MIC_BUFFER_SECONDS', 30)),
+            pre_roll=float(os.getenv('MIC_PRE_ROLL', 0.3)),
+            endpointer=endpointer
+        )
+        self.mic_stream.add_listener(self.adapt_energy_threshold)
+        self.mic_stream.start()
+        self.setup_wake_word()
+
+    def setup_wake_word(self):
+        """Match utterances against the enrolled wake word locally before any recognition"""
+        self.wake_word = None
+        if os.getenv('WAKE_WORD', 'false').lower() != 'true':
+            return
+        path = os.getenv('WAKE_WORD_MODEL', 'wake_word.npz')
+        try:
+            self.wake_word = self.skills.module('wake_word').WakeWordDetector.load(path)
+            print(f"✓ Wake word mode: say '{self.assistant_name}' before a command")
+        except Exception as e:
+            print(f"✗ Wake word model not loaded ({e}); enroll with: python wake_word.py enroll --record 3")
+
+    def close_audio(self):
+        """Stop capturing, keep the latest calibration for next time and report recognition stats"""
+        if self.mic_stream:
+            self.mic_stream.stop()
+        if self.calibration:
+            self.calibration.save()
+        if self.speech:
+            self.speech.report()
+            self.speech.shutdown()
+
+    def setup_response_cache(self):
+        """Open the persistent AI response cache"""
+        self.response_cache = None
+        if os.getenv('AI_CACHE', 'true').lower() != 'true':
+            return
+        try:
+            self.response_cache = ResponseCache(
+                self.storage,
+                max_entries=int(os.getenv('AI_CACHE_SIZE', 5000)),
+                ttl=int(os.getenv('AI_CACHE_TTL', 24 * 3600))
+            )
+            print("✓ AI response cache ready")
+        except Exception as e:
+            print(f"✗ Error opening AI response cache: {e}")
+    
+    def setup_lookups(self):
+        """Create the pooled HTTP client and the weather/news cache"""
+        self.http = HttpClient()
+        self.lookup_cache = LookupCache(self.storage, ttls={
+            'weather': (int(os.getenv('WEATHER_CACHE_TTL', 600)), int(os.getenv('WEATHER_STALE_TTL', 6 * 3600))),
+            'news': (int(os.getenv('NEWS_CACHE_TTL', 900)), int(os.getenv('NEWS_STALE_TTL', 24 * 3600)))
+        })
+    
     def load_config(self):
         """Load enhanced configuration"""
         self.assistant_name = os.getenv('ASSISTANT_NAME', 'Jarvis')
         self.weather_api_key = os.getenv('WEATHER_API_KEY')
         self.news_api_key = os.getenv('NEWS_API_KEY')
+        self.weather_api_url = os.getenv('WEATHER_API_URL', 'http://api.openweathermap.org/data/2.5/weather')
+        self.news_api_url = os.getenv('NEWS_API_URL', 'https://newsapi.org/v2/top-headlines')
         self.email_address = os.getenv('EMAIL_ADDRESS')
         self.email_password = os.getenv('EMAIL_PASSWORD')
+        self.stream_responses = os.getenv('STREAM_AI_RESPONSES', 'true').lower() == 'true'
+        # How much louder than the speech threshold the user must be to talk over the assistant; 0 waits
+        self.barge_in_level = float(os.getenv('BARGE_IN_LEVEL', 3.0))
+        
+        # Preferences that map onto text-to-speech worker properties
+        self.voice_preference_keys = {
+            'voice_rate': 'rate',
+            'voice_volume': 'volume',
+            'voice_gender': 'voice_gender'
+        }
         
         # Enhanced application mappings
         self.app_mappings = {
@@ -175,83 +308,212 @@ class EnhancedVoiceAssistant:
             'teams': 'https://teams.microsoft.com'
         }
     
+    def intent_handler_table(self):
+        """Map intent names to handlers bound to this assistant"""
+        return {
+            'weather': self.handle_weather,
+            'news': self.handle_news,
+            'reminder': self.handle_reminder,
+            'note': self.handle_note,
+            'joke': self.handle_joke,
+            'qr_code': self.handle_qr_code,
+            'email': self.handle_email,
+            'preference': self.handle_preference,
+            'performance': lambda command, slots: self.report_performance(),
+            'exit': self.handle_exit
+        }
+
+    def setup_intents(self):
+        """Compile the intent table once and map intents to their handlers"""
+        self.router = IntentRouter(self.skills.intent_table())
+        self.intent_handlers = self.intent_handler_table()
+
+        # Local classifier for skill-shaped phrasings the keyword table misses
+        self.intent_confidence = float(os.getenv('INTENT_CONFIDENCE', 0.6))
+        try:
+            # numpy is only imported here, off the main thread
+            load_or_train = self.skills.module('intent_classifier').load_or_train
+            self.classifier = load_or_train(os.getenv('INTENT_MODEL', 'intent_model.npz'), INTENT_EXAMPLES)
+            print("✓ Local intent classifier loaded")
+        except Exception as e:
+            print(f"✗ Error loading intent classifier: {e}")
+            self.classifier = None
+
+    def classify_intent(self, command):
+        """Route confident local predictions straight to a skill; None means ask the LLM"""
+        if not self.classifier:
+            return None
+        started = time.perf_counter()
+        label, confidence = self.classifier.classify(command)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if label not in self.intent_handlers or confidence < self.intent_confidence:
+            return None
+        print(f"🧭 Classified as '{label}' ({confidence:.0%}, {elapsed_ms:.1f}ms)")
+        return IntentMatch(label, self.router.extract_slots(label, command), None)
+    
+    @traced('db')
     def load_user_preferences(self):
         """Load user preferences from database"""
         try:
-            self.cursor.execute("SELECT key, value FROM user_preferences")
-            preferences = dict(self.cursor.fetchall())
+            preferences = dict(self.storage.query("SELECT key, value FROM user_preferences"))
             return preferences
         except Exception as e:
             print(f"Error loading preferences: {e}")
             return {}
     
+    @traced('db')
     def save_user_preference(self, key, value):
         """Save user preference to database"""
         try:
-            self.cursor.execute("INSERT OR REPLACE INTO user_preferences (key, value) VALUES (?, ?)", 
-                              (key, value))
-            self.conn.commit()
+            self.storage.execute("INSERT OR REPLACE INTO user_preferences (key, value) VALUES (?, ?)",
+                                 (key, value))
             self.user_preferences[key] = value
+            if key in self.voice_preference_keys:
+                # New voice settings also switch the phrase cache to fresh renders
+                self.tts.set_properties(**{self.voice_preference_keys[key]: value})
             print(f"✓ Saved preference: {key} = {value}")
         except Exception as e:
             print(f"Error saving preference: {e}")
     
     def setup_scheduler(self):
-        """Setup background scheduler for reminders"""
-        def run_scheduler():
-            while True:
-                schedule.run_pending()
-                time.sleep(1)
-        
-        scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
-        scheduler_thread.start()
-        print("✓ Background scheduler started")
+        """Start the reminder timer with every pending reminder; it sleeps until the next one is due"""
+        self.scheduler = ReminderScheduler.from_env(self.reminder_alert, self.storage, self.metrics,
+                                                    missed=self.missed_reminders_alert)
+        pending = self.scheduler.load()
+        self.scheduler.start()
+        print(f"✓ Reminder scheduler started ({pending} pending)")
+
+    def reminder_alert(self, reminder_id, title, description, late):
+        """Speak a due reminder; ones that came due while the assistant was off say so"""
+        self.startup.ready('voice')  # the scheduler starts before the speech worker is up
+        prefix = "Missed reminder" if late > 60 else "Reminder"
+        self.speak(f"{prefix}: {title}. {description}", urgent=True)
+
+    def missed_reminders_alert(self, reminders):
+        """Announce reminders long past due in one message, e.g. after the assistant was off for days"""
+        self.startup.ready('voice')
+        if len(reminders) == 1:
+            _, title, description, _ = reminders[0]
+            self.speak(f"Missed reminder: {title}. {description}", urgent=True)
+            return
+        for _, title, _, late in reminders:
+            print(f"   ⏰ {title} ({late / 3600:.0f}h ago)")
+        latest = min(reminders, key=lambda reminder: reminder[3])
+        self.speak(f"You missed {len(reminders)} reminders while I was away. The latest was: {latest[1]}",
+                   urgent=True)
     
-    def speak(self, text, urgent=False):
-        """Enhanced speak function with urgency levels"""
-        if self.engine:
-            try:
-                if urgent:
-                    self.engine.setProperty('rate', 250)
-                    print(f"🚨 {self.assistant_name}: {text}")
-                else:
-                    self.engine.setProperty('rate', int(self.user_preferences.get('voice_rate', 200)))
-                    print(f"🎵 {self.assistant_name}: {text}")
-                
-                self.engine.say(text)
-                self.engine.runAndWait()
-            except Exception as e:
-                print(f"✗ Error in text-to-speech: {e}")
-        else:
-            print(f"{self.assistant_name}: {text}")
+    def speak(self, text, urgent=False, on_start=None):
+        """Queue text for the speech worker; urgent text jumps the queue and is spoken faster"""
+        self.tts.say(text, urgent, on_start)
     
-    def listen(self, timeout=5):
-        """Enhanced listening with better error handling"""
-        if not self.recognizer:
-            return None
-            
+    @traced('capture')
+    def capture_audio(self, timeout=5):
+        """Capture one utterance from the microphone"""
+        if self.barge_in_level <= 0 and self.tts:
+            self.tts.wait_until_idle()  # barge-in off: never record while the assistant talks
+        if self.mic_stream:
+            data = self.wait_for_wake_word(timeout) if self.wake_word else self.listen_stream(timeout)
+            if data is None:
+                return None
+            return sr.AudioData(data, self.mic_stream.sample_rate, self.mic_stream.sample_width)
+
+        threshold = self.recognizer.energy_threshold
         try:
             with self.microphone as source:
                 print("🎤 Listening...")
+                self.recognizer.energy_threshold = self.listening_threshold()
                 audio = self.recognizer.listen(source, timeout=timeout, phrase_time_limit=5)
-                
-            print("🔍 Recognizing...")
-            command = self.recognizer.recognize_google(audio, language='en-US')
-            print(f"👤 User said: {command}")
-            return command.lower()
-            
-        except sr.UnknownValueError:
+        except sr.WaitTimeoutError:
+            print("⏰ Listening timeout")
+            return None
+        finally:
+            self.recognizer.energy_threshold = threshold
+        self.adapt_energy_threshold(audio.get_raw_data())
+        return audio
+
+    def listening_threshold(self):
+        """Energy an utterance must start above
+
+        While the assistant is talking the microphone also hears the speaker, so
+        only speech barge_in_level times louder than usual counts; otherwise the
+        assistant would interrupt itself and take its own words as a command.
+        """
+        threshold = self.recognizer.energy_threshold
+        if self.tts and self.barge_in_level > 0 and self.tts.is_busy():
+            return threshold * self.barge_in_level
+        return threshold
+
+    def listen_stream(self, timeout):
+        """Raw bytes of the next utterance from the open stream"""
+        print("🎤 Listening...")
+        data = self.mic_stream.listen(self.listening_threshold, timeout)
+        if data is None:
+            print("⏰ Listening timeout")
+            return None
+        # None when the stream stopped mid-utterance rather than on silence
+        if self.mic_stream.endpoint_latency is not None:
+            print(f"⏱ End of speech detected after {self.mic_stream.endpoint_latency * 1000:.0f}ms of silence")
+        return data
+
+    def wait_for_wake_word(self, timeout):
+        """Drop utterances locally until one starts with the wake word; return the command audio"""
+        print(f"💤 Waiting for '{self.assistant_name}'...")
+        while not self.mic_stream.stopped.is_set():
+            data = self.mic_stream.listen(self.listening_threshold)
+            command = self.wake_word.strip(data, self.mic_stream.sample_rate) if data else None
+            if command is None:
+                continue
+            print("✓ Wake word detected")
+            # "Jarvis, what time is it" in one breath, or the name alone and then the command
+            return command or self.listen_stream(timeout)
+        return None
+
+    @traced('recognition')
+    def recognize_audio(self, audio):
+        """Convert captured audio to lowercase text"""
+        print("🔍 Recognizing...")
+        transcript = self.speech.recognize(audio)
+        if not transcript:
             print("❌ Could not understand audio")
             return None
-        except sr.RequestError as e:
-            print(f"❌ Speech recognition service error: {e}")
+        print(f"👤 User said: {transcript.text}")
+        return transcript.text.lower()
+
+    def listen(self, timeout=5):
+        """Enhanced listening with better error handling"""
+        self.startup.ready('speech_recognition')
+        if not self.recognizer:
+            return None
+        if self.speech.unavailable():
+            # Recognition services are down; fall back to typed commands without recording
+            print("🔌 Speech recognition is unavailable right now")
             return None
-        except sr.WaitTimeoutError:
-            print("⏰ Listening timeout")
+
+        audio = self.capture_audio(timeout)
+        if audio is None:
             return None
+        return self.recognize_audio(audio)
+    
+    @traced('weather')
+    def fetch_weather(self, city):
+        """Fetch a weather summary from OpenWeatherMap, or None if the city is unknown"""
+        params = {'q': city, 'appid': self.weather_api_key, 'units': 'metric'}
+        response = self.http.get('weather', self.weather_api_url, params=params)
+        self.check_service_response('weather', response)
+        data = response.json()
+        
+        if response.status_code != 200:
+            return None
+        
+        temp = data['main']['temp']
+        feels_like = data['main']['feels_like']
+        humidity = data['main']['humidity']
+        description = data['weather'][0]['description']
+        
+        return f"Weather in {city}: {description}. Temperature is {temp}°C, feels like {feels_like}°C. Humidity is {humidity}%"
     
     def get_weather(self, city=None):
-        """Get weather information using OpenWeatherMap API"""
+        """Get weather information, answering from the lookup cache when possible"""
         if not self.weather_api_key:
             self.speak("Weather API key not configured. Please set WEATHER_API_KEY in your environment.")
             return
@@ -260,42 +522,54 @@ class EnhancedVoiceAssistant:
             city = self.user_preferences.get('default_city', 'New York')
         
         try:
-            url = f"http://api.openweathermap.org/data/2.5/weather?q={city}&appid={self.weather_api_key}&units=metric"
-            response = requests.get(url)
-            data = response.json()
+            weather_info = self.lookup_cache.get('weather', city.lower(),
+                                                 lambda: self.breakers.call('weather', self.fetch_weather, city))
             
-            if response.status_code == 200:
-                temp = data['main']['temp']
-                feels_like = data['main']['feels_like']
-                humidity = data['main']['humidity']
-                description = data['weather'][0]['description']
-                
-                weather_info = f"Weather in {city}: {description}. Temperature is {temp}°C, feels like {feels_like}°C. Humidity is {humidity}%"
+            if weather_info:
                 self.speak(weather_info)
                 return weather_info
             else:
                 self.speak(f"Sorry, I couldn't get weather information for {city}")
                 return None
                 
+        except CircuitOpen as e:
+            print(f"🔌 {e}")
+            self.speak("The weather service is unavailable right now, and I have nothing saved for that city.")
+            return None
         except Exception as e:
             print(f"Error getting weather: {e}")
             self.speak("Sorry, I couldn't get the weather information right now")
             return None
     
+    @staticmethod
+    def check_service_response(service, response):
+        """Raise for answers that mean the service itself is failing, so its breaker counts them"""
+        if response.status_code == 429 or response.status_code >= 500:
+            raise requests.HTTPError(f"{service} service returned {response.status_code}")
+
+    @traced('news')
+    def fetch_news(self, category, country):
+        """Fetch the top 5 headlines from NewsAPI, or None if there are none"""
+        params = {'country': country, 'category': category, 'apiKey': self.news_api_key}
+        response = self.http.get('news', self.news_api_url, params=params)
+        self.check_service_response('news', response)
+        data = response.json()
+        
+        if response.status_code == 200 and data['articles']:
+            return data['articles'][:5]  # Get top 5 articles
+        return None
+    
     def get_news(self, category='general', country='us'):
-        """Get latest news using NewsAPI"""
+        """Get latest news, answering from the lookup cache when possible"""
         if not self.news_api_key:
             self.speak("News API key not configured. Please set NEWS_API_KEY in your environment.")
             return
         
         try:
-            url = f"https://newsapi.org/v2/top-headlines?country={country}&category={category}&apiKey={self.news_api_key}"
-            response = requests.get(url)
-            data = response.json()
+            articles = self.lookup_cache.get('news', f"{category}:{country}",
+                                             lambda: self.breakers.call('news', self.fetch_news, category, country))
             
-            if response.status_code == 200 and data['articles']:
-                articles = data['articles'][:5]  # Get top 5 articles
-                
+            if articles:
                 self.speak("Here are the latest news headlines:")
                 for i, article in enumerate(articles, 1):
                     headline = article['title']
@@ -307,25 +581,26 @@ class EnhancedVoiceAssistant:
                 self.speak("Sorry, I couldn't get news right now")
                 return None
                 
+        except CircuitOpen as e:
+            print(f"🔌 {e}")
+            self.speak("The news service is unavailable right now, and I have no saved headlines.")
+            return None
         except Exception as e:
             print(f"Error getting news: {e}")
             self.speak("Sorry, I couldn't get the news right now")
             return None
     
+    @traced('db')
     def create_reminder(self, title, description, remind_time):
         """Create a reminder"""
         try:
-            self.cursor.execute(
+            reminder_id = self.storage.execute(
                 "INSERT INTO reminders (title, description, datetime) VALUES (?, ?, ?)",
                 (title, description, remind_time.isoformat())
             )
-            self.conn.commit()
-            
-            # Schedule the reminder
-            def reminder_alert():
-                self.speak(f"Reminder: {title}. {description}", urgent=True)
             
-            schedule.every().day.at(remind_time.strftime("%H:%M")).do(reminder_alert)
+            # Fires once, then the scheduler marks it completed
+            self.scheduler.add(reminder_id, title, description, remind_time)
             
             self.speak(f"Reminder set for {remind_time.strftime('%B %d at %I:%M %p')}: {title}")
             return True
@@ -335,11 +610,11 @@ class EnhancedVoiceAssistant:
             self.speak("Sorry, I couldn't create the reminder")
             return False
     
+    @traced('db')
     def get_reminders(self):
         """Get all active reminders"""
         try:
-            self.cursor.execute("SELECT * FROM reminders WHERE completed = 0 ORDER BY datetime")
-            reminders = self.cursor.fetchall()
+            reminders = self.storage.query("SELECT * FROM reminders WHERE completed = 0 ORDER BY datetime")
             
             if reminders:
                 self.speak(f"You have {len(reminders)} active reminders:")
@@ -356,15 +631,15 @@ class EnhancedVoiceAssistant:
             self.speak("Sorry, I couldn't get your reminders")
             return []
     
+    @traced('db')
     def create_note(self, title, content):
         """Create a note"""
         try:
             current_time = datetime.datetime.now().isoformat()
-            self.cursor.execute(
+            self.storage.execute(
                 "INSERT INTO notes (title, content, created_at) VALUES (?, ?, ?)",
                 (title, content, current_time)
             )
-            self.conn.commit()
             
             self.speak(f"Note '{title}' created successfully")
             return True
@@ -374,11 +649,11 @@ class EnhancedVoiceAssistant:
             self.speak("Sorry, I couldn't create the note")
             return False
     
+    @traced('db')
     def get_notes(self):
         """Get all notes"""
         try:
-            self.cursor.execute("SELECT * FROM notes ORDER BY created_at DESC")
-            notes = self.cursor.fetchall()
+            notes = self.storage.query("SELECT * FROM notes ORDER BY created_at DESC")
             
             if notes:
                 self.speak(f"You have {len(notes)} notes:")
@@ -397,7 +672,7 @@ class EnhancedVoiceAssistant:
     def tell_joke(self):
         """Tell a random joke"""
         try:
-            joke = pyjokes.get_joke()
+            joke = self.skills.module('pyjokes', 'joke').get_joke()
             self.speak(joke)
             return joke
         except Exception as e:
@@ -411,6 +686,8 @@ class EnhancedVoiceAssistant:
             if not filename:
                 filename = f"qr_code_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
             
+            self.skills.load('qr_code')
+            qrcode = self.skills.module('qrcode', 'qr_code')
             qr = qrcode.QRCode(version=1, box_size=10, border=5)
             qr.add_data(text)
             qr.make(fit=True)
@@ -426,12 +703,17 @@ class EnhancedVoiceAssistant:
             self.speak("Sorry, I couldn't generate the QR code")
             return None
     
+    @traced('smtp')
     def send_email(self, to_email, subject, body):
         """Send email"""
         if not self.email_address or not self.email_password:
             self.speak("Email credentials not configured. Please set EMAIL_ADDRESS and EMAIL_PASSWORD in your environment.")
             return False
         
+        if self.breakers.is_open('smtp'):
+            self.speak("The email server is unreachable right now, so I couldn't send it. Please try again later.")
+            return False
+
         try:
             msg = MIMEMultipart()
             msg['From'] = self.email_address
@@ -440,11 +722,8 @@ class EnhancedVoiceAssistant:
             
             msg.attach(MIMEText(body, 'plain'))
             
-            server = smtplib.SMTP('smtp.gmail.com', 587)
-            server.starttls()
-            server.login(self.email_address, self.email_password)
-            server.send_message(msg)
-            server.quit()
+            self.breakers.call('smtp', self.deliver_email, msg,
+                               ignore=(smtplib.SMTPAuthenticationError, smtplib.SMTPRecipientsRefused))
             
             self.speak(f"Email sent to {to_email}")
             return True
@@ -454,137 +733,256 @@ class EnhancedVoiceAssistant:
             self.speak("Sorry, I couldn't send the email")
             return False
     
-    def get_ai_response(self, prompt, context=None):
+    def deliver_email(self, msg):
+        """Hand a message to Gmail's SMTP server, giving up on an unresponsive server after 10s"""
+        server = smtplib.SMTP('smtp.gmail.com', 587, timeout=10)
+        try:
+            server.starttls()
+            server.login(self.email_address, self.email_password)
+            server.send_message(msg)
+        finally:
+            server.quit()
+    
+    def build_ai_prompt(self, prompt, context=None):
+        """Build the full Gemini prompt: relevant preferences, the conversation so far and the question"""
+        instructions = f"You are {self.assistant_name}, a helpful voice assistant. Respond naturally: {prompt}"
+        return self.conversation.prompt(instructions, prompt, self.user_preferences, context)
+
+    def ai_cache_context(self, prompt, context=None):
+        """Cached replies depend on the preferences and, for follow-ups, the conversation included in the prompt"""
+        return f"{self.user_preferences} {context or ''} {self.conversation.cache_key(prompt)}"
+
+    def summarize_conversation(self, text, words):
+        """Condense earlier turns for the conversation context (CONTEXT_SUMMARIZER=gemini)"""
+        response = self.model.generate_content(
+            f"Summarize this conversation between a user and their voice assistant in at most {words} words, "
+            f"keeping names, places and facts the user may refer back to:\n{text}")
+        return response.text
+
+    def reply_model(self, prompt):
+        """Name of the model that answers prompt, which the cached reply belongs to"""
+        return self.model.choose(prompt).model_name if self.model else self.model_name
+
+    def get_cached_reply(self, prompt, context=None):
+        """Look up a previous AI reply for the same question"""
+        if not self.response_cache:
+            return None
+        try:
+            cached = self.response_cache.get(prompt, self.reply_model(prompt), self.ai_cache_context(prompt, context))
+        except Exception as e:
+            print(f"✗ Error reading AI response cache: {e}")
+            return None
+        if cached:
+            print("⚡ Answering from the AI response cache")
+        return cached
+
+    def cache_reply(self, prompt, context, reply):
+        """Remember a successful AI reply"""
+        if not self.response_cache or not reply:
+            return
+        try:
+            self.response_cache.put(prompt, self.reply_model(prompt), reply, self.ai_cache_context(prompt, context))
+        except Exception as e:
+            print(f"✗ Error writing AI response cache: {e}")
+
+    @traced('gemini')
+    def get_ai_response(self, prompt, context=None, fresh=False):
         """Enhanced AI response with context"""
+        if not fresh:
+            cached = self.get_cached_reply(prompt, context)
+            if cached:
+                self.conversation.remember(prompt, cached)
+                return cached
+
         if not self.model:
             return "AI service is not available."
         
         try:
-            # Add user preferences to context
-            user_context = f"User preferences: {self.user_preferences}. "
-            if context:
-                full_context = user_context + context + " "
-            else:
-                full_context = user_context
-            
-            full_prompt = f"{full_context}You are {self.assistant_name}, a helpful voice assistant. Respond naturally: {prompt}"
-            response = self.model.generate_content(full_prompt)
-            return response.text.strip()
+            started = time.perf_counter()
+            full_prompt = self.build_ai_prompt(prompt, context)
+            response = self.model.generate_content(full_prompt, query=prompt)
+            reply = response.text.strip()
+            self.cache_reply(prompt, context, reply)
+            self.conversation.remember(prompt, reply, time.perf_counter() - started)
+            return reply
             
+        except RateLimited as e:
+            print(f"✗ Gemini rate limited: {e}")
+            return BUSY_REPLY
+        except CircuitOpen as e:
+            print(f"🔌 {e}")
+            return UNAVAILABLE_REPLY
+        except DeadlineExceeded as e:
+            print(f"⏱ {e}")
+            return SLOW_REPLY
         except Exception as e:
             print(f"✗ Error with Gemini AI: {e}")
             return "I'm having trouble processing your request right now."
+
+    def stream_ai_response(self, prompt, context=None):
+        """Yield the Gemini reply text chunk by chunk as it is generated"""
+        response = self.model.generate_content(self.build_ai_prompt(prompt, context), stream=True,
+                                               query=prompt)
+        for chunk in response:
+            yield chunk.text
+
+    def respond_with_ai(self, prompt, context=None, fresh=False):
+        """Speak the AI reply, streaming it sentence by sentence when enabled"""
+        started_at = time.perf_counter()
+        cached = None if fresh else self.get_cached_reply(prompt, context)
+        if cached:
+            self.speak(cached, on_start=self.streaming_speaker.first_audio('cache', started_at))
+            self.conversation.remember(prompt, cached)
+            return cached
+
+        if self.stream_responses and self.model:
+            try:
+                with self.metrics.span('gemini'):
+                    reply, complete = self.streaming_speaker.speak_stream(
+                        self.stream_ai_response(prompt, context), started_at)
+                if not reply:
+                    # The stream finished without text (e.g. a blocked answer); asking again would double the wait
+                    print("✗ Gemini returned an empty reply")
+                    self.speak(EMPTY_REPLY)
+                    return EMPTY_REPLY
+                if complete:
+                    self.cache_reply(prompt, context, reply)
+                self.conversation.remember(prompt, reply, time.perf_counter() - started_at)
+                return reply
+            except RateLimited as e:
+                # Retries were already spent; a blocking request would only wait again
+                print(f"✗ Gemini rate limited: {e}")
+                self.speak(BUSY_REPLY)
+                return BUSY_REPLY
+            except CircuitOpen as e:
+                print(f"🔌 {e}")
+                self.speak(UNAVAILABLE_REPLY)
+                return UNAVAILABLE_REPLY
+            except DeadlineExceeded as e:
+                # The deadline is spent; a blocking request would start another one
+                print(f"⏱ {e}")
+                self.speak(SLOW_REPLY)
+                return SLOW_REPLY
+            except Exception as e:
+                print(f"✗ Error streaming Gemini AI response: {e}")
+
+        # The cache was already checked above
+        response = self.get_ai_response(prompt, context, fresh=True)
+        self.speak(response, on_start=self.streaming_speaker.first_audio('blocking', started_at))
+        return response
     
+    @traced('dispatch')
     def process_enhanced_command(self, command):
         """Process enhanced voice commands"""
         if not command:
             return True
         
         command = command.lower().strip()
+
+        # "ask fresh ..." skips the AI response cache
+        fresh = command.startswith('ask fresh')
+        if fresh:
+            command = command[len('ask fresh'):].strip()
+
         self.command_history.append(command)
+
+        # The first command may arrive before Gemini, the caches or the intent model are ready
+        self.startup.settle()
         
-        # Weather commands
-        if any(word in command for word in ['weather', 'temperature', 'forecast']):
-            if 'in' in command:
-                city = command.split('in')[-1].strip()
-                self.get_weather(city)
-            else:
-                self.get_weather()
-        
-        # News commands
-        elif 'news' in command:
-            category = 'general'
-            if 'sports' in command:
-                category = 'sports'
-            elif 'technology' in command or 'tech' in command:
-                category = 'technology'
-            elif 'business' in command:
-                category = 'business'
-            elif 'health' in command:
-                category = 'health'
-            elif 'entertainment' in command:
-                category = 'entertainment'
-            
-            self.get_news(category)
-        
-        # Reminder commands
-        elif 'remind me' in command or 'reminder' in command:
-            if 'show' in command or 'list' in command:
-                self.get_reminders()
-            else:
-                self.speak("What would you like me to remind you about?")
-                title = input("Reminder title: ")
-                description = input("Description (optional): ")
-                time_str = input("When? (HH:MM format): ")
-                
-                try:
-                    hour, minute = map(int, time_str.split(':'))
-                    remind_time = datetime.datetime.now().replace(hour=hour, minute=minute, second=0, microsecond=0)
-                    if remind_time < datetime.datetime.now():
-                        remind_time += timedelta(days=1)
-                    
-                    self.create_reminder(title, description, remind_time)
-                except ValueError:
-                    self.speak("Invalid time format. Please use HH:MM format.")
-        
-        # Note commands
-        elif 'note' in command:
-            if 'show' in command or 'list' in command:
-                self.get_notes()
-            else:
-                self.speak("What's the title of your note?")
-                title = input("Note title: ")
-                self.speak("What's the content?")
-                content = input("Note content: ")
-                self.create_note(title, content)
-        
-        # Joke command
-        elif 'joke' in command:
-            self.tell_joke()
-        
-        # QR code command
-        elif 'qr code' in command:
-            self.speak("What text would you like to encode in the QR code?")
-            text = input("QR code text: ")
-            self.generate_qr_code(text)
-        
-        # Email command
-        elif 'email' in command or 'send email' in command:
-            self.speak("What's the recipient's email address?")
-            to_email = input("To: ")
-            self.speak("What's the subject?")
-            subject = input("Subject: ")
-            self.speak("What's the message?")
-            body = input("Message: ")
-            self.send_email(to_email, subject, body)
-        
-        # User preference commands
-        elif 'set preference' in command or 'configure' in command:
-            self.speak("What preference would you like to set?")
-            key = input("Preference key: ")
-            self.speak("What value?")
-            value = input("Value: ")
-            self.save_user_preference(key, value)
-        
-        # Exit command
-        elif any(word in command for word in ['exit', 'quit', 'goodbye', 'bye']):
-            self.speak("Goodbye! Have a great day!")
-            return False
+        match = self.router.route(command) or self.classify_intent(command)
+        handler = self.intent_handlers.get(match.name) if match else None
+        if handler:
+            return handler(command, match.slots) is not False
         
         # Default: use AI for other commands
-        else:
-            response = self.get_ai_response(command)
-            self.speak(response)
-        
+        self.respond_with_ai(command, fresh=fresh)
         return True
     
-    def run(self):
-        """Main enhanced loop"""
-        print("🚀 Starting Enhanced Voice Assistant...")
-        print("=" * 50)
+    def report_performance(self):
+        """Print recent latencies per stage and speak a short summary"""
+        self.metrics.report()
+        self.speak(self.metrics.describe())
+
+    def handle_weather(self, command, slots):
+        """Weather commands"""
+        self.get_weather(slots.get('city'))
+    
+    def handle_news(self, command, slots):
+        """News commands"""
+        self.get_news(slots.get('category', 'general'))
+    
+    def ask(self, prompt):
+        """Read a typed answer; while pipelined, through the pipeline so its stdin reader does not take it"""
+        return self.pipeline.ask(prompt) if self.pipeline else input(prompt)
+
+    def handle_reminder(self, command, slots):
+        """Reminder commands"""
+        if slots.get('action') == 'list':
+            self.get_reminders()
+            return
         
-        # Enhanced greeting
-        hour = datetime.datetime.now().hour
+        self.speak("What would you like me to remind you about?")
+        title = self.ask("Reminder title: ")
+        description = self.ask("Description (optional): ")
+        time_str = self.ask("When? (HH:MM format): ")
+        
+        try:
+            hour, minute = map(int, time_str.split(':'))
+            remind_time = datetime.datetime.now().replace(hour=hour, minute=minute, second=0, microsecond=0)
+            if remind_time < datetime.datetime.now():
+                remind_time += timedelta(days=1)
+            
+            self.create_reminder(title, description, remind_time)
+        except ValueError:
+            self.speak("Invalid time format. Please use HH:MM format.")
+    
+    def handle_note(self, command, slots):
+        """Note commands"""
+        if slots.get('action') == 'list':
+            self.get_notes()
+            return
+        
+        self.speak("What's the title of your note?")
+        title = self.ask("Note title: ")
+        self.speak("What's the content?")
+        content = self.ask("Note content: ")
+        self.create_note(title, content)
+    
+    def handle_joke(self, command, slots):
+        """Joke command"""
+        self.tell_joke()
+    
+    def handle_qr_code(self, command, slots):
+        """QR code command"""
+        self.speak("What text would you like to encode in the QR code?")
+        text = self.ask("QR code text: ")
+        self.generate_qr_code(text)
+    
+    def handle_email(self, command, slots):
+        """Email command"""
+        self.speak("What's the recipient's email address?")
+        to_email = self.ask("To: ")
+        self.speak("What's the subject?")
+        subject = self.ask("Subject: ")
+        self.speak("What's the message?")
+        body = self.ask("Message: ")
+        self.send_email(to_email, subject, body)
+    
+    def handle_preference(self, command, slots):
+        """User preference commands"""
+        self.speak("What preference would you like to set?")
+        key = self.ask("Preference key: ")
+        self.speak("What value?")
+        value = self.ask("Value: ")
+        self.save_user_preference(key, value)
+    
+    def handle_exit(self, command, slots):
+        """Exit command"""
+        self.speak("Goodbye! Have a great day!")
+        return False
+    
+    def welcome_message(self, hour):
+        """Build the enhanced greeting for a given hour of the day"""
         if 0 <= hour < 12:
             greeting = "Good morning!"
         elif 12 <= hour < 18:
@@ -592,8 +990,39 @@ class EnhancedVoiceAssistant:
         else:
             greeting = "Good evening!"
         
-        welcome_message = f"{greeting} I'm your enhanced {self.assistant_name}. I can help you with weather, news, reminders, notes, and much more!"
-        self.speak(welcome_message)
+        return f"{greeting} I'm your enhanced {self.assistant_name}. I can help you with weather, news, reminders, notes, and much more!"
+
+    def wish_user(self):
+        """Enhanced greeting based on time of day"""
+        self.startup.ready('voice')
+        self.speak(self.welcome_message(datetime.datetime.now().hour))
+
+    def cached_phrases(self):
+        """Fixed and templated phrases worth pre-rendering"""
+        phrases = [self.welcome_message(hour) for hour in (0, 12, 18)]
+        phrases += [
+            "Goodbye! Have a great day!",
+            "Goodbye!",
+            "Here are the latest news headlines:",
+            "What would you like me to remind you about?",
+            "What's the title of your note?",
+            "What's the content?",
+            "What's the recipient's email address?",
+            "What's the subject?",
+            "What's the message?",
+            "You have no active reminders",
+            "You have no notes",
+            "I encountered an unexpected error. Please try again."
+        ]
+        return phrases
+
+    def run(self):
+        """Main enhanced loop"""
+        print("🚀 Starting Enhanced Voice Assistant...")
+        print("=" * 50)
+        
+        # Enhanced greeting
+        self.wish_user()
         
         # Main loop
         while True:
@@ -601,6 +1030,8 @@ class EnhancedVoiceAssistant:
                 command = self.listen()
                 
                 if command:
+                    # A new command cuts off whatever is still being said
+                    self.tts.interrupt()
                     should_continue = self.process_enhanced_command(command)
                     if not should_continue:
                         break
@@ -614,28 +1045,68 @@ class EnhancedVoiceAssistant:
                         self.speak("Goodbye!")
                         break
                     elif text_input:
+                        self.tts.interrupt()
                         should_continue = self.process_enhanced_command(text_input)
                         if not should_continue:
                             break
                             
             except KeyboardInterrupt:
                 print("\n🛑 Interrupted by user")
+                self.tts.interrupt()
                 self.speak("Goodbye!")
                 break
             except Exception as e:
                 print(f"❌ Unexpected error: {e}")
                 self.speak("I encountered an unexpected error. Please try again.")
+
+        # Let the goodbye finish playing before exiting
+        self.tts.shutdown()
+        self.skills.report()
+        self.close_audio()
+        self.metrics.close()
+    
+    def run_pipelined(self):
+        """Main loop with overlapping listen, recognize, act and speak stages"""
+        print("🚀 Starting Enhanced Voice Assistant (pipelined)...")
+        print("=" * 50)
+
+        # Greet while speech recognition is still being set up
+        self.wish_user()
+        self.startup.ready('speech_recognition')
+        self.pipeline = AssistantPipeline(self.capture_audio, self.recognize_audio,
+                                          self.process_enhanced_command, self.tts)
+        self.pipeline.start(voice_input=self.recognizer is not None)
+
+        try:
+            self.pipeline.wait()
+        except KeyboardInterrupt:
+            print("\n🛑 Interrupted by user")
+            self.pipeline.stop()
+            self.speak("Goodbye!")
+        finally:
+            self.pipeline = None
+            self.tts.shutdown()
+            self.skills.report()
+            self.close_audio()
+            self.metrics.close()
     
     def __del__(self):
-        """Cleanup database connection"""
-        if hasattr(self, 'conn'):
-            self.conn.close()
+        """Cleanup database connection and pooled HTTP connections"""
+        if hasattr(self, 'storage'):
+            self.storage.close()
+        if hasattr(self, 'http'):
+            self.http.close()
 
 def main():
     """Main function"""
+    # LOG_LEVEL=INFO logs each command's per-stage breakdown
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'WARNING'), format='%(asctime)s %(levelname)s %(message)s')
     try:
         assistant = EnhancedVoiceAssistant()
-        assistant.run()
+        if os.getenv('PIPELINE_MODE', 'false').lower() == 'true':
+            assistant.run_pipelined()
+        else:
+            assistant.run()
     except Exception as e:
         print(f"❌ Failed to start enhanced voice assistant: {e}")
         print("Please check your configuration and try again.")
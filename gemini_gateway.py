@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Shared gateway for Gemini calls
+Features: Token-bucket request rate limit, cap on requests in flight, retries
+with exponential backoff that honour the server's retry-after hint, a pause
+for every caller after a quota error, queue depth and wait-time metrics, and
+an optional circuit breaker that fails fast while Gemini is down
+"""
+
+import os
+import re
+import time
+import random
+import threading
+
+from metrics import Metrics
+
+RATE_LIMIT_CODE = 429
+RETRYABLE_CODES = {RATE_LIMIT_CODE, 500, 503, 504}
+BUSY_REPLY = "I'm getting too many requests right now. Please try again in a minute."
+UNAVAILABLE_REPLY = "My AI service is unavailable right now. Please try again shortly."
+
+
+class RateLimited(Exception):
+    """Gemini kept refusing for quota, or the request waited too long for a slot"""
+
+
+def error_code(error):
+    """HTTP-style status of an API error (google.api_core exceptions carry .code), or None"""
+    code = getattr(error, 'code', None)
+    try:
+        return int(code)
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_after(error):
+    """Seconds the server asked us to wait, from the error or its RetryInfo details, or None"""
+    value = getattr(error, 'retry_after', None)
+    if value is not None:
+        return float(value)
+    for detail in getattr(error, 'details', None) or []:
+        delay = getattr(detail, 'retry_delay', None)
+        if delay is not None:
+            return delay.seconds + delay.nanos / 1e9
+    response = getattr(error, 'response', None)
+    header = getattr(response, 'headers', {}).get('Retry-After') if response is not None else None
+    if header and header.replace('.', '', 1).isdigit():
+        return float(header)
+    match = re.search(r'retry(?:_delay| in| after)[^\d]{0,20}([\d.]+)\s*s', str(error), re.IGNORECASE)
+    return float(match.group(1)) if match else None
+
+
+class TokenBucket:
+    """Allow `rate` acquisitions per second on average, with bursts of up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.condition = threading.Condition()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, deadline):
+        """Take one token, waiting until the monotonic deadline at most; returns False on timeout"""
+        with self.condition:
+            while True:
+                now = time.monotonic()
+                self.refill(now)
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+                if now + wait > deadline:
+                    return False
+                self.condition.wait(wait)
+
+    def pause(self, seconds):
+        """Hand out no tokens for a while, e.g. after the server reported its quota exhausted"""
+        with self.condition:
+            now = time.monotonic()
+            self.paused_until = max(self.paused_until, now + seconds)
+            self.refill(now)
+            self.tokens = 0.0
+            self.condition.notify_all()
+
+
+class GeminiGateway:
+    """Drop-in wrapper for a GenerativeModel shared by every caller of one assistant
+
+    A request first waits for a free in-flight slot and a rate-limit token (at
+    most queue_timeout seconds), then calls the model. Rate-limit and transient
+    server errors are retried up to max_retries times after the server's
+    retry-after hint or an exponential, jittered delay; a rate-limit error also
+    pauses the bucket so other callers back off together. When retries run out
+    on quota errors, RateLimited is raised instead of the raw API error.
+    Requests that still fail after their retries count against the breaker,
+    and while it is open requests raise CircuitOpen without being sent.
+    """
+
+    def __init__(self, model, requests_per_minute=60, burst=5, max_in_flight=4, max_retries=3,
+                 base_delay=1.0, max_delay=30.0, queue_timeout=30.0, metrics=None, breaker=None):
+        self.model = model
+        self.breaker = breaker
+        self.bucket = TokenBucket(requests_per_minute / 60.0, burst) if requests_per_minute else None
+        self.slots = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.queue_timeout = queue_timeout
+        self.metrics = metrics or Metrics(enabled=False)
+        self.lock = threading.Lock()
+        self.waiting = 0
+        self.in_flight = 0
+        self.calls = 0
+        self.counts = {'requests': 0, 'retries': 0, 'rate_limited': 0, 'rejected': 0, 'failed': 0}
+        self.max_waiting = 0
+
+    @classmethod
+    def from_env(cls, model, metrics=None, breaker=None):
+        return cls(
+            model,
+            requests_per_minute=float(os.getenv('GEMINI_RPM', 60)),
+            burst=int(os.getenv('GEMINI_BURST', 5)),
+            max_in_flight=int(os.getenv('GEMINI_MAX_IN_FLIGHT', 4)),
+            max_retries=int(os.getenv('GEMINI_MAX_RETRIES', 3)),
+            queue_timeout=float(os.getenv('GEMINI_QUEUE_TIMEOUT', 30)),
+            metrics=metrics,
+            breaker=breaker
+        )
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+        self.metrics.increment(f"gemini_{name}")
+
+    def update_levels(self, waiting=0, in_flight=0):
+        with self.lock:
+            self.waiting += waiting
+            self.in_flight += in_flight
+            self.max_waiting = max(self.max_waiting, self.waiting)
+            levels = self.waiting, self.in_flight
+        self.metrics.gauge('gemini_queue_depth', levels[0])
+        self.metrics.gauge('gemini_in_flight', levels[1])
+
+    def admit(self):
+        """Wait for an in-flight slot and a token; raises RateLimited after queue_timeout"""
+        started = time.perf_counter()
+        deadline = time.monotonic() + self.queue_timeout
+        self.update_levels(waiting=1)
+        try:
+            if self.slots and not self.slots.acquire(timeout=self.queue_timeout):
+                self.count('rejected')
+                raise RateLimited(f"No Gemini slot free after {self.queue_timeout:.0f}s")
+            if self.bucket and not self.bucket.acquire(deadline):
+                if self.slots:
+                    self.slots.release()
+                self.count('rejected')
+                raise RateLimited(f"Gemini rate limit: no request allowed within {self.queue_timeout:.0f}s")
+        finally:
+            self.update_levels(waiting=-1)
+            self.metrics.observe('gemini_wait', time.perf_counter() - started)
+        self.update_levels(in_flight=1)
+
+    def release(self):
+        self.update_levels(in_flight=-1)
+        if self.slots:
+            self.slots.release()
+
+    def backoff(self, error, attempt):
+        """Seconds to wait before retrying after error, or None when it should not be retried"""
+        code = error_code(error)
+        if code not in RETRYABLE_CODES or attempt >= self.max_retries:
+            return None
+        if self.breaker and self.breaker.is_open():
+            return None  # other requests already found Gemini down
+        hinted = retry_after(error)
+        if hinted is not None:
+            delay = min(hinted, self.max_delay)
+        else:
+            # Exponential with jitter, so callers that failed together do not retry together
+            delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+            delay = delay / 2 + random.uniform(0, delay / 2)
+        if code == RATE_LIMIT_CODE and self.bucket:
+            self.bucket.pause(delay)
+        return delay
+
+    def give_up(self, error):
+        if self.breaker and (error_code(error) is None or error_code(error) in RETRYABLE_CODES):
+            self.breaker.record_failure()
+        self.count('failed')
+        if error_code(error) == RATE_LIMIT_CODE:
+            self.count('rate_limited')
+            raise RateLimited(f"Gemini quota exhausted: {error}") from error
+        raise error
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        """Same as GenerativeModel.generate_content, through the limiter
+
+        A streamed reply holds its slot until the stream is consumed and is only
+        retried when the error comes before the first chunk.
+        """
+        with self.lock:
+            self.calls += 1
+        self.count('requests')
+        if self.breaker:
+            self.breaker.check()
+        if stream:
+            return self.stream(prompt, **kwargs)
+
+        attempt = 0
+        while True:
+            self.admit()
+            try:
+                response = self.model.generate_content(prompt, **kwargs)
+                if self.breaker:
+                    self.breaker.record_success()
+                return response
+            except Exception as e:
+                error = e
+            finally:
+                self.release()
+            delay = self.backoff(error, attempt)
+            if delay is None:
+                self.give_up(error)
+            self.count('retries')
+            print(f"⏳ Gemini {error_code(error)}; retrying in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+
+    def stream(self, prompt, **kwargs):
+        attempt = 0
+        while True:
+            self.admit()
+            started = False
+            try:
+                for chunk in self.model.generate_content(prompt, stream=True, **kwargs):
+                    if not started and self.breaker:
+                        self.breaker.record_success()
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started:
+                    if self.breaker:
+                        self.breaker.record_failure()
+                    raise
+                error = e
+            finally:
+                self.release()
+            delay = self.backoff(error, attempt)
+            if delay is None:
+                self.give_up(error)
+            self.count('retries')
+            print(f"⏳ Gemini {error_code(error)}; retrying in {delay:.1f}s")
+            time.sleep(delay)
+            attempt += 1
+
+    def summary(self):
+        """Request, retry and failure counts plus the deepest queue seen"""
+        with self.lock:
+            return dict(self.counts, queue_depth=self.waiting, max_queue_depth=self.max_waiting,
+                        in_flight=self.in_flight)
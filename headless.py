@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Headless assistant for benchmarks
+Features: Local stand-ins for the speech engine, Gemini (optionally with a
+rate-limit quota, a slow tail and a second, stronger tier), the weather/news
+APIs and speech recognition, each with configurable artificial latency and a
+switch to take it down, scripted WAV input for listen(), and per-stage latency
+recording
+"""
+
+import os
+import time
+import random
+import wave
+import threading
+from collections import deque
+
+import requests
+import speech_recognition as sr
+
+from http_client import LatencyStats
+from gemini_gateway import GeminiGateway
+from model_router import ModelRouter
+from speech_backends import SpeechBackend, SpeechRecognizer
+from tts_worker import TTSWorker
+
+
+class FakeSpeechEngine:
+    """pyttsx3-compatible engine that 'speaks' for words / words_per_minute seconds"""
+
+    def __init__(self, words_per_minute=0):
+        self.words_per_minute = words_per_minute
+        self.properties = {'voices': [], 'voice': None, 'rate': 200, 'volume': 1.0}
+        self.callbacks = []
+        self.queue = []
+        self.stopped = False
+        self.finished_at = None  # perf_counter() when the last utterance ended
+
+    def getProperty(self, name):
+        return self.properties.get(name)
+
+    def setProperty(self, name, value):
+        self.properties[name] = value
+
+    def connect(self, topic, callback):
+        self.callbacks.append(callback)
+
+    def say(self, text):
+        self.queue.append(text)
+
+    def runAndWait(self):
+        self.stopped = False
+        for text in self.queue:
+            for location, word in enumerate(text.split()):
+                for callback in self.callbacks:
+                    callback('utterance', location, len(word))
+                if self.stopped:
+                    break
+                if self.words_per_minute:
+                    time.sleep(60.0 / self.words_per_minute)
+        self.queue = []
+        self.finished_at = time.perf_counter()
+
+    def stop(self):
+        self.stopped = True
+
+    def save_to_file(self, text, path):
+        # Silent 16 kHz audio, a third of a second per word
+        with wave.open(path, 'wb') as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(16000)
+            f.writeframes(b'\0\0' * 5333 * len(text.split()))
+
+
+class FakeChunk:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeUnavailableError(Exception):
+    """Shaped like google.api_core.exceptions.ServiceUnavailable"""
+
+    code = 503
+
+    def __init__(self):
+        super().__init__("503 The service is currently unavailable.")
+
+
+class FakeModel:
+    """Gemini stand-in: waits first_token seconds, then streams words at words_per_second
+
+    A `tail` fraction of requests waits tail_first_token seconds instead (a
+    slow server). While `down` is set every request fails with a 503 after
+    `timeout` seconds.
+    """
+
+    def __init__(self, first_token=0.4, words_per_second=40.0, reply=None, timeout=2.0, tail=0.0,
+                 tail_first_token=None):
+        self.first_token = first_token
+        self.tail = tail
+        self.tail_first_token = first_token * 10 if tail_first_token is None else tail_first_token
+        self.timeout = timeout
+        self.down = False
+        self.words_per_second = words_per_second
+        self.reply = reply or ("Here is a short answer to your question. It has a couple of sentences, "
+                               "so streaming can start speaking before the whole reply has arrived.")
+        self.calls = 0
+
+    def chunks(self):
+        time.sleep(self.tail_first_token if self.tail and random.random() < self.tail else self.first_token)
+        words = self.reply.split(' ')
+        for start in range(0, len(words), 4):
+            if self.words_per_second:
+                time.sleep(4 / self.words_per_second)
+            yield FakeChunk(' '.join(words[start:start + 4]) + ' ')
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self.calls += 1
+        if self.down:
+            time.sleep(self.timeout)
+            raise FakeUnavailableError()
+        if stream:
+            return self.chunks()
+        return FakeChunk(''.join(chunk.text for chunk in self.chunks()))
+
+
+class FakeRateLimitError(Exception):
+    """Shaped like google.api_core.exceptions.ResourceExhausted"""
+
+    code = 429
+
+    def __init__(self, retry_after=None):
+        super().__init__("429 Resource has been exhausted (e.g. check quota).")
+        self.retry_after = retry_after
+
+
+class QuotaModel:
+    """Wraps a model with a server-side quota: beyond requests_per_second (bursts of `burst`) it raises 429
+
+    With hint=True the error carries the seconds until the quota allows another request.
+    """
+
+    def __init__(self, model, requests_per_second=2.0, burst=2, hint=True):
+        self.model = model
+        self.rate = requests_per_second
+        self.burst = burst
+        self.hint = hint
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.accepted = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    @property
+    def calls(self):
+        return self.model.calls
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                self.rejected += 1
+                raise FakeRateLimitError((1 - self.tokens) / self.rate if self.hint else None)
+            self.tokens -= 1
+            self.accepted += 1
+        return self.model.generate_content(prompt, stream=stream, **kwargs)
+
+
+class FakeResponse:
+    def __init__(self, status_code, data):
+        self.status_code = status_code
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+# Canned API payloads shaped like OpenWeatherMap and NewsAPI responses
+FAKE_PAYLOADS = {
+    'weather': {'main': {'temp': 21.5, 'feels_like': 20.9, 'humidity': 48},
+                'weather': [{'description': 'scattered clouds'}]},
+    'news': {'articles': [{'title': f"Headline number {i}", 'source': {'name': 'Local Wire'}} for i in range(1, 8)]},
+}
+
+
+class FakeHttpClient:
+    """HttpClient stand-in answering weather and news requests after a fixed latency
+
+    Services named in `down` time out after `timeout` seconds instead.
+    """
+
+    def __init__(self, latency=0.15, timeout=2.0):
+        self.latency = latency
+        self.timeout = timeout
+        self.down = set()
+        self.stats = {}
+        self.lock = threading.Lock()
+
+    def get(self, service, url, params=None, **kwargs):
+        started = time.perf_counter()
+        if service in self.down:
+            time.sleep(self.timeout)
+            raise requests.ConnectionError(f"{service}: read timed out after {self.timeout:.0f}s")
+        time.sleep(self.latency)
+        with self.lock:
+            self.stats.setdefault(service, LatencyStats()).record(time.perf_counter() - started)
+        return FakeResponse(200, FAKE_PAYLOADS.get(service, {}))
+
+    def summary(self):
+        with self.lock:
+            return {service: stats.summary() for service, stats in self.stats.items()}
+
+    def close(self):
+        pass
+
+
+class ScriptedBackend(SpeechBackend):
+    """Recognition stand-in returning the transcript recorded for each clip after a fixed latency
+
+    With online=True it stands in for a cloud backend (it gets a circuit
+    breaker); while `down` is set it fails after `timeout` seconds.
+    """
+
+    name = 'scripted'
+
+    def __init__(self, latency=0.3, confidence=0.9, online=False, timeout=2.0):
+        self.latency = latency
+        self.confidence = confidence
+        self.offline = not online
+        self.timeout = timeout
+        self.down = False
+
+    def recognize(self, audio):
+        if self.down:
+            time.sleep(self.timeout)
+            raise sr.RequestError("recognition connection failed: timed out")
+        time.sleep(self.latency)
+        text = getattr(audio, 'transcript', None)
+        if not text:
+            raise sr.UnknownValueError()
+        return text, self.confidence
+
+
+def load_clip(path):
+    """AudioData for a WAV file, carrying the transcript from a sidecar .txt (or the file name)"""
+    with wave.open(path, 'rb') as f:
+        audio = sr.AudioData(f.readframes(f.getnframes()), f.getframerate(), f.getsampwidth())
+    sidecar = os.path.splitext(path)[0] + '.txt'
+    if os.path.exists(sidecar):
+        with open(sidecar, encoding='utf-8') as f:
+            audio.transcript = f.read().strip()
+    else:
+        audio.transcript = os.path.splitext(os.path.basename(path))[0].replace('_', ' ')
+    return audio
+
+
+class StageTimer:
+    """Latency samples per named stage"""
+
+    def __init__(self):
+        self.stages = {}
+        self.lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self.lock:
+            self.stages.setdefault(stage, LatencyStats(window=100000)).record(seconds)
+
+    def timed(self, stage, function, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+    def summary(self):
+        """Count and p50/p95/p99 in milliseconds per stage"""
+        with self.lock:
+            stages = dict(self.stages)
+        return {
+            stage: {
+                'count': stats.requests,
+                'p50_ms': round(stats.percentile(0.50) * 1000, 2),
+                'p95_ms': round(stats.percentile(0.95) * 1000, 2),
+                'p99_ms': round(stats.percentile(0.99) * 1000, 2),
+            }
+            for stage, stats in stages.items()
+        }
+
+
+def headless(assistant_class, ai_latency=0.4, ai_words_per_second=40.0, http_latency=0.15,
+             recognition_latency=0.3, speech_wpm=0, ai_quota=None, online_recognition=False, ai_tail=0.0):
+    """Subclass of an assistant class whose devices and services are local stand-ins
+
+    The returned class takes no constructor arguments, like the real ones.
+    Clips queued with feed() are returned by capture_audio() in order.
+    ai_quota (requests per second) makes the fake Gemini answer 429 beyond it;
+    the fake is reached through the same GeminiGateway and ModelRouter as the
+    real model. ai_tail is the fraction of Gemini requests that are ten times
+    slower to start.
+    online_recognition makes the scripted recognizer count as an online
+    backend, with its own circuit breaker.
+    """
+
+    class HeadlessAssistant(assistant_class):
+        def __init__(self):
+            self.timer = StageTimer()
+            self.clips = deque()
+            self.first_speech = None
+            super().__init__()
+
+        def setup_ai(self):
+            self.model_name = 'fake-gemini'
+            self.fake_models = {}
+
+            def make_model(name):
+                # The strong tier (GEMINI_STRONG_MODEL) is slower to start answering
+                latency = ai_latency if name == self.model_name else ai_latency * 2
+                model = self.fake_models[name] = FakeModel(latency, ai_words_per_second, tail=ai_tail)
+                if ai_quota:
+                    model = QuotaModel(model, ai_quota, burst=max(1, int(ai_quota)))
+                return GeminiGateway.from_env(model, self.metrics, self.breakers.get('gemini'))
+
+            self.model = ModelRouter.from_env(make_model, self.model_name, self.metrics)
+            self.fake_model = self.fake_models[self.model_name]
+
+        def setup_voice(self):
+            self.tts = TTSWorker(name=self.assistant_name, echo=False, metrics=self.metrics,
+                                 engine_factory=lambda: FakeSpeechEngine(speech_wpm)).start()
+
+        def setup_speech_recognition(self):
+            self.calibration = None
+            self.mic_stream = None
+            self.wake_word = None
+            self.recognizer = sr.Recognizer()
+            self.speech = SpeechRecognizer([ScriptedBackend(recognition_latency, online=online_recognition)],
+                                           breakers=self.breakers)
+
+        def setup_lookups(self):
+            super().setup_lookups()
+            self.http = FakeHttpClient(http_latency)
+
+        def feed(self, clips):
+            self.clips.extend(clips)
+
+        def capture_audio(self, timeout=5):
+            return self.timer.timed('capture', lambda: self.clips.popleft() if self.clips else None)
+
+        def recognize_audio(self, audio):
+            return self.timer.timed('recognize', super().recognize_audio, audio)
+
+        def speak(self, text, urgent=False, on_start=None):
+            if self.first_speech is None:
+                self.first_speech = time.perf_counter()
+            super().speak(text, urgent, on_start)
+
+    HeadlessAssistant.__name__ = f"Headless{assistant_class.__name__}"
+    return HeadlessAssistant
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP client for network skills
+Features: Keep-alive connection pooling, per-service connect/read timeouts,
+bounded retries with jittered backoff and a retry budget, per-service latency stats
+"""
+
+import time
+import random
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUTS = {
+    'weather': (3.05, 5),
+    'news': (3.05, 8),
+    'default': (3.05, 10),
+}
+
+# Status codes worth another attempt
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class LatencyStats:
+    """Request counters and a window of recent latencies for one service"""
+
+    def __init__(self, window=200):
+        self.window = window
+        self.samples = []
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+
+    def record(self, seconds, ok=True):
+        """Record one attempt"""
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+        self.samples.append(seconds)
+        del self.samples[:-self.window]
+
+    def percentile(self, fraction):
+        """Latency at the given fraction (0-1) of recent samples"""
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def summary(self):
+        """Counters and latency percentiles in milliseconds"""
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'retries': self.retries,
+            'p50_ms': round(self.percentile(0.50) * 1000, 1),
+            'p95_ms': round(self.percentile(0.95) * 1000, 1),
+            'max_ms': round(max(self.samples, default=0.0) * 1000, 1),
+        }
+
+
+class HttpClient:
+    """One pooled requests.Session shared by weather, news and other network skills"""
+
+    def __init__(self, timeouts=None, max_retries=2, backoff_base=0.25, backoff_cap=2.0,
+                 retry_budget=0.2, pool_size=10):
+        self.timeouts = dict(DEFAULT_TIMEOUTS, **(timeouts or {}))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+        # Every request earns `retry_budget` tokens and every retry spends one, so
+        # retries stay a small fraction of traffic when an upstream is failing
+        self.retry_budget = retry_budget
+        self.retry_tokens = 10.0
+        self.lock = threading.Lock()
+        self.stats = {}
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def service_stats(self, service):
+        """Stats for a service, created on first use"""
+        with self.lock:
+            if service not in self.stats:
+                self.stats[service] = LatencyStats()
+            return self.stats[service]
+
+    def can_retry(self):
+        """Spend a retry token if the budget allows it"""
+        with self.lock:
+            if self.retry_tokens >= 1:
+                self.retry_tokens -= 1
+                return True
+            return False
+
+    def backoff(self, attempt, response=None):
+        """Full-jitter exponential backoff, honouring Retry-After when the server sends it"""
+        if response is not None and response.headers.get('Retry-After', '').isdigit():
+            time.sleep(min(self.backoff_cap, float(response.headers['Retry-After'])))
+            return
+        time.sleep(random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt))))
+
+    def get(self, service, url, params=None, **kwargs):
+        """GET with the service's timeouts, retrying connection errors, timeouts and 5xx/429"""
+        timeout = self.timeouts.get(service, self.timeouts['default'])
+        stats = self.service_stats(service)
+        with self.lock:
+            self.retry_tokens = min(10.0, self.retry_tokens + self.retry_budget)
+
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, params=params, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                stats.record(time.perf_counter() - started, ok=False)
+                if attempt >= self.max_retries or not self.can_retry():
+                    raise
+                stats.retries += 1
+                self.backoff(attempt)
+                attempt += 1
+                continue
+
+            ok = response.status_code not in RETRY_STATUSES
+            stats.record(time.perf_counter() - started, ok=ok)
+            if ok or attempt >= self.max_retries or not self.can_retry():
+                return response
+            stats.retries += 1
+            self.backoff(attempt, response)
+            attempt += 1
+
+    def summary(self):
+        """Latency and error stats per service"""
+        with self.lock:
+            services = dict(self.stats)
+        return {service: stats.summary() for service, stats in services.items()}
+
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
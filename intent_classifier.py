@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Offline intent classifier
+Features: Hashed word, bigram and character-trigram features, softmax regression
+trained with NumPy, saved to disk, confidence scores so unsure commands still go to the LLM
+
+Usage:
+    python intent_classifier.py train [--examples intent_examples.json] [--model intent_model.npz]
+    python intent_classifier.py predict "how hot is it outside"
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import argparse
+
+import numpy as np
+
+from intent_router import tokenize
+
+FEATURE_DIM = 2 ** 12
+FALLBACK_LABEL = 'chat'  # examples that should keep going to Gemini
+
+
+def hashed_features(text, dim=FEATURE_DIM):
+    """Hash words, word bigrams and character trigrams into feature indices"""
+    tokens = tokenize(text)
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    padded = f" {' '.join(tokens)} "
+    grams += [f"#{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    # crc32 rather than hash(): it is stable across processes, so saved models stay valid
+    return [zlib.crc32(gram.encode('utf-8')) % dim for gram in grams]
+
+
+def vectorize(texts, dim=FEATURE_DIM):
+    """Turn texts into an L2-normalized (len(texts), dim) feature matrix"""
+    rows, cols = [], []
+    for row, text in enumerate(texts):
+        indices = hashed_features(text, dim)
+        rows += [row] * len(indices)
+        cols += indices
+    matrix = np.zeros((len(texts), dim), dtype=np.float32)
+    np.add.at(matrix, (rows, cols), 1.0)
+    matrix = np.log1p(matrix)
+    matrix /= np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-9
+    return matrix
+
+
+def softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class IntentClassifier:
+    """Linear softmax model over hashed n-gram features"""
+
+    def __init__(self, labels, weights, bias, dim=FEATURE_DIM):
+        self.labels = list(labels)
+        self.weights = weights
+        self.bias = bias
+        self.dim = dim
+
+    @classmethod
+    def train(cls, texts, labels, dim=FEATURE_DIM, epochs=400, learning_rate=2.0, l2=1e-4):
+        """Fit the model with full-batch gradient descent on the cross-entropy loss"""
+        classes = sorted(set(labels))
+        targets = np.zeros((len(texts), len(classes)), dtype=np.float32)
+        targets[np.arange(len(texts)), [classes.index(label) for label in labels]] = 1.0
+
+        features = vectorize(texts, dim)
+        weights = np.zeros((dim, len(classes)), dtype=np.float32)
+        bias = np.zeros(len(classes), dtype=np.float32)
+        for _ in range(epochs):
+            error = softmax(features @ weights + bias) - targets
+            weights -= learning_rate * (features.T @ error / len(texts) + l2 * weights)
+            bias -= learning_rate * error.mean(axis=0)
+        return cls(classes, weights, bias, dim)
+
+    def classify(self, text):
+        """Return (label, confidence) for one command"""
+        probabilities = softmax(vectorize([text], self.dim) @ self.weights + self.bias)[0]
+        best = int(probabilities.argmax())
+        return self.labels[best], float(probabilities[best])
+
+    def save(self, path):
+        """Save the model as a .npz file"""
+        np.savez(path, labels=np.array(self.labels), weights=self.weights, bias=self.bias,
+                 dim=np.array(self.dim))
+
+    @classmethod
+    def load(cls, path):
+        """Load a model saved with save()"""
+        data = np.load(path)
+        return cls(data['labels'].tolist(), data['weights'], data['bias'], int(data['dim']))
+
+
+def load_examples(path):
+    """Read {intent: [utterances]} and flatten it into parallel lists"""
+    with open(path, encoding='utf-8') as f:
+        examples = json.load(f)
+    texts, labels = [], []
+    for label, utterances in examples.items():
+        texts += utterances
+        labels += [label] * len(utterances)
+    return texts, labels
+
+
+def cross_validate(texts, labels, folds=5, seed=0):
+    """Accuracy over k folds; each example is held out exactly once"""
+    order = np.random.default_rng(seed).permutation(len(texts))
+    correct = 0
+    for fold in range(folds):
+        held_out = set(order[fold::folds].tolist())
+        train = [i for i in range(len(texts)) if i not in held_out]
+        model = IntentClassifier.train([texts[i] for i in train], [labels[i] for i in train])
+        correct += sum(model.classify(texts[i])[0] == labels[i] for i in held_out)
+    return correct / len(texts)
+
+
+def measure_latency(model, texts, repeats=5):
+    """Per-classification latency in microseconds: (mean, p95)"""
+    samples = []
+    for _ in range(repeats):
+        for text in texts:
+            started = time.perf_counter()
+            model.classify(text)
+            samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return sum(samples) / len(samples), samples[int(0.95 * (len(samples) - 1))]
+
+
+def load_or_train(model_path='intent_model.npz', examples_path='intent_examples.json'):
+    """Load the saved model, training it first if it is missing or older than the examples"""
+    if not os.path.exists(model_path) or (
+            os.path.exists(examples_path) and os.path.getmtime(examples_path) > os.path.getmtime(model_path)):
+        texts, labels = load_examples(examples_path)
+        IntentClassifier.train(texts, labels).save(model_path)
+    return IntentClassifier.load(model_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train or try the offline intent classifier")
+    parser.add_argument('action', choices=['train', 'predict'])
+    parser.add_argument('text', nargs='?')
+    parser.add_argument('--examples', default='intent_examples.json')
+    parser.add_argument('--model', default='intent_model.npz')
+    args = parser.parse_args()
+
+    if args.action == 'predict':
+        if not args.text:
+            parser.error("predict needs the text to classify")
+        label, confidence = load_or_train(args.model, args.examples).classify(args.text)
+        print(f"{label} ({confidence:.0%})")
+        return
+
+    texts, labels = load_examples(args.examples)
+    print(f"📚 {len(texts)} examples, {len(set(labels))} intents")
+    print(f"🎯 5-fold cross-validated accuracy: {cross_validate(texts, labels):.1%}")
+
+    started = time.perf_counter()
+    model = IntentClassifier.train(texts, labels)
+    print(f"🏋 Trained in {time.perf_counter() - started:.2f}s")
+    model.save(args.model)
+    print(f"💾 Saved to {args.model}")
+
+    mean_us, p95_us = measure_latency(model, texts)
+    print(f"⏱ Classification latency: mean {mean_us:.0f}µs, p95 {p95_us:.0f}µs")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Table-driven intent router
+Features: Declarative intent table compiled once into a word-level Aho-Corasick
+automaton, whole-word matching, priorities and slot extraction
+"""
+
+import re
+from collections import deque
+
+TOKEN = re.compile(r"[a-z0-9']+")
+
+# Slot spec meaning "the rest of the command, minus the trigger phrase and filler words"
+REST = 'rest'
+
+
+def tokenize(text):
+    """Split a command into lowercase word tokens"""
+    return TOKEN.findall(text.lower())
+
+
+class PhraseMatcher:
+    """Aho-Corasick automaton over word tokens
+
+    Matching whole tokens gives word-boundary awareness for free ("update" never
+    matches "date") and one pass over the command finds every phrase of every
+    intent, so the cost does not grow with the number of intents.
+    """
+
+    def __init__(self):
+        self.transitions = [{}]
+        self.fail = [0]
+        self.outputs = [[]]
+
+    def add(self, tokens, value):
+        """Add a phrase (a sequence of tokens) that reports value when matched"""
+        state = 0
+        for token in tokens:
+            if token not in self.transitions[state]:
+                self.transitions.append({})
+                self.fail.append(0)
+                self.outputs.append([])
+                self.transitions[state][token] = len(self.transitions) - 1
+            state = self.transitions[state][token]
+        self.outputs[state].append((len(tokens), value))
+
+    def build(self):
+        """Compute failure links breadth-first"""
+        pending = deque(self.transitions[0].values())
+        while pending:
+            state = pending.popleft()
+            for token, target in self.transitions[state].items():
+                pending.append(target)
+                fallback = self.fail[state]
+                while fallback and token not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[target] = self.transitions[fallback].get(token, 0)
+                if self.fail[target] == target:
+                    self.fail[target] = 0
+                self.outputs[target] = self.outputs[target] + self.outputs[self.fail[target]]
+
+    def find(self, tokens):
+        """Yield (start, length, value) for every phrase occurrence"""
+        state = 0
+        for index, token in enumerate(tokens):
+            while state and token not in self.transitions[state]:
+                state = self.fail[state]
+            state = self.transitions[state].get(token, 0)
+            for length, value in self.outputs[state]:
+                yield index - length + 1, length, value
+
+
+class Intent:
+    """One row of the intent table"""
+
+    def __init__(self, name, phrases, priority=0, slots=None, fillers=()):
+        self.name = name
+        self.phrases = [tokenize(phrase) for phrase in phrases]
+        self.priority = priority
+        self.fillers = set(fillers)
+        self.slots = {}
+        for slot, spec in (slots or {}).items():
+            # Regex slots are compiled once here, not per command
+            self.slots[slot] = re.compile(spec) if isinstance(spec, str) and spec != REST else spec
+
+    def extract(self, command, tokens, start, length):
+        """Fill slots for a command matched at tokens[start:start + length]"""
+        values = {}
+        for slot, spec in self.slots.items():
+            if spec == REST:
+                rest = tokens[:start] + tokens[start + length:]
+                while rest and rest[0] in self.fillers:
+                    rest.pop(0)
+                while rest and rest[-1] in self.fillers:
+                    rest.pop()
+                if rest:
+                    values[slot] = ' '.join(rest)
+            elif isinstance(spec, dict):
+                # Keyword choice, e.g. {'tech': 'technology'}; first keyword in the command wins
+                for token in tokens:
+                    if token in spec:
+                        values[slot] = spec[token]
+                        break
+            else:
+                match = spec.search(command)
+                if match:
+                    values[slot] = match.group(1).strip()
+        return values
+
+
+class IntentMatch:
+    """Result of routing a command"""
+
+    def __init__(self, name, slots, phrase):
+        self.name = name
+        self.slots = slots
+        self.phrase = phrase
+
+    def __repr__(self):
+        return f"IntentMatch({self.name!r}, {self.slots!r})"
+
+
+class IntentRouter:
+    """Route commands to intents using a matcher compiled once from the intent table"""
+
+    def __init__(self, table):
+        """table: list of dicts with name, phrases and optional priority, slots, fillers"""
+        self.intents = [Intent(**row) for row in table]
+        self.intents_by_name = {intent.name: intent for intent in self.intents}
+        self.matcher = PhraseMatcher()
+        for intent in self.intents:
+            for phrase in intent.phrases:
+                self.matcher.add(phrase, intent)
+        self.matcher.build()
+
+    def route(self, command):
+        """Return the best IntentMatch for a command, or None
+
+        Highest priority wins, then the longest phrase, then the earliest one.
+        """
+        tokens = tokenize(command)
+        best = None
+        best_rank = None
+        for start, length, intent in self.matcher.find(tokens):
+            rank = (intent.priority, length, -start)
+            if best_rank is None or rank > best_rank:
+                best, best_rank = (intent, start, length), rank
+
+        if not best:
+            return None
+        intent, start, length = best
+        slots = intent.extract(command.lower(), tokens, start, length)
+        return IntentMatch(intent.name, slots, ' '.join(tokens[start:start + length]))
+
+    def extract_slots(self, name, command):
+        """Fill an intent's slots for a command that was routed some other way, e.g. by the classifier"""
+        intent = self.intents_by_name.get(name)
+        if not intent:
+            return {}
+        return intent.extract(command.lower(), tokenize(command), 0, 0)
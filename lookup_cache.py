@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Cache for weather and news lookups
+Features: Per-namespace TTLs, stale-while-revalidate with background refresh,
+persisted in SQLite so answers survive restarts
+"""
+
+import json
+import time
+import threading
+
+# namespace -> (fresh seconds, usable-while-stale seconds)
+DEFAULT_TTLS = {
+    'weather': (10 * 60, 6 * 3600),
+    'news': (15 * 60, 24 * 3600),
+}
+
+
+class LookupCache:
+    """Answer from fresh entries, serve stale ones while refreshing in the background"""
+
+    def __init__(self, storage, ttls=None):
+        """storage: the assistant's Storage, which owns the lookup_cache table and writes to it"""
+        self.storage = storage
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self.lock = threading.Lock()
+        self.entries = {}  # (namespace, key) -> (value, fetched_at)
+        self.refreshing = set()
+        self.stats = {'fresh_hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0, 'refresh_errors': 0,
+                      'error_hits': 0}
+        self.load()
+
+    def load(self):
+        """Load entries that are still usable from the previous session"""
+        now = time.time()
+        rows = self.storage.query("SELECT namespace, key, value, fetched_at FROM lookup_cache")
+        for namespace, key, value, fetched_at in rows:
+            if now - fetched_at < self.max_age(namespace):
+                self.entries[(namespace, key)] = (json.loads(value), fetched_at)
+        self.storage.submit(
+            "DELETE FROM lookup_cache WHERE fetched_at < ?",
+            (now - max(stale for _, stale in self.ttls.values()),)
+        )
+
+    def fresh_for(self, namespace):
+        """Seconds an entry is answered without refreshing"""
+        return self.ttls.get(namespace, (0, 0))[0]
+
+    def max_age(self, namespace):
+        """Seconds an entry may still be served while a refresh runs"""
+        return self.ttls.get(namespace, (0, 0))[1]
+
+    def get(self, namespace, key, fetch):
+        """Return the cached value for key, calling fetch() when there is nothing usable
+
+        fetch() returning None means "no answer" and is not cached. When fetch()
+        fails (e.g. its service's circuit is open) an expired entry is still
+        served rather than nothing.
+        """
+        with self.lock:
+            entry = self.entries.get((namespace, key))
+
+        if entry:
+            value, fetched_at = entry
+            age = time.time() - fetched_at
+            if age < self.fresh_for(namespace):
+                self.stats['fresh_hits'] += 1
+                return value
+            if age < self.max_age(namespace):
+                self.stats['stale_hits'] += 1
+                self.refresh_in_background(namespace, key, fetch)
+                return value
+
+        self.stats['misses'] += 1
+        try:
+            value = fetch()
+        except Exception as e:
+            if not entry:
+                raise
+            self.stats['error_hits'] += 1
+            print(f"✗ {namespace} lookup failed ({e}); answering from an expired entry")
+            return entry[0]
+        self.store(namespace, key, value)
+        return value
+
+    def refresh_in_background(self, namespace, key, fetch):
+        """Start one refresh per key; the stale value keeps being served meanwhile"""
+        with self.lock:
+            if (namespace, key) in self.refreshing:
+                return
+            self.refreshing.add((namespace, key))
+
+        def refresh():
+            try:
+                self.store(namespace, key, fetch())
+                self.stats['refreshes'] += 1
+            except Exception as e:
+                self.stats['refresh_errors'] += 1
+                print(f"✗ Background refresh of {namespace} '{key}' failed: {e}")
+            finally:
+                with self.lock:
+                    self.refreshing.discard((namespace, key))
+
+        threading.Thread(target=refresh, name=f"refresh-{namespace}", daemon=True).start()
+
+    def store(self, namespace, key, value):
+        """Save a fetched value in memory and on disk"""
+        if value is None:
+            return
+        fetched_at = time.time()
+        with self.lock:
+            self.entries[(namespace, key)] = (value, fetched_at)
+        # Answers come from memory; the row only has to be on disk for the next start
+        self.storage.submit(
+            "INSERT OR REPLACE INTO lookup_cache (namespace, key, value, fetched_at) VALUES (?, ?, ?, ?)",
+            (namespace, key, json.dumps(value), fetched_at)
+        )
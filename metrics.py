@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Latency instrumentation for the assistants
+Features: Tracing spans around each stage of an interaction, fixed-bucket
+histograms with a window of recent samples for percentiles, gauges and
+counters, a per-command breakdown in the log, periodic export to JSONL and a
+Prometheus textfile, and a no-op span when disabled
+"""
+
+import os
+import json
+import time
+import bisect
+import logging
+import functools
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds in seconds (Prometheus "le" labels)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+WINDOW = 500  # recent samples kept per span for percentiles
+
+
+class Histogram:
+    """Bucketed latency counts since startup plus the most recent samples"""
+
+    def __init__(self, buckets=BUCKETS, window=WINDOW):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last bucket is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, seconds, ok=True):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if not ok:
+            self.errors += 1
+        self.recent.append(seconds)
+
+    def percentile(self, fraction):
+        """Latency at the given fraction (0-1) of recent samples"""
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def cumulative(self):
+        """(upper bound, samples at or below it) pairs, ending with +Inf"""
+        running = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            running += count
+            pairs.append((bound, running))
+        return pairs
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'mean_ms': round(self.total / self.count * 1000, 1) if self.count else 0.0,
+            'p50_ms': round(self.percentile(0.50) * 1000, 1),
+            'p95_ms': round(self.percentile(0.95) * 1000, 1),
+            'p99_ms': round(self.percentile(0.99) * 1000, 1),
+        }
+
+
+class Span:
+    """Times one stage; the outermost span on a thread collects its children for the log"""
+
+    __slots__ = ('metrics', 'name', 'started', 'children')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.children = None
+
+    def __enter__(self):
+        stack = self.metrics.stack()
+        if not stack:
+            self.children = []
+        stack.append(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        elapsed = time.perf_counter() - self.started
+        stack = self.metrics.stack()
+        stack.pop()
+        self.metrics.observe(self.name, elapsed, ok=exc_type is None)
+        if stack:
+            root = stack[0]
+            root.children.append((self.name, elapsed))
+        elif self.children and logger.isEnabledFor(logging.INFO):
+            breakdown = ', '.join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.children)
+            logger.info(f"{self.name} {elapsed * 1000:.0f}ms: {breakdown}")
+        return False
+
+
+class NoopSpan:
+    """Stand-in returned while metrics are disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        return False
+
+
+NOOP_SPAN = NoopSpan()
+
+
+class Metrics:
+    """Span histograms for one assistant, exported periodically when paths are configured"""
+
+    def __init__(self, enabled=True, jsonl_path=None, prometheus_path=None, export_interval=60.0,
+                 prefix='assistant'):
+        self.enabled = enabled
+        self.jsonl_path = jsonl_path
+        self.prometheus_path = prometheus_path
+        self.export_interval = export_interval
+        self.prefix = prefix
+        self.histograms = {}
+        self.gauges = {}  # name -> current value, e.g. a queue depth
+        self.counters = {}  # name -> running total since startup
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            enabled=os.getenv('METRICS', 'true').lower() == 'true',
+            jsonl_path=os.getenv('METRICS_JSONL') or None,
+            prometheus_path=os.getenv('METRICS_PROMETHEUS') or None,
+            export_interval=float(os.getenv('METRICS_EXPORT_INTERVAL', 60))
+        )
+
+    def stack(self):
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    def span(self, name):
+        """Context manager timing one stage"""
+        return Span(self, name) if self.enabled else NOOP_SPAN
+
+    def observe(self, name, seconds, ok=True):
+        """Record a duration measured elsewhere"""
+        if not self.enabled:
+            return
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds, ok)
+
+    def gauge(self, name, value):
+        """Set the current value of a level such as a queue depth"""
+        if self.enabled:
+            with self.lock:
+                self.gauges[name] = value
+
+    def increment(self, name, amount=1):
+        """Add to a running total such as a retry count"""
+        if self.enabled:
+            with self.lock:
+                self.counters[name] = self.counters.get(name, 0) + amount
+
+    def levels(self):
+        """Current gauges and counters"""
+        with self.lock:
+            return {'gauges': dict(self.gauges), 'counters': dict(self.counters)}
+
+    def summary(self):
+        """Per-span counts and recent latency percentiles in milliseconds"""
+        with self.lock:
+            return {name: histogram.summary() for name, histogram in self.histograms.items()}
+
+    def report(self):
+        """Print every span, slowest median first"""
+        summary = self.summary()
+        if not summary:
+            return
+        print(f"⏱ Latency by stage (last {WINDOW} samples each):")
+        for name, entry in sorted(summary.items(), key=lambda item: -item[1]['p50_ms']):
+            errors = f", {entry['errors']} errors" if entry['errors'] else ""
+            print(f"   {name:<12} {entry['count']:6} calls  p50 {entry['p50_ms']:8.1f}ms  "
+                  f"p95 {entry['p95_ms']:8.1f}ms  p99 {entry['p99_ms']:8.1f}ms{errors}")
+        levels = self.levels()
+        for name, value in sorted(levels['gauges'].items()) + sorted(levels['counters'].items()):
+            print(f"   {name:<24} {value:g}")
+
+    def describe(self, top=3):
+        """A short spoken summary of recent latencies"""
+        summary = self.summary()
+        if not self.enabled:
+            return "Performance tracing is turned off. Set METRICS to true to collect latencies."
+        if not summary:
+            return "I haven't measured anything yet."
+        parts = []
+        command = summary.get('dispatch')
+        if command:
+            parts.append(f"Over the last {min(command['count'], WINDOW)} commands, "
+                         f"the median was {command['p50_ms']:.0f} milliseconds "
+                         f"and the 95th percentile {command['p95_ms']:.0f}.")
+        stages = sorted(((name, entry) for name, entry in summary.items() if name != 'dispatch'),
+                        key=lambda item: -item[1]['p50_ms'])[:top]
+        if stages:
+            slowest = ', '.join(f"{name} at {entry['p50_ms']:.0f}" for name, entry in stages)
+            parts.append(f"The slowest stages by median, in milliseconds: {slowest}.")
+        return ' '.join(parts)
+
+    def prometheus_text(self):
+        """Histograms in the Prometheus text exposition format"""
+        metric = f"{self.prefix}_span_seconds"
+        lines = [f"# HELP {metric} Time spent in each assistant stage",
+                 f"# TYPE {metric} histogram"]
+        errors = []
+        with self.lock:
+            for name, histogram in sorted(self.histograms.items()):
+                for bound, count in histogram.cumulative():
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{metric}_bucket{{span="{name}",le="{le}"}} {count}')
+                lines.append(f'{metric}_sum{{span="{name}"}} {histogram.total:.6f}')
+                lines.append(f'{metric}_count{{span="{name}"}} {histogram.count}')
+                errors.append(f'{self.prefix}_span_errors_total{{span="{name}"}} {histogram.errors}')
+        lines += [f"# HELP {self.prefix}_span_errors_total Stages that raised an exception",
+                  f"# TYPE {self.prefix}_span_errors_total counter"] + errors
+        levels = self.levels()
+        for name, value in sorted(levels['gauges'].items()):
+            lines += [f"# TYPE {self.prefix}_{name} gauge", f"{self.prefix}_{name} {value:g}"]
+        for name, value in sorted(levels['counters'].items()):
+            lines += [f"# TYPE {self.prefix}_{name}_total counter", f"{self.prefix}_{name}_total {value:g}"]
+        return '\n'.join(lines) + '\n'
+
+    def export(self):
+        """Append a snapshot to the JSONL file and rewrite the Prometheus textfile"""
+        if not self.enabled:
+            return
+        try:
+            if self.jsonl_path:
+                with self.lock:
+                    histograms = {name: dict(histogram.summary(), buckets=histogram.counts)
+                                  for name, histogram in self.histograms.items()}
+                with open(self.jsonl_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps({'time': time.time(), 'buckets': BUCKETS, 'spans': histograms,
+                                        **self.levels()}) + '\n')
+            if self.prometheus_path:
+                # Written aside and renamed so the node exporter never reads a partial file
+                temporary = self.prometheus_path + '.tmp'
+                with open(temporary, 'w', encoding='utf-8') as f:
+                    f.write(self.prometheus_text())
+                os.replace(temporary, self.prometheus_path)
+        except OSError as e:
+            print(f"✗ Error exporting metrics: {e}")
+
+    def start(self):
+        """Export in the background every export_interval seconds"""
+        if self.enabled and (self.jsonl_path or self.prometheus_path):
+            self.thread = threading.Thread(target=self.export_loop, name='metrics-export', daemon=True)
+            self.thread.start()
+        return self
+
+    def export_loop(self):
+        while not self.stopped.wait(self.export_interval):
+            self.export()
+
+    def close(self):
+        """Stop the exporter and write a final snapshot"""
+        self.stopped.set()
+        if self.thread:
+            self.thread.join(2)
+            self.export()
+
+
+def traced(name):
+    """Method decorator: time each call in a span on self.metrics"""
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.span(name):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorate
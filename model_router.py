@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Tiered and hedged Gemini requests
+Features: Short, simple questions go to a fast model and long or demanding
+ones to a stronger model, a deadline on every call, a hedged duplicate request
+when the first has not answered by the tier's recent p95 (first answer wins),
+and hedge rate and latency saved reported as metrics
+"""
+
+import os
+import re
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from http_client import LatencyStats
+from metrics import Metrics
+
+SLOW_REPLY = "That's taking me too long to answer. Please try again in a moment."
+# Questions that ask for reasoning or longer writing
+DEMANDING_WORDS = re.compile(r'\b(explain|compare|analy[sz]e|step by step|write|code|plan|summari[sz]e|essay|'
+                             r'in detail|detailed|pros and cons|difference between)\b')
+
+
+class DeadlineExceeded(TimeoutError):
+    """Gemini did not answer (or start streaming) within the call's deadline"""
+
+
+class Tier:
+    """One model behind its own gateway, since Gemini quotas are per model"""
+
+    def __init__(self, name, model, model_name=None):
+        self.name = name
+        self.model = model
+        self.model_name = model_name or name  # e.g. to key cached replies by the model that wrote them
+        self.latency = {False: LatencyStats(), True: LatencyStats()}  # full replies / first chunks
+
+
+def stream_from(first, iterator):
+    if first is not None:
+        yield first
+    yield from iterator
+
+
+class ModelRouter:
+    """Drop-in for GeminiGateway that picks a tier per question and hedges slow requests
+
+    generate_content(prompt, query=...) uses the strong tier (if configured)
+    when the question has at least strong_min_words words or asks for
+    reasoning ("explain", "compare", ...), and the fast tier otherwise.
+
+    If no answer (the first chunk, when streaming) has arrived after the
+    tier's hedge_percentile latency, the same request is sent again and the
+    first answer is used; until min_samples latencies are known the delay is
+    hedge_delay. At most max_hedge_rate of requests are hedged, so a slow
+    service is not sent twice the traffic. A request that fails before the
+    hedge delay is not hedged (the gateway already retried it). Without an
+    answer after `deadline` seconds, DeadlineExceeded is raised; the losing
+    request finishes in the background.
+    """
+
+    def __init__(self, tiers, deadline=20.0, hedging=True, hedge_percentile=0.95, hedge_delay=2.0,
+                 min_samples=20, max_hedge_rate=0.1, strong_min_words=25, workers=32, metrics=None):
+        self.tiers = tiers
+        self.deadline = deadline
+        self.hedging = hedging
+        self.hedge_percentile = hedge_percentile
+        self.initial_hedge_delay = hedge_delay
+        self.min_samples = min_samples
+        self.max_hedge_rate = max_hedge_rate
+        self.strong_min_words = strong_min_words
+        self.metrics = metrics or Metrics(enabled=False)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='gemini')
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.counts = {'hedged': 0, 'hedge_wins': 0, 'deadline_exceeded': 0, 'saved_seconds': 0.0}
+        self.tier_counts = {tier.name: 0 for tier in tiers}
+
+    @classmethod
+    def from_env(cls, make_model, model_name, metrics=None):
+        """A fast tier for model_name and a strong one for GEMINI_STRONG_MODEL; make_model(name) builds each"""
+        fast = model_name
+        strong = os.getenv('GEMINI_STRONG_MODEL', '')
+        tiers = [Tier('fast', make_model(fast), fast)]
+        if strong and strong != fast:
+            tiers.append(Tier('strong', make_model(strong), strong))
+        return cls(
+            tiers,
+            deadline=float(os.getenv('GEMINI_DEADLINE', 20)),
+            hedging=os.getenv('GEMINI_HEDGE', 'true').lower() == 'true',
+            hedge_percentile=float(os.getenv('GEMINI_HEDGE_PERCENTILE', 0.95)),
+            hedge_delay=float(os.getenv('GEMINI_HEDGE_DELAY', 2.0)),
+            max_hedge_rate=float(os.getenv('GEMINI_HEDGE_MAX_RATE', 0.1)),
+            strong_min_words=int(os.getenv('GEMINI_STRONG_MIN_WORDS', 25)),
+            metrics=metrics
+        )
+
+    def choose(self, prompt, query=None):
+        """The tier for a request: strong for long or demanding questions, when there is one"""
+        if len(self.tiers) == 1:
+            return self.tiers[0]
+        question = (query or prompt).lower()
+        if len(question.split()) >= self.strong_min_words or DEMANDING_WORDS.search(question):
+            return self.tiers[1]
+        return self.tiers[0]
+
+    def hedge_delay(self, tier, stream):
+        """Seconds to wait for an answer before hedging: the tier's recent percentile latency"""
+        with self.lock:
+            stats = tier.latency[stream]
+            if len(stats.samples) < self.min_samples:
+                return self.initial_hedge_delay
+            return stats.percentile(self.hedge_percentile)
+
+    def may_hedge(self):
+        with self.lock:
+            return self.hedging and self.counts['hedged'] < self.max_hedge_rate * self.calls + 1
+
+    def attempt(self, tier, prompt, stream, kwargs):
+        """One request; for streams, the first chunk and the rest of the iterator"""
+        started = time.perf_counter()
+        if stream:
+            iterator = iter(tier.model.generate_content(prompt, stream=True, **kwargs))
+            result = (next(iterator, None), iterator)
+        else:
+            result = tier.model.generate_content(prompt, **kwargs)
+        elapsed = time.perf_counter() - started
+        with self.lock:
+            tier.latency[stream].record(elapsed)
+        return result
+
+    def abandon(self, future, stream, won_at=None):
+        """Let a losing request finish in the background; count the time it would have cost"""
+
+        def finished(future):
+            if future.exception() is not None:
+                return
+            close = getattr(future.result()[1], 'close', None) if stream else None
+            if close:
+                close()  # frees the gateway slot the rest of the stream would hold
+            if won_at is not None:
+                saved = time.monotonic() - won_at
+                with self.lock:
+                    self.counts['saved_seconds'] += saved
+                self.metrics.observe('gemini_hedge_saved', saved)
+
+        future.add_done_callback(finished)
+
+    def generate_content(self, prompt, stream=False, query=None, **kwargs):
+        """Same as GenerativeModel.generate_content; query (the user's question) picks the tier"""
+        tier = self.choose(prompt, query)
+        with self.lock:
+            self.calls += 1
+            self.tier_counts[tier.name] += 1
+        self.metrics.increment(f"gemini_tier_{tier.name}")
+
+        sent = time.monotonic()
+        deadline = sent + self.deadline
+        delay = self.hedge_delay(tier, stream)
+        hedge_at = sent + delay if self.hedging else None
+        primary = self.executor.submit(self.attempt, tier, prompt, stream, kwargs)
+        pending = {primary}
+        hedge = None
+        errors = []
+        while pending:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            timeout = deadline - now
+            if hedge_at is not None:
+                timeout = min(timeout, max(0.0, hedge_at - now))
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    errors.append(future.exception())
+                    continue
+                won_at = time.monotonic()
+                for loser in pending:
+                    self.abandon(loser, stream, won_at if future is hedge else None)
+                if future is hedge:
+                    with self.lock:
+                        self.counts['hedge_wins'] += 1
+                    self.metrics.increment('gemini_hedge_wins')
+                result = future.result()
+                return stream_from(*result) if stream else result
+            if hedge_at is None or time.monotonic() < hedge_at or not pending:
+                continue
+            hedge_at = None  # hedge at most once
+            if self.may_hedge():
+                hedge = self.executor.submit(self.attempt, tier, prompt, stream, kwargs)
+                pending.add(hedge)
+                with self.lock:
+                    self.counts['hedged'] += 1
+                self.metrics.increment('gemini_hedged')
+                print(f"⏳ Gemini {tier.name} slower than {delay:.1f}s; sending a hedged request")
+
+        if errors and not pending:
+            raise errors[0]
+        for future in pending:
+            self.abandon(future, stream)
+        with self.lock:
+            self.counts['deadline_exceeded'] += 1
+        self.metrics.increment('gemini_deadline_exceeded')
+        raise DeadlineExceeded(f"No Gemini answer within {self.deadline:.0f}s")
+
+    def summary(self):
+        """Gateway counts summed over the tiers, plus tier, hedge and deadline counts"""
+        gateways = [tier.model.summary() for tier in self.tiers if hasattr(tier.model, 'summary')]
+        merged = {key: sum(gateway[key] for gateway in gateways) for key in (gateways[0] if gateways else {})}
+        if gateways:
+            merged['max_queue_depth'] = max(gateway['max_queue_depth'] for gateway in gateways)
+        with self.lock:
+            counts = dict(self.counts)
+            calls = self.calls
+            merged['tiers'] = dict(self.tier_counts)
+        merged.update(counts, calls=calls, hedge_rate=round(counts['hedged'] / calls, 3) if calls else 0.0,
+                      saved_ms=round(counts['saved_seconds'] * 1000, 1))
+        del merged['saved_seconds']
+        return merged
@@ -1,10 +1,16 @@
 # import openai  # Commented out - using Gemini AI instead
 import google.generativeai as genai
 import speech_recognition as sr
-import pyttsx3
 import webbrowser
 import os
+import time
 from dotenv import load_dotenv
+from tts_worker import TTSWorker
+from speech_backends import SpeechRecognizer, create_backends
+from gemini_gateway import GeminiGateway, RateLimited, BUSY_REPLY, UNAVAILABLE_REPLY
+from circuit_breaker import Breakers, CircuitOpen
+from conversation import ConversationContext
+from model_router import ModelRouter, DeadlineExceeded, SLOW_REPLY
 
 # Load environment variables
 load_dotenv()
@@ -12,28 +18,43 @@ load_dotenv()
 # Configure Gemini AI
 genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
 
-# Initialize Gemini model
-model = genai.GenerativeModel('gemini-pro')
+# Services that keep failing are skipped for a while (CIRCUIT_BREAKERS, BREAKER_RESET_TIMEOUT)
+breakers = Breakers.from_env()
 
-# Initialize recognizer
+# Initialize Gemini model behind the shared rate limiter (GEMINI_RPM, GEMINI_MAX_IN_FLIGHT);
+# GEMINI_STRONG_MODEL adds a stronger model for demanding questions, slow requests are hedged
+model = ModelRouter.from_env(
+    lambda name: GeminiGateway.from_env(genai.GenerativeModel(name), breaker=breakers.get('gemini')),
+    os.getenv('GEMINI_MODEL', 'gemini-pro'))
+
+# Follow-up questions see the last few exchanges (CONTEXT_TOKEN_BUDGET, CONTEXT_MAX_TURNS)
+conversation = ConversationContext.from_env()
+
+# Initialize recognizer; SPEECH_BACKENDS=google,vosk falls back to offline recognition
 recognizer = sr.Recognizer()
+speech = SpeechRecognizer(
+    create_backends(os.getenv('SPEECH_BACKENDS', 'google').split(','), recognizer,
+                    os.getenv('SPEECH_LANGUAGE', 'en-US'), os.getenv('VOSK_MODEL', 'vosk-model')),
+    race=os.getenv('SPEECH_RACE', 'false').lower() == 'true',
+    min_confidence=float(os.getenv('SPEECH_MIN_CONFIDENCE', 0.6)),
+    breakers=breakers
+)
+
+# One long-lived speech engine for the whole session
+tts = TTSWorker(name='Jarvis', echo=False).start()
 
 # Function to capture voice input
 def voice_input():
     with sr.Microphone() as source:
         print("Speak something:")
-        try:
-            audio = recognizer.listen(source, timeout=5)
-            print("Recognizing...")
-            text = recognizer.recognize_google(audio)
-            print(f"You said: {text}")
-            return text
-        except sr.UnknownValueError:
-            print("AI: Sorry, I could not understand you.")
-            return None
-        except sr.RequestError:
-            print("AI: Could not request results. Please check your internet connection.")
-            return None
+        audio = recognizer.listen(source, timeout=5)
+    print("Recognizing...")
+    transcript = speech.recognize(audio)
+    if not transcript:
+        print("AI: Sorry, I could not understand you.")
+        return None
+    print(f"You said: {transcript.text}")
+    return transcript.text
 
 # Function to open a web application
 def open_app(app_name):
@@ -51,10 +72,23 @@ def open_directory(directory_path):
 def generate_response(prompt):
     try:
         # Create a more conversational prompt for Gemini
-        full_prompt = f"You are a helpful voice assistant named Jarvis. Respond to the user's request: {prompt}"
+        instructions = f"You are a helpful voice assistant named Jarvis. Respond to the user's request: {prompt}"
+        full_prompt = conversation.prompt(instructions, prompt)
         
-        response = model.generate_content(full_prompt)
-        return response.text.strip()
+        started = time.perf_counter()
+        response = model.generate_content(full_prompt, query=prompt)
+        reply = response.text.strip()
+        conversation.remember(prompt, reply, time.perf_counter() - started)
+        return reply
+    except RateLimited as e:
+        print(f"Gemini rate limited: {e}")
+        return BUSY_REPLY
+    except CircuitOpen as e:
+        print(f"Gemini unavailable: {e}")
+        return UNAVAILABLE_REPLY
+    except DeadlineExceeded as e:
+        print(f"Gemini too slow: {e}")
+        return SLOW_REPLY
     except Exception as e:
         print(f"Error with Gemini AI: {e}")
         return "Sorry, I couldn't process your request."
@@ -62,9 +96,7 @@ def generate_response(prompt):
 
 # Function for text-to-speech
 def speak(text):
-    engine = pyttsx3.init('sapi5')
-    engine.say(text)
-    engine.runAndWait()
+    tts.say(text)
 
 # Main script
 app_list = ['youtube', 'browser', 'hackerrank']
@@ -72,6 +104,8 @@ app_list = ['youtube', 'browser', 'hackerrank']
 while True:
     # Get user input (text or voice)
     user_input = input("You: ")
+    # New input cuts off the previous answer
+    tts.interrupt()
     if len(user_input.strip()) == 0:
         user_input = voice_input()
         if user_input is None:
@@ -80,6 +114,8 @@ while True:
     # Process commands
     if user_input.lower() in ['break', 'exit', 'quit']:
         print("AI: Goodbye!")
+        speech.report()
+        tts.shutdown()
         break
 
     if any(app in user_input.lower() for app in app_list):
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Ambient noise calibration
+Features: Per-device energy thresholds saved between sessions, and a running
+noise-floor estimate over captured audio that keeps refining the threshold
+without a blocking calibration step
+"""
+
+import os
+import json
+import time
+import wave
+import threading
+
+import numpy as np
+
+# Starting threshold for a microphone never seen before (speech_recognition's own default); high
+# enough that room noise is not taken for speech while captured audio pulls it to the real level
+DEFAULT_THRESHOLD = 300.0
+
+
+def device_key(microphone):
+    """Stable name for the input device a speech_recognition Microphone uses"""
+    index = getattr(microphone, 'device_index', None)
+    name = 'default'
+    if index is not None:
+        try:
+            name = f"{index}:{microphone.list_microphone_names()[index]}"
+        except Exception:
+            name = str(index)
+    return f"{name}@{getattr(microphone, 'SAMPLE_RATE', 0)}"
+
+
+def frame_energies(data, sample_rate, sample_width=2, frame_ms=20):
+    """RMS energy of each frame, in the same units as Recognizer.energy_threshold"""
+    if sample_width != 2:
+        raise ValueError("Only 16-bit audio is supported")
+    samples = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+    frame_length = max(1, sample_rate * frame_ms // 1000)
+    count = len(samples) // frame_length
+    if not count:
+        return np.empty(0, dtype=np.float32)
+    frames = samples[:count * frame_length].reshape(count, frame_length)
+    return np.sqrt((frames ** 2).mean(axis=1))
+
+
+class NoiseFloorEstimator:
+    """Running noise-floor statistic over recent frames
+
+    The floor is a low percentile of the frame energies in a sliding window, so
+    speech (loud, intermittent) barely moves it while a change of room or a fan
+    switching on is picked up within a few seconds. The speech threshold is the
+    floor times a margin, eased toward its target so it does not jump around.
+    """
+
+    def __init__(self, sample_rate, sample_width=2, initial_threshold=None, window_seconds=8.0,
+                 percentile=20, ratio=2.5, min_threshold=50.0, smoothing=0.2, frame_ms=20):
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.frame_ms = frame_ms
+        self.percentile = percentile
+        self.ratio = ratio
+        self.min_threshold = min_threshold
+        self.smoothing = smoothing
+        self.lock = threading.Lock()
+
+        # Preallocated circular window of frame energies
+        self.window = np.zeros(max(1, int(window_seconds * 1000 / frame_ms)), dtype=np.float32)
+        self.position = 0
+        self.filled = 0
+        self.frames_seen = 0
+        self.noise_floor = initial_threshold / ratio if initial_threshold else None
+        self.threshold = initial_threshold
+
+    def update(self, data):
+        """Feed raw 16-bit audio; returns the current threshold (None until there is any data)"""
+        energies = frame_energies(data, self.sample_rate, self.sample_width, self.frame_ms)
+        if not len(energies):
+            return self.threshold
+
+        with self.lock:
+            energies = energies[-len(self.window):]
+            end = self.position + len(energies)
+            if end <= len(self.window):
+                self.window[self.position:end] = energies
+            else:
+                split = len(self.window) - self.position
+                self.window[self.position:] = energies[:split]
+                self.window[:end - len(self.window)] = energies[split:]
+            self.position = end % len(self.window)
+            self.filled = min(len(self.window), self.filled + len(energies))
+            self.frames_seen += len(energies)
+
+            floor = float(np.percentile(self.window[:self.filled], self.percentile))
+            target = max(self.min_threshold, floor * self.ratio)
+            if self.threshold is None:
+                self.threshold = target
+            else:
+                self.threshold += self.smoothing * (target - self.threshold)
+            self.noise_floor = floor
+            return self.threshold
+
+
+class CalibrationStore:
+    """Energy thresholds per input device, kept in a small JSON file"""
+
+    def __init__(self, path='mic_calibration.json'):
+        self.path = path
+        self.lock = threading.Lock()
+        self.devices = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self.devices = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"✗ Ignoring unreadable calibration file {path}: {e}")
+
+    def load(self, device):
+        """Saved threshold for a device, or None"""
+        entry = self.devices.get(device)
+        return entry['threshold'] if entry else None
+
+    def save(self, device, threshold, noise_floor=None):
+        """Record a device's threshold and write the file"""
+        with self.lock:
+            self.devices[device] = {
+                'threshold': round(float(threshold), 1),
+                'noise_floor': round(float(noise_floor), 1) if noise_floor is not None else None,
+                'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+            }
+            temporary = f"{self.path}.tmp"
+            with open(temporary, 'w', encoding='utf-8') as f:
+                json.dump(self.devices, f, indent=2)
+            os.replace(temporary, self.path)
+
+
+class AmbientCalibration:
+    """A device's threshold: loaded at startup, refined from captured audio, saved back now and then"""
+
+    def __init__(self, store, device, sample_rate, sample_width=2, save_interval=60,
+                 default_threshold=DEFAULT_THRESHOLD):
+        self.store = store
+        self.device = device
+        self.save_interval = save_interval
+        saved = store.load(device)
+        self.loaded = saved is not None
+        # A new device starts from the default and converges from the audio captured anyway
+        self.estimator = NoiseFloorEstimator(sample_rate, sample_width,
+                                             initial_threshold=saved if self.loaded else default_threshold)
+        self.saved_at = time.monotonic()
+
+    @property
+    def threshold(self):
+        """Current speech threshold"""
+        return self.estimator.threshold
+
+    def observe(self, data):
+        """Feed captured audio; returns the refined threshold"""
+        threshold = self.estimator.update(data)
+        if time.monotonic() - self.saved_at >= self.save_interval:
+            self.save()
+        return threshold
+
+    def save(self):
+        if self.estimator.threshold is None:
+            return
+        try:
+            self.store.save(self.device, self.estimator.threshold, self.estimator.noise_floor)
+        except OSError as e:
+            print(f"✗ Error saving microphone calibration: {e}")
+        self.saved_at = time.monotonic()
+
+
+def read_wav(path):
+    """Return (frames, sample_rate, sample_width) of a mono 16-bit WAV file"""
+    with wave.open(path, 'rb') as f:
+        if f.getnchannels() != 1 or f.getsampwidth() != 2:
+            raise ValueError(f"{path}: expected mono 16-bit audio")
+        return f.readframes(f.getnframes()), f.getframerate(), f.getsampwidth()
+
+
+def estimate_from_wav(path, chunk_size=1024, **options):
+    """Run a WAV file through a fresh estimator in microphone-sized chunks
+
+    Returns (estimator, thresholds after each chunk).
+    """
+    data, sample_rate, sample_width = read_wav(path)
+    estimator = NoiseFloorEstimator(sample_rate, sample_width, **options)
+    step = chunk_size * sample_width
+    history = [estimator.update(data[start:start + step]) for start in range(0, len(data), step)]
+    return estimator, history
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Pre-rendered speech for frequently used phrases
+Features: Renders fixed and templated phrases to WAV once per voice/rate/volume,
+keeps them on disk, plays them asynchronously so playback can be stopped
+"""
+
+import wave
+import shutil
+import hashlib
+import threading
+from pathlib import Path
+
+try:
+    import winsound  # Windows only, like the SAPI5 engine that renders the audio
+except ImportError:
+    winsound = None
+
+
+def expand_templates(templates):
+    """Fill each "{name}" template with every listed value, e.g. "Opening {site}" for each site"""
+    phrases = []
+    for template, options in templates.items():
+        field = template[template.index('{') + 1:template.index('}')]
+        phrases += [template.format(**{field: option}) for option in options]
+    return phrases
+
+
+class PhraseCache:
+    """Audio buffers for phrases the assistant says over and over"""
+
+    def __init__(self, cache_dir='tts_cache'):
+        self.cache_dir = Path(cache_dir)
+        self.profile_dir = None
+        self.phrases = set()
+        self.durations = {}  # phrase -> seconds of audio, read from the WAV header once
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'renders': 0}
+
+    @property
+    def available(self):
+        """Cached playback needs winsound"""
+        return winsound is not None
+
+    def add(self, phrases):
+        """Register phrases worth caching; returns the ones not yet rendered"""
+        with self.lock:
+            self.phrases.update(phrases)
+        return [phrase for phrase in phrases if not self.is_rendered(phrase)]
+
+    def registered(self):
+        """Snapshot of every registered phrase"""
+        with self.lock:
+            return list(self.phrases)
+
+    def set_profile(self, voice_id, rate, volume):
+        """Switch to the renders for a voice/rate/volume combination
+
+        Renders for any other combination are deleted. Returns True when the
+        profile changed and the registered phrases need rendering again.
+        """
+        digest = hashlib.sha1(f"{voice_id}|{rate}|{volume}".encode('utf-8')).hexdigest()[:12]
+        profile_dir = self.cache_dir / digest
+        if profile_dir == self.profile_dir:
+            return False
+
+        with self.lock:
+            self.profile_dir = profile_dir
+            self.durations.clear()
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        for stale in self.cache_dir.iterdir():
+            if stale.is_dir() and stale != profile_dir:
+                shutil.rmtree(stale, ignore_errors=True)
+        return True
+
+    def path_for(self, phrase):
+        """WAV file for a phrase in the current profile"""
+        name = hashlib.sha1(phrase.encode('utf-8')).hexdigest()[:16]
+        return self.profile_dir / f"{name}.wav"
+
+    def is_rendered(self, phrase):
+        """True when the phrase has a WAV file for the current profile"""
+        return self.profile_dir is not None and self.path_for(phrase).exists()
+
+    def render(self, engine, phrase):
+        """Render a phrase to disk with an engine already configured for the current profile"""
+        if self.profile_dir is None or self.is_rendered(phrase):
+            return
+        path = self.path_for(phrase)
+        engine.save_to_file(phrase, str(path))
+        engine.runAndWait()
+        self.stats['renders'] += 1
+
+    def get(self, phrase):
+        """Return (WAV path, seconds) for a registered phrase, or None"""
+        if not self.available or phrase not in self.phrases or self.profile_dir is None:
+            return None
+
+        path = self.path_for(phrase)
+        with self.lock:
+            seconds = self.durations.get(phrase)
+        if seconds is None:
+            if not path.exists():
+                self.stats['misses'] += 1
+                return None
+            with wave.open(str(path), 'rb') as f:
+                seconds = f.getnframes() / float(f.getframerate())
+            with self.lock:
+                self.durations[phrase] = seconds
+
+        self.stats['hits'] += 1
+        return path, seconds
+
+    def play(self, cached):
+        """Start playing a cached phrase and return its length in seconds without waiting for it"""
+        path, seconds = cached
+        # winsound cannot play an in-memory buffer asynchronously, so the file is played
+        winsound.PlaySound(str(path), winsound.SND_FILENAME | winsound.SND_ASYNC | winsound.SND_NODEFAULT)
+        return seconds
+
+    def stop(self):
+        """Stop a phrase that is still playing"""
+        winsound.PlaySound(None, winsound.SND_PURGE)
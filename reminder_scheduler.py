@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+One-shot reminder scheduler
+Features: Min-heap of pending reminders, one thread that sleeps until the
+next one is due (no polling), pending reminders reloaded from the database
+at startup through an index, fired reminders marked completed, long-missed
+reminders announced together
+"""
+
+import os
+import time
+import heapq
+import datetime
+import threading
+
+from metrics import Metrics
+
+# Longest single sleep, so a changed system clock is noticed within the hour
+MAX_SLEEP = 3600.0
+
+
+class ReminderScheduler:
+    """Fire each pending reminder once, at its time, by calling alert(reminder_id, title, description, late)
+
+    `late` is how many seconds after its time a reminder fired, e.g. one that
+    was due while the assistant was not running. Reminders more than
+    missed_horizon seconds late are passed together to missed(reminders), a
+    list of (reminder_id, title, description, late), so a long absence is one
+    announcement rather than one per reminder. A reminder whose alert raises
+    is not marked completed and is announced again at the next start.
+    """
+
+    def __init__(self, alert, storage, metrics=None, missed=None, missed_horizon=3600.0):
+        self.alert = alert
+        self.missed = missed
+        self.missed_horizon = missed_horizon
+        self.metrics = metrics or Metrics(enabled=False)
+        self.heap = []  # (due timestamp, reminder id, title, description)
+        self.condition = threading.Condition()
+        self.running = False
+        self.thread = None
+        self.stats = {'loaded': 0, 'scheduled': 0, 'fired': 0, 'failed': 0, 'wakeups': 0}
+        self.storage = storage
+
+    @classmethod
+    def from_env(cls, alert, storage, metrics=None, missed=None):
+        return cls(alert, storage, metrics, missed,
+                   missed_horizon=float(os.getenv('REMINDER_MISSED_HORIZON', 3600)))
+
+    def load(self):
+        """Queue every reminder not completed yet; returns how many"""
+        rows = self.storage.query(
+            "SELECT id, title, description, datetime FROM reminders WHERE completed = 0 ORDER BY datetime")
+        entries = [(datetime.datetime.fromisoformat(when).timestamp(), reminder_id, title, description or '')
+                   for reminder_id, title, description, when in rows]
+        with self.condition:
+            self.heap.extend(entries)
+            heapq.heapify(self.heap)
+            self.stats['loaded'] += len(entries)
+            self.condition.notify()
+        self.metrics.gauge('reminders_pending', self.pending())
+        return len(entries)
+
+    def add(self, reminder_id, title, description, when):
+        """Queue a stored reminder for `when` (a datetime)"""
+        with self.condition:
+            heapq.heappush(self.heap, (when.timestamp(), reminder_id, title, description or ''))
+            self.stats['scheduled'] += 1
+            # Only a new earliest reminder changes how long the thread should sleep
+            if self.heap[0][1] == reminder_id:
+                self.condition.notify()
+            pending = len(self.heap)
+        self.metrics.gauge('reminders_pending', pending)
+
+    def pending(self):
+        with self.condition:
+            return len(self.heap)
+
+    def next_due(self):
+        """Timestamp of the next reminder, or None"""
+        with self.condition:
+            return self.heap[0][0] if self.heap else None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name='reminders', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        if self.thread:
+            self.thread.join(timeout=5)
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.running:
+                    now = time.time()
+                    if self.heap and self.heap[0][0] <= now:
+                        break
+                    timeout = min(self.heap[0][0] - now, MAX_SLEEP) if self.heap else None
+                    self.condition.wait(timeout)
+                    self.stats['wakeups'] += 1
+                if not self.running:
+                    return
+                due = []
+                while self.heap and self.heap[0][0] <= now:
+                    due.append(heapq.heappop(self.heap))
+            self.fire(due, now)
+
+    def fire(self, due, now):
+        """Alert the due reminders, then mark the ones announced completed in one write"""
+        reminders = [(reminder_id, title, description, now - when) for when, reminder_id, title, description in due]
+        done = []
+        if self.missed:
+            missed = [reminder for reminder in reminders if reminder[3] > self.missed_horizon]
+            reminders = [reminder for reminder in reminders if reminder[3] <= self.missed_horizon]
+            if missed:
+                try:
+                    self.missed(missed)
+                    done += missed
+                except Exception as e:
+                    print(f"✗ Missed reminders alert failed: {e}")
+        for reminder in reminders:
+            try:
+                self.alert(*reminder)
+                done.append(reminder)
+            except Exception as e:
+                print(f"✗ Reminder {reminder[0]} alert failed: {e}")
+        if done:
+            try:
+                self.storage.execute_many("UPDATE reminders SET completed = 1 WHERE id = ?",
+                                          [(reminder[0],) for reminder in done])
+            except Exception as e:
+                print(f"✗ Error completing reminders: {e}")
+        with self.condition:
+            self.stats['fired'] += len(done)
+            self.stats['failed'] += len(due) - len(done)
+            pending = len(self.heap)
+        self.metrics.increment('reminders_fired', len(done))
+        self.metrics.gauge('reminders_pending', pending)
+
+    def summary(self):
+        """Loaded, scheduled, fired, failed and pending reminders, and how often the thread woke up"""
+        with self.condition:
+            return dict(self.stats, pending=len(self.heap))
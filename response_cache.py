@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Persistent cache for Gemini replies
+Features: In-memory LRU tier in front of a SQLite table, per-entry TTL,
+size-bounded eviction, hit/miss counters
+"""
+
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Replies to prompts about "now" go stale quickly
+VOLATILE_WORDS = re.compile(r'\b(today|tonight|now|current|currently|latest|recent|this week|yesterday|tomorrow)\b')
+
+
+def normalize_prompt(prompt):
+    """Lowercase, drop punctuation and collapse whitespace so trivial variations share an entry"""
+    prompt = re.sub(r"[^\w\s']", ' ', prompt.lower())
+    return ' '.join(prompt.split())
+
+
+class ResponseCache:
+    """Two-tier cache of AI replies keyed by prompt, model and context"""
+
+    def __init__(self, storage, memory_size=128, max_entries=5000, ttl=24 * 3600, volatile_ttl=600):
+        """storage: the assistant's Storage, which owns the llm_cache table and writes to it"""
+        self.storage = storage
+        self.memory_size = memory_size
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.volatile_ttl = volatile_ttl
+        self.memory = OrderedDict()  # key -> (response, expires_at)
+        self.lock = threading.Lock()
+        self.puts_since_prune = 0
+        self.stats = {'memory_hits': 0, 'db_hits': 0, 'misses': 0, 'evictions': 0}
+        self.prune()
+
+    def make_key(self, prompt, model, context=''):
+        """Hash the normalized prompt, model name and context fragment"""
+        raw = '\x1f'.join([normalize_prompt(prompt), model or '', context or ''])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def ttl_for(self, prompt):
+        """Pick a shorter lifetime for time-sensitive questions"""
+        return self.volatile_ttl if VOLATILE_WORDS.search(prompt.lower()) else self.ttl
+
+    def get(self, prompt, model, context=''):
+        """Return a cached reply or None"""
+        key = self.make_key(prompt, model, context)
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry and entry[1] > now:
+                self.memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return entry[0]
+
+        row = self.storage.query_one(
+            "SELECT response, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?", (key, now))
+        with self.lock:
+            if not row:
+                self.memory.pop(key, None)
+                self.stats['misses'] += 1
+                return None
+            self.remember(key, row[0], row[1])
+            self.stats['db_hits'] += 1
+        # Only feeds eviction order, so the lookup does not wait for the commit
+        self.storage.submit("UPDATE llm_cache SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+        return row[0]
+
+    def put(self, prompt, model, response, context='', ttl=None):
+        """Store a reply in both tiers"""
+        key = self.make_key(prompt, model, context)
+        now = time.time()
+        expires_at = now + (ttl if ttl is not None else self.ttl_for(prompt))
+        # The memory tier answers repeats until the writer thread has committed the row
+        self.storage.submit(
+            "INSERT OR REPLACE INTO llm_cache (key, prompt, model, response, created_at, expires_at, last_used) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (key, normalize_prompt(prompt), model or '', response, now, expires_at, now)
+        )
+        with self.lock:
+            self.remember(key, response, expires_at)
+            self.puts_since_prune += 1
+            prune = self.puts_since_prune >= 50
+        if prune:
+            self.prune()
+
+    def remember(self, key, response, expires_at):
+        """Add to the in-memory LRU tier, evicting the least recently used entry"""
+        self.memory[key] = (response, expires_at)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def prune(self):
+        """Drop expired rows and trim the table to max_entries"""
+        now = time.time()
+        with self.lock:
+            self.puts_since_prune = 0
+        expired, total = self.storage.query_one(
+            "SELECT COALESCE(SUM(expires_at <= ?), 0), COUNT(*) FROM llm_cache", (now,))
+        self.storage.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+        self.storage.execute(
+            "DELETE FROM llm_cache WHERE key IN ("
+            "SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+        with self.lock:
+            self.stats['evictions'] += expired + max(total - expired - self.max_entries, 0)
+
+    def clear(self):
+        """Remove every cached reply"""
+        with self.lock:
+            self.memory.clear()
+        self.storage.execute("DELETE FROM llm_cache")
+
+    def summary(self):
+        """Return counters plus the overall hit rate"""
+        hits = self.stats['memory_hits'] + self.stats['db_hits']
+        lookups = hits + self.stats['misses']
+        return dict(self.stats, hit_rate=round(hits / lookups, 3) if lookups else 0.0,
+                    memory_entries=len(self.memory))
@@ -0,0 +1,760 @@
+#!/usr/bin/env python3
+"""
+Multi-session server mode for the assistants
+Features: asyncio HTTP and WebSocket endpoints (standard library only), text or
+WAV audio per session, per-session command history, start time and
+preferences on top of one shared assistant (Gemini client, database, HTTP
+pool, caches), replies streamed sentence by sentence with synthesized audio
+"""
+
+import os
+import io
+import json
+import time
+import uuid
+import wave
+import base64
+import queue
+import struct
+import asyncio
+import hashlib
+import argparse
+import datetime
+import tempfile
+import threading
+from urllib.parse import urlsplit, parse_qsl
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import speech_recognition as sr
+
+from metrics import Metrics
+from speech_streaming import StreamingSpeaker
+
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC11B85'
+CONTINUATION, TEXT, BINARY, CLOSE, PING, PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+MAX_MESSAGE = 10 * 1024 * 1024  # largest request body or WebSocket message (about 5 minutes of 16 kHz audio)
+
+# Intents that act on the host machine or prompt on its keyboard; remote sessions may not run them
+HOST_INTENTS = {'open', 'search', 'play', 'screenshot', 'shutdown', 'restart', 'qr_code', 'email', 'preference'}
+PROMPTING_INTENTS = {'reminder', 'note'}  # allowed only for listing
+
+STATUS_TEXT = {200: 'OK', 201: 'Created', 400: 'Bad Request', 401: 'Unauthorized', 404: 'Not Found',
+               405: 'Method Not Allowed', 413: 'Payload Too Large', 503: 'Service Unavailable'}
+
+
+class Request:
+    """One parsed HTTP/1.1 request"""
+
+    def __init__(self, method, path, query, headers, body):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body.decode('utf-8')) if self.body else {}
+
+
+async def read_request(reader):
+    """Parse the request line, headers and body; None when the client closed the connection"""
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    method, target, _ = line.decode('latin-1').split(' ', 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', 0))
+    if length > MAX_MESSAGE:
+        raise OverflowError(f"Request body of {length} bytes is too large")
+    body = await reader.readexactly(length) if length else b''
+    url = urlsplit(target)
+    return Request(method.upper(), url.path, dict(parse_qsl(url.query)), headers, body)
+
+
+def http_response(status, body=b'', content_type='application/json'):
+    if isinstance(body, (dict, list)):
+        body = json.dumps(body)
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n")
+    return head.encode('latin-1') + body
+
+
+def accept_key(key):
+    """Sec-WebSocket-Accept value for a client's Sec-WebSocket-Key"""
+    return base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode('ascii')).digest()).decode('ascii')
+
+
+def apply_mask(payload, mask):
+    """XOR a frame payload with its 4-byte mask, a whole integer at a time instead of byte by byte"""
+    repeated = (mask * (len(payload) // 4 + 1))[:len(payload)]
+    return (int.from_bytes(payload, 'little') ^ int.from_bytes(repeated, 'little')).to_bytes(len(payload), 'little')
+
+
+def encode_frame(opcode, payload, mask=False):
+    header = bytearray([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    length = len(payload)
+    if length < 126:
+        header.append(mask_bit | length)
+    elif length < 65536:
+        header.append(mask_bit | 126)
+        header += struct.pack('!H', length)
+    else:
+        header.append(mask_bit | 127)
+        header += struct.pack('!Q', length)
+    if mask:
+        key = os.urandom(4)
+        header += key
+        payload = apply_mask(payload, key)
+    return bytes(header) + payload
+
+
+class WebSocket:
+    """Minimal RFC 6455 connection over asyncio streams; clients mask the frames they send"""
+
+    def __init__(self, reader, writer, client=False, max_size=MAX_MESSAGE):
+        self.reader = reader
+        self.writer = writer
+        self.client = client
+        self.max_size = max_size
+        self.closed = False
+        self.lock = asyncio.Lock()
+
+    async def read_frame(self):
+        first, second = await self.reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            length, = struct.unpack('!H', await self.reader.readexactly(2))
+        elif length == 127:
+            length, = struct.unpack('!Q', await self.reader.readexactly(8))
+        if length > self.max_size:
+            raise OverflowError(f"WebSocket frame of {length} bytes is too large")
+        mask = await self.reader.readexactly(4) if second & 0x80 else None
+        payload = await self.reader.readexactly(length)
+        if mask:
+            payload = apply_mask(payload, mask)
+        return bool(first & 0x80), first & 0x0F, payload
+
+    async def receive(self):
+        """Next text (str) or binary (bytes) message, answering pings; None once the connection is closed"""
+        parts = []
+        kind = None
+        try:
+            while not self.closed:
+                final, opcode, payload = await self.read_frame()
+                if opcode == PING:
+                    await self.send_frame(PONG, payload)
+                    continue
+                if opcode == PONG:
+                    continue
+                if opcode == CLOSE:
+                    await self.close(payload[:2])
+                    return None
+                if opcode != CONTINUATION:
+                    kind = opcode
+                    parts = []
+                parts.append(payload)
+                if sum(len(part) for part in parts) > self.max_size:
+                    raise OverflowError("WebSocket message is too large")
+                if final:
+                    data = b''.join(parts)
+                    return data.decode('utf-8') if kind == TEXT else data
+        except (asyncio.IncompleteReadError, ConnectionError):
+            self.closed = True
+        return None
+
+    async def send_frame(self, opcode, payload):
+        if self.closed:
+            return
+        async with self.lock:
+            self.writer.write(encode_frame(opcode, payload, mask=self.client))
+            await self.writer.drain()
+
+    async def send(self, message):
+        if isinstance(message, str):
+            await self.send_frame(TEXT, message.encode('utf-8'))
+        else:
+            await self.send_frame(BINARY, message)
+
+    async def send_json(self, data):
+        await self.send(json.dumps(data))
+
+    async def close(self, code=b'\x03\xe8'):
+        """Send a close frame (1000 by default) once"""
+        if self.closed:
+            return
+        try:
+            await self.send_frame(CLOSE, code)
+        except ConnectionError:
+            pass
+        self.closed = True
+
+
+async def connect(host, port, path='/ws', token=None):
+    """Open a client WebSocket to the server, e.g. for a device or the load test"""
+    reader, writer = await asyncio.open_connection(host, port, limit=MAX_MESSAGE)
+    key = base64.b64encode(os.urandom(16)).decode('ascii')
+    authorization = f"Authorization: Bearer {token}\r\n" if token else ""
+    writer.write((f"GET {path} HTTP/1.1\r\nHost: {host}:{port}\r\nUpgrade: websocket\r\n"
+                  f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n"
+                  f"{authorization}\r\n").encode('latin-1'))
+    await writer.drain()
+    status = await reader.readline()
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    if b' 101 ' not in status or headers.get('sec-websocket-accept') != accept_key(key):
+        writer.close()
+        raise ConnectionError(f"WebSocket handshake failed: {status.decode('latin-1').strip()}")
+    return WebSocket(reader, writer, client=True)
+
+
+def audio_from_wav(data):
+    """AudioData for an uploaded WAV file"""
+    with wave.open(io.BytesIO(data), 'rb') as f:
+        frames = f.readframes(f.getnframes())
+        audio = sr.AudioData(frames, f.getframerate(), f.getsampwidth())
+        if f.getnchannels() > 1:
+            raise ValueError("Audio must be mono")
+    return audio
+
+
+class SpeechSynthesizer:
+    """Render reply text to WAV bytes with one engine on its own thread
+
+    pyttsx3 hands out one engine per process and it is not thread-safe, so every
+    session's audio is rendered here in turn.
+    """
+
+    def __init__(self, rate=200, volume=0.9, metrics=None, engine_factory=None):
+        self.rate = rate
+        self.volume = volume
+        self.metrics = metrics or Metrics(enabled=False)
+        self.engine_factory = engine_factory
+        self.requests = queue.Queue()
+        self.ready = threading.Event()
+        self.available = False
+        self.thread = threading.Thread(target=self.run, name='synthesizer', daemon=True)
+
+    def start(self, timeout=10):
+        self.thread.start()
+        self.ready.wait(timeout)
+        return self
+
+    def create_engine(self):
+        if self.engine_factory:
+            return self.engine_factory()
+        import pyttsx3
+        return pyttsx3.init()
+
+    def run(self):
+        try:
+            engine = self.create_engine()
+            engine.setProperty('rate', self.rate)
+            engine.setProperty('volume', self.volume)
+            self.available = True
+            print("✓ Speech synthesis ready")
+        except Exception as e:
+            print(f"✗ Speech synthesis unavailable, replying with text only: {e}")
+        self.ready.set()
+
+        directory = tempfile.mkdtemp(prefix='assistant_tts_')
+        path = os.path.join(directory, 'reply.wav')
+        while True:
+            item = self.requests.get()
+            if item is None:
+                break
+            text, future = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            if not self.available:
+                future.set_result(None)
+                continue
+            try:
+                with self.metrics.span('synthesis'):
+                    engine.save_to_file(text, path)
+                    engine.runAndWait()
+                    with open(path, 'rb') as f:
+                        future.set_result(f.read())
+            except Exception as e:
+                future.set_exception(e)
+        try:
+            os.remove(path)
+            os.rmdir(directory)
+        except OSError:
+            pass
+
+    def synthesize(self, text):
+        """Future for the WAV bytes of text (None when no engine is available)"""
+        future = Future()
+        if self.ready.is_set() and not self.available:
+            future.set_result(None)
+        else:
+            self.requests.put((text, future))
+        return future
+
+    def shutdown(self):
+        self.requests.put(None)
+        if self.thread.is_alive():
+            self.thread.join(5)
+
+
+def server_assistant(assistant_class):
+    """Subclass of an assistant class that serves sessions instead of a local speaker and microphone"""
+
+    class ServerAssistant(assistant_class):
+        def setup_voice(self):
+            self.tts = None  # replies are synthesized per session by the server
+
+        def setup_speech_recognition(self):
+            self.calibration = None
+            self.mic_stream = None
+            self.wake_word = None
+            self.speech = None
+            try:
+                self.recognizer = sr.Recognizer()
+                self.setup_speech_backends()
+            except Exception as e:
+                print(f"✗ Error initializing speech recognition: {e}")
+                self.recognizer = None
+
+        def speak(self, text, urgent=False, on_start=None):
+            # Only reached outside a session, e.g. by background reminders
+            print(f"🔊 {text}")
+
+    ServerAssistant.__name__ = f"Server{assistant_class.__name__}"
+    return ServerAssistant
+
+
+def session_class(assistant_class):
+    """Subclass whose instances share the assistant's connections without owning them"""
+
+    class SessionAssistant(assistant_class):
+        def __del__(self):
+            pass  # the shared assistant closes the database and HTTP connections
+
+    SessionAssistant.__name__ = f"Session{assistant_class.__name__}"
+    return SessionAssistant
+
+
+class Session:
+    """One user or device: its own history, conversation, start time, preferences and reply channel
+
+    The assistant seen by a session is a shallow copy of the shared one, taken
+    once its startup has finished, so the Gemini client, database connection,
+    HTTP pool and caches are shared while per-conversation attributes and the
+    intent handlers are replaced.
+    """
+
+    def __init__(self, shared, view_class, session_id=None, preferences=None):
+        self.id = session_id or uuid.uuid4().hex
+        self.lock = threading.Lock()  # one command at a time per session
+        self.created = time.time()
+        self.last_used = time.monotonic()
+        self.commands = 0
+        self.replies = None
+
+        view = view_class.__new__(view_class)
+        view.__dict__.update(shared.__dict__)
+        view.command_history = []
+        view.conversation = shared.conversation.fork()
+        view.start_time = datetime.datetime.now()
+        view.pipeline = None
+        view.user_preferences = dict(getattr(shared, 'user_preferences', {}), **(preferences or {}))
+        view.speak = self.say
+        view.streaming_speaker = StreamingSpeaker(self.say)
+        view.intent_handlers = view.intent_handler_table()
+        self.assistant = view
+        self.process = getattr(view, 'process_enhanced_command', None) or view.process_command
+
+    def say(self, text, urgent=False, on_start=None):
+        # on_start is not called: the audio is synthesized later and its arrival is timed by the client
+        replies = self.replies
+        if replies:
+            replies(text)
+
+    def allowed(self, command):
+        """False for commands that would act on the host machine or prompt on its keyboard"""
+        command = command.lower().strip()
+        match = self.assistant.router.route(command) or self.assistant.classify_intent(command)
+        if not match:
+            return True
+        if match.name in PROMPTING_INTENTS:
+            return match.slots.get('action') == 'list'
+        return match.name not in HOST_INTENTS
+
+    def run(self, command, replies):
+        """Process one command, passing each spoken reply to replies(text); returns False to end the session"""
+        with self.lock:
+            self.last_used = time.monotonic()
+            self.commands += 1
+            self.replies = replies
+            try:
+                if not self.allowed(command):
+                    self.say("That command only works on the assistant's own computer.")
+                    return True
+                return self.process(command)
+            except Exception as e:
+                print(f"❌ Session {self.id[:8]} error: {e}")
+                self.say("I encountered an unexpected error. Please try again.")
+                return True
+            finally:
+                self.replies = None
+                self.last_used = time.monotonic()
+
+    def describe(self):
+        return {
+            'session': self.id,
+            'commands': self.commands,
+            'history': list(self.assistant.command_history[-10:]),
+            'started': self.assistant.start_time.isoformat(timespec='seconds'),
+            'preferences': self.assistant.user_preferences,
+        }
+
+
+class AssistantServer:
+    """Serve one shared assistant to many sessions over HTTP and WebSocket
+
+    Endpoints:
+      GET    /health                      status, session count and services whose breaker is open
+      GET    /metrics                     latency histograms (Prometheus text)
+      POST   /sessions                    new session; optional {"preferences": {...}}
+      GET    /sessions/<id>               history, start time and preferences
+      DELETE /sessions/<id>               end a session
+      POST   /sessions/<id>/command       {"text": ...} or a WAV body; ?audio=true adds base64 WAV replies
+      GET    /ws[?session=<id>&audio=false]  WebSocket: send text or JSON {"text": ...} or binary WAV;
+                                          receive "reply" messages, each followed by a WAV frame when
+                                          audio is on, then "done"
+    """
+
+    def __init__(self, assistant, synthesizer=None, workers=8, session_ttl=1800, max_sessions=100, token=None):
+        self.assistant = assistant
+        self.synthesizer = synthesizer
+        self.session_ttl = session_ttl
+        self.max_sessions = max_sessions
+        self.token = token
+        self.sessions = {}
+        self.view_class = session_class(type(assistant))
+        # Commands block on Gemini, the database and HTTP lookups, so they run on worker threads
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='session')
+        self.server = None
+
+    @classmethod
+    def from_env(cls, assistant, synthesizer=None):
+        return cls(
+            assistant, synthesizer,
+            workers=int(os.getenv('SERVER_WORKERS', 8)),
+            session_ttl=float(os.getenv('SERVER_SESSION_TTL', 1800)),
+            max_sessions=int(os.getenv('SERVER_MAX_SESSIONS', 100)),
+            token=os.getenv('SERVER_TOKEN') or None
+        )
+
+    def expire_sessions(self):
+        cutoff = time.monotonic() - self.session_ttl
+        for session_id, session in list(self.sessions.items()):
+            if session.last_used < cutoff and not session.lock.locked():
+                del self.sessions[session_id]
+
+    def create_session(self, session_id=None, preferences=None):
+        """New session, or None when the server is full"""
+        self.expire_sessions()
+        if len(self.sessions) >= self.max_sessions:
+            return None
+        session = Session(self.assistant, self.view_class, session_id, preferences)
+        self.sessions[session.id] = session
+        return session
+
+    def authorized(self, request):
+        if not self.token:
+            return True
+        header = request.headers.get('authorization', '')
+        return header == f"Bearer {self.token}" or request.query.get('token') == self.token
+
+    async def execute(self, session, command, on_reply):
+        """Run a command on a worker thread, awaiting on_reply(text) for each reply as it is spoken
+
+        Returns False when the command ended the session.
+        """
+        loop = asyncio.get_running_loop()
+        replies = asyncio.Queue()
+        task = loop.run_in_executor(self.executor, session.run, command,
+                                    lambda text: loop.call_soon_threadsafe(replies.put_nowait, text))
+        while True:
+            getter = asyncio.ensure_future(replies.get())
+            done, _ = await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if getter in done:
+                await on_reply(getter.result())
+                continue
+            getter.cancel()
+            break
+        while not replies.empty():
+            await on_reply(replies.get_nowait())
+        return task.result()
+
+    async def recognize(self, data):
+        """Text for an uploaded WAV utterance, or None"""
+        if not getattr(self.assistant, 'speech', None):
+            return None
+        audio = audio_from_wav(data)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.assistant.recognize_audio, audio)
+
+    async def synthesize(self, text):
+        if not self.synthesizer:
+            return None
+        return await asyncio.wrap_future(self.synthesizer.synthesize(text))
+
+    async def handle_connection(self, reader, writer):
+        try:
+            request = await read_request(reader)
+            if request is None:
+                return
+            if not self.authorized(request):
+                writer.write(http_response(401, {'error': 'unauthorized'}))
+            elif request.headers.get('upgrade', '').lower() == 'websocket':
+                await self.handle_websocket(request, reader, writer)
+            else:
+                status, body, content_type = await self.route(request)
+                writer.write(http_response(status, body, content_type))
+            await writer.drain()
+        except OverflowError as e:
+            writer.write(http_response(413, {'error': str(e)}))
+        except (ValueError, KeyError, wave.Error) as e:
+            writer.write(http_response(400, {'error': str(e)}))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            try:
+                await writer.drain()
+                writer.close()
+            except ConnectionError:
+                pass
+
+    async def route(self, request):
+        """(status, body, content type) for a plain HTTP request"""
+        parts = [part for part in request.path.split('/') if part]
+        if parts == ['health']:
+            down = sorted(name for name, breaker in self.assistant.breakers.summary().items()
+                          if breaker['state'] != 'closed')
+            return 200, {'status': 'degraded' if down else 'ok', 'sessions': len(self.sessions),
+                         'unavailable': down}, 'application/json'
+        if parts == ['metrics']:
+            return 200, self.assistant.metrics.prometheus_text(), 'text/plain; version=0.0.4'
+        if parts == ['sessions'] and request.method == 'POST':
+            session = self.create_session(preferences=request.json().get('preferences'))
+            if session is None:
+                return 503, {'error': 'too many sessions'}, 'application/json'
+            return 201, session.describe(), 'application/json'
+        if len(parts) < 2 or parts[0] != 'sessions':
+            return 404, {'error': 'not found'}, 'application/json'
+
+        session = self.sessions.get(parts[1])
+        if session is None:
+            return 404, {'error': 'unknown session'}, 'application/json'
+        if len(parts) == 2 and request.method == 'GET':
+            return 200, session.describe(), 'application/json'
+        if len(parts) == 2 and request.method == 'DELETE':
+            del self.sessions[session.id]
+            return 200, {'session': session.id, 'closed': True}, 'application/json'
+        if parts[2:] == ['command'] and request.method == 'POST':
+            return 200, await self.command_over_http(session, request), 'application/json'
+        return 405, {'error': 'method not allowed'}, 'application/json'
+
+    async def command_over_http(self, session, request):
+        started = time.perf_counter()
+        transcript = None
+        if request.headers.get('content-type', '').startswith('audio/') or request.body[:4] == b'RIFF':
+            transcript = command = await self.recognize(request.body)
+        elif request.headers.get('content-type', '').startswith('application/json'):
+            command = request.json().get('text', '')
+        else:
+            command = request.body.decode('utf-8')
+
+        replies = []
+        if command:
+            async def collect(text):
+                replies.append(text)
+            keep = await self.execute(session, command, collect)
+        else:
+            replies.append("Sorry, I didn't catch that.")
+            keep = True
+        if not keep:
+            self.sessions.pop(session.id, None)
+
+        result = {'session': session.id, 'replies': [{'text': text} for text in replies],
+                  'continue': keep, 'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)}
+        if transcript is not None:
+            result['transcript'] = transcript
+        if request.query.get('audio', 'false').lower() == 'true':
+            for reply in result['replies']:
+                audio = await self.synthesize(reply['text'])
+                reply['audio'] = base64.b64encode(audio).decode('ascii') if audio else None
+        return result
+
+    async def handle_websocket(self, request, reader, writer):
+        key = request.headers.get('sec-websocket-key')
+        if not key:
+            raise ValueError("Missing Sec-WebSocket-Key")
+        session = self.sessions.get(request.query.get('session', ''))
+        if session is None:
+            session = self.create_session(request.query.get('session'))
+            if session is None:
+                writer.write(http_response(503, {'error': 'too many sessions'}))
+                return
+        writer.write((f"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n").encode('latin-1'))
+        socket = WebSocket(reader, writer)
+        with_audio = self.synthesizer is not None and request.query.get('audio', 'true').lower() != 'false'
+        await socket.send_json({'type': 'session', 'session': session.id, 'audio': with_audio})
+
+        while True:
+            message = await socket.receive()
+            if message is None:
+                break
+            started = time.perf_counter()
+            if isinstance(message, bytes):
+                try:
+                    command = await self.recognize(message)
+                except (ValueError, wave.Error) as e:
+                    await socket.send_json({'type': 'error', 'message': f"Unreadable audio: {e}"})
+                    continue
+                await socket.send_json({'type': 'transcript', 'text': command})
+            elif message.lstrip().startswith('{'):
+                try:
+                    command = json.loads(message).get('text', '')
+                except ValueError as e:
+                    await socket.send_json({'type': 'error', 'message': f"Invalid JSON: {e}"})
+                    continue
+            else:
+                command = message
+
+            keep = await self.stream_replies(socket, session, command, with_audio)
+            await socket.send_json({'type': 'done', 'continue': keep,
+                                    'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)})
+            if not keep:
+                self.sessions.pop(session.id, None)
+                await socket.close()
+                break
+
+    async def stream_replies(self, socket, session, command, with_audio):
+        """Send each reply as soon as it is spoken; audio follows in order while later text keeps flowing"""
+        if not command:
+            await socket.send_json({'type': 'reply', 'index': 0, 'text': "Sorry, I didn't catch that."})
+            return True
+
+        audio_sent = []
+        index = 0
+
+        async def send_audio(position, previous, pending):
+            try:
+                audio = await pending
+            finally:
+                if previous:
+                    await asyncio.wait({previous})
+            if audio:
+                await socket.send_json({'type': 'audio', 'index': position, 'bytes': len(audio)})
+                await socket.send(audio)
+
+        async def on_reply(text):
+            nonlocal index
+            await socket.send_json({'type': 'reply', 'index': index, 'text': text})
+            if with_audio:
+                pending = asyncio.ensure_future(self.synthesize(text))
+                previous = audio_sent[-1] if audio_sent else None
+                audio_sent.append(asyncio.ensure_future(send_audio(index, previous, pending)))
+            index += 1
+
+        keep = await self.execute(session, command, on_reply)
+        for task in audio_sent:
+            try:
+                await task
+            except Exception as e:
+                print(f"✗ Error synthesizing reply: {e}")
+        return keep
+
+    async def start(self, host='127.0.0.1', port=8765):
+        # Sessions copy the shared assistant, so every background setup step must have finished
+        await asyncio.get_running_loop().run_in_executor(None, self.assistant.startup.settle)
+        self.server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_MESSAGE)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        host, port = await self.start(host, port)
+        print(f"🌐 Serving {type(self.assistant).__name__} on http://{host}:{port} (WebSocket at /ws)")
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+    def close(self):
+        """Stop the workers and synthesizer and release the shared assistant"""
+        self.executor.shutdown(wait=False)
+        if self.synthesizer:
+            self.synthesizer.shutdown()
+        speech = getattr(self.assistant, 'speech', None)
+        if speech:
+            speech.report()
+            speech.shutdown()
+        self.assistant.skills.report()
+        self.assistant.metrics.close()
+
+
+def main():
+    """Run the server with the voice or enhanced assistant"""
+    import logging
+    from dotenv import load_dotenv
+    load_dotenv()
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'WARNING'), format='%(asctime)s %(levelname)s %(message)s')
+
+    parser = argparse.ArgumentParser(description="Serve the assistant to several users and devices")
+    parser.add_argument('--assistant', choices=['voice', 'enhanced'], default='enhanced')
+    parser.add_argument('--host', default=os.getenv('SERVER_HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('SERVER_PORT', 8765)))
+    parser.add_argument('--no-audio', action='store_true', help="reply with text only")
+    args = parser.parse_args()
+
+    if args.assistant == 'voice':
+        from voice_assistant import VoiceAssistant as assistant_class
+    else:
+        from enhanced_voice_assistant import EnhancedVoiceAssistant as assistant_class
+    assistant = server_assistant(assistant_class)()
+    synthesizer = None
+    if not args.no_audio and os.getenv('SERVER_AUDIO', 'true').lower() == 'true':
+        synthesizer = SpeechSynthesizer(
+            rate=int(getattr(assistant, 'user_preferences', {}).get('voice_rate', os.getenv('VOICE_RATE', 200))),
+            volume=float(getattr(assistant, 'user_preferences', {}).get('voice_volume',
+                                                                         os.getenv('VOICE_VOLUME', 0.9))),
+            metrics=assistant.metrics
+        ).start()
+        if not synthesizer.available:
+            synthesizer.shutdown()
+            synthesizer = None
+
+    server = AssistantServer.from_env(assistant, synthesizer)
+    if args.host not in ('127.0.0.1', 'localhost', '::1') and not server.token:
+        print("⚠ Listening beyond this machine without SERVER_TOKEN; anyone on the network can use the assistant")
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n🛑 Server stopped")
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Lazy skill registry
+Features: Skills declare their trigger phrases and the modules they need, modules
+are imported on first use (or pre-warmed in the background), and every import is
+timed so cold-start cost and memory footprint can be tracked
+
+Usage (fresh-interpreter import cost, like python -X importtime):
+    python skills.py [module ...] [--json import_times.jsonl]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import importlib
+import threading
+import subprocess
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Modules the assistants load lazily, measured by the command-line report
+HEAVY_MODULES = ['cv2', 'numpy', 'qrcode', 'PIL', 'pywhatkit', 'pyautogui', 'wikipedia', 'pyjokes',
+                 'intent_classifier', 'google.generativeai', 'speech_recognition', 'pyttsx3']
+
+
+def resident_memory():
+    """Resident set size of this process in bytes, or None without psutil"""
+    return psutil.Process().memory_info().rss if psutil else None
+
+
+class SkillRegistry:
+    """Intent table rows plus the modules each skill imports on first use"""
+
+    def __init__(self, table):
+        """table: intent table rows, each with an optional 'modules' list"""
+        self.table = table
+        self.skill_modules = {row['name']: list(row.get('modules', ())) for row in table}
+        self.lock = threading.Lock()
+        self.loaded = {}
+        self.imports = {}  # module -> (seconds, bytes of resident memory added or None, skill)
+
+    def intent_table(self):
+        """The table without the registry-only 'modules' key, for IntentRouter"""
+        return [{key: value for key, value in row.items() if key != 'modules'} for row in self.table]
+
+    def module(self, name, skill=None):
+        """Import a module once and return it, recording how long the first import took"""
+        module = self.loaded.get(name)
+        if module is not None:
+            return module
+
+        # One import at a time keeps the timings and memory deltas attributable
+        with self.lock:
+            if name in self.loaded:
+                return self.loaded[name]
+            memory_before = resident_memory()
+            started = time.perf_counter()
+            module = importlib.import_module(name)
+            elapsed = time.perf_counter() - started
+            memory_after = resident_memory()
+            added = memory_after - memory_before if memory_before is not None else None
+            self.loaded[name] = module
+            self.imports[name] = (elapsed, added, skill)
+
+        size = f", +{added / 2 ** 20:.1f} MB" if added is not None else ""
+        print(f"📦 Loaded {name} in {elapsed * 1000:.0f}ms{size}")
+        return module
+
+    def load(self, skill):
+        """Import every module a skill declares"""
+        for name in self.skill_modules.get(skill, ()):
+            self.module(name, skill)
+
+    def prewarm(self, skills):
+        """Load likely skills in a background thread so their first use is fast"""
+        skills = [skill for skill in skills if self.skill_modules.get(skill)]
+        if not skills:
+            return None
+
+        def warm():
+            for skill in skills:
+                try:
+                    self.load(skill)
+                except Exception as e:
+                    print(f"✗ Error pre-warming skill '{skill}': {e}")
+
+        thread = threading.Thread(target=warm, name='skill-prewarm', daemon=True)
+        thread.start()
+        return thread
+
+    def summary(self):
+        """Per-module import time in ms and resident memory added in MB"""
+        with self.lock:
+            imports = dict(self.imports)
+        return {
+            name: {
+                'skill': skill,
+                'import_ms': round(elapsed * 1000, 1),
+                'memory_mb': round(added / 2 ** 20, 1) if added is not None else None
+            }
+            for name, (elapsed, added, skill) in imports.items()
+        }
+
+    def report(self):
+        """Print the modules imported this session, slowest first"""
+        summary = self.summary()
+        if not summary:
+            return
+        total_ms = sum(entry['import_ms'] for entry in summary.values())
+        print(f"📦 Lazy imports this session: {len(summary)} modules, {total_ms:.0f}ms")
+        for name, entry in sorted(summary.items(), key=lambda item: -item[1]['import_ms']):
+            memory = f"{entry['memory_mb']:6.1f} MB" if entry['memory_mb'] is not None else "     ? MB"
+            print(f"   {name:<22} {entry['import_ms']:8.1f}ms {memory}  ({entry['skill'] or 'startup'})")
+
+
+# Runs in a fresh interpreter so each module is measured cold, with nothing pre-imported
+PROBE = """
+import sys, json
+try:
+    import psutil
+    rss = lambda: psutil.Process().memory_info().rss
+except ImportError:
+    rss = lambda: None
+before, modules = rss(), len(sys.modules)
+exec('import ' + sys.argv[1])
+after = rss()
+print(json.dumps({'memory': after - before if before is not None else None,
+                  'modules': len(sys.modules) - modules}))
+"""
+
+
+def measure_cold_import(name):
+    """Import a module in a fresh interpreter with -X importtime
+
+    Returns (cumulative microseconds, modules imported, resident bytes added or None).
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE, name],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if result.returncode != 0:
+        raise ImportError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else name)
+
+    # Lines look like "import time:       self [us] |  cumulative | imported package";
+    # the requested module is the last unindented entry with its name
+    cumulative = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, total, package = line[len('import time:'):].split('|')
+        if package.strip() == name and not package.startswith('  '):
+            cumulative = int(total)
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    return cumulative, probe['modules'], probe['memory']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the cold import cost of the assistants' heavy modules")
+    parser.add_argument('modules', nargs='*', default=HEAVY_MODULES)
+    parser.add_argument('--json', help="append the results as one JSON line to this file")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'module':<22} {'import ms':>10} {'modules':>8} {'memory MB':>10}")
+    for name in args.modules:
+        try:
+            micros, count, memory = measure_cold_import(name)
+        except ImportError as e:
+            print(f"{name:<22} ✗ {e}")
+            continue
+        memory_mb = round(memory / 2 ** 20, 1) if memory is not None else None
+        results[name] = {'import_ms': round(micros / 1000, 1), 'modules': count, 'memory_mb': memory_mb}
+        print(f"{name:<22} {micros / 1000:>10.1f} {count:>8} {memory_mb if memory_mb is not None else '?':>10}")
+
+    if args.json:
+        record = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+                  'platform': platform.platform(), 'imports': results}
+        with open(args.json, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+        print(f"💾 Appended to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Pluggable speech recognition
+Features: Google (online) and PocketSphinx/Vosk (offline) behind one interface,
+fallback in preference order or a concurrent race that takes the first confident
+transcript, per-backend latency and confidence for every utterance, and
+online backends skipped while their circuit breaker is open
+"""
+
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import speech_recognition as sr
+
+from http_client import LatencyStats
+
+
+class Transcript:
+    """One backend's result for one utterance"""
+
+    def __init__(self, backend, text, confidence, latency):
+        self.backend = backend
+        self.text = text
+        self.confidence = confidence  # 0-1, or None when the engine does not report one
+        self.latency = latency
+
+    def __repr__(self):
+        return f"Transcript({self.backend!r}, {self.text!r}, {self.confidence!r})"
+
+
+class SpeechBackend:
+    """Base class: recognize(audio) returns (text, confidence) and raises sr errors like the Recognizer"""
+
+    name = 'backend'
+    offline = False
+
+    def recognize(self, audio):
+        raise NotImplementedError
+
+
+class GoogleBackend(SpeechBackend):
+    """Google Web Speech API through speech_recognition (network round trip)"""
+
+    name = 'google'
+
+    def __init__(self, recognizer, language='en-US'):
+        self.recognizer = recognizer
+        self.language = language
+
+    def recognize(self, audio):
+        result = self.recognizer.recognize_google(audio, language=self.language, show_all=True)
+        alternatives = result.get('alternative') if isinstance(result, dict) else None
+        if not alternatives:
+            raise sr.UnknownValueError()
+        best = alternatives[0]
+        return best['transcript'], best.get('confidence')
+
+
+class SphinxBackend(SpeechBackend):
+    """CMU PocketSphinx through speech_recognition (offline)"""
+
+    name = 'sphinx'
+    offline = True
+
+    def __init__(self, recognizer, language='en-US'):
+        import pocketsphinx  # noqa: F401  fail at setup, not on the first utterance
+        self.recognizer = recognizer
+        self.language = language
+
+    def recognize(self, audio):
+        decoder = self.recognizer.recognize_sphinx(audio, language=self.language, show_all=True)
+        hypothesis = decoder.hyp()
+        if hypothesis is None or not hypothesis.hypstr:
+            raise sr.UnknownValueError()
+        try:
+            confidence = decoder.get_logmath().exp(hypothesis.prob)
+        except Exception:
+            confidence = None
+        return hypothesis.hypstr, confidence
+
+
+class VoskBackend(SpeechBackend):
+    """Vosk/Kaldi (offline); the model is loaded once instead of on every utterance"""
+
+    name = 'vosk'
+    offline = True
+    sample_rate = 16000
+
+    def __init__(self, model_path):
+        import vosk
+        vosk.SetLogLevel(-1)
+        self.vosk = vosk
+        self.model = vosk.Model(model_path)
+
+    def recognize(self, audio):
+        recognizer = self.vosk.KaldiRecognizer(self.model, self.sample_rate)
+        recognizer.SetWords(True)
+        recognizer.AcceptWaveform(audio.get_raw_data(convert_rate=self.sample_rate, convert_width=2))
+        result = json.loads(recognizer.FinalResult())
+        if not result.get('text'):
+            raise sr.UnknownValueError()
+        words = result.get('result') or []
+        confidence = sum(word['conf'] for word in words) / len(words) if words else None
+        return result['text'], confidence
+
+
+def create_backends(names, recognizer, language='en-US', vosk_model='vosk-model'):
+    """Build backends by name in preference order, skipping (and reporting) unavailable ones"""
+    factories = {
+        'google': lambda: GoogleBackend(recognizer, language),
+        'sphinx': lambda: SphinxBackend(recognizer, language),
+        'vosk': lambda: VoskBackend(vosk_model),
+    }
+    backends = []
+    for name in names:
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in factories:
+            print(f"✗ Unknown speech backend '{name}'")
+            continue
+        try:
+            backends.append(factories[name]())
+        except Exception as e:
+            print(f"✗ Speech backend '{name}' unavailable: {e}")
+    return backends
+
+
+class BackendStats(LatencyStats):
+    """Latency window plus confidence and outcome counters for one backend"""
+
+    def __init__(self, window=200):
+        super().__init__(window)
+        self.confidences = []
+        self.unrecognized = 0
+        self.wins = 0
+
+    def summary(self):
+        summary = super().summary()
+        del summary['retries']
+        recent = [confidence for confidence in self.confidences if confidence is not None]
+        summary.update({
+            'unrecognized': self.unrecognized,
+            'wins': self.wins,
+            'mean_confidence': round(sum(recent) / len(recent), 3) if recent else None,
+        })
+        return summary
+
+
+class SpeechRecognizer:
+    """Recognize utterances with one or more backends
+
+    Sequential mode tries backends in preference order and stops at the first
+    confident transcript. Race mode sends the utterance to all of them at
+    once and takes the first confident transcript to arrive; slower backends
+    finish in the background and are still recorded. A transcript is
+    confident when its confidence is at least min_confidence or unknown.
+    If none is confident, the most confident transcript is used.
+    With breakers, online backends that keep failing are skipped until their
+    breaker lets a trial utterance through.
+    """
+
+    def __init__(self, backends, race=False, min_confidence=0.6, race_timeout=10.0, breakers=None):
+        if not backends:
+            raise ValueError("No speech recognition backend available")
+        self.backends = backends
+        self.race = race and len(backends) > 1
+        self.min_confidence = min_confidence
+        self.race_timeout = race_timeout
+        self.breakers = breakers
+        self.stats = {backend.name: BackendStats() for backend in backends}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=len(backends), thread_name_prefix='speech') \
+            if self.race else None
+
+    def breaker(self, backend):
+        """Circuit breaker of an online backend, or None"""
+        if self.breakers is None or backend.offline:
+            return None
+        return self.breakers.get(backend.name)
+
+    def unavailable(self):
+        """True while every backend's breaker is open, so there is no point in capturing speech"""
+        breakers = [self.breaker(backend) for backend in self.backends]
+        return all(breaker is not None and breaker.is_open() for breaker in breakers)
+
+    def usable(self, backend):
+        """Whether a backend may be tried now (its breaker, if any, lets the call through)"""
+        breaker = self.breaker(backend)
+        return breaker is None or breaker.allow()
+
+    def run_backend(self, backend, audio, results):
+        """Recognize with one backend; returns a Transcript or None, recording its latency and confidence"""
+        started = time.perf_counter()
+        breaker = self.breaker(backend)
+        try:
+            text, confidence = backend.recognize(audio)
+            transcript = Transcript(backend.name, text, confidence, time.perf_counter() - started)
+        except sr.UnknownValueError:
+            transcript = Transcript(backend.name, None, None, time.perf_counter() - started)
+        except Exception as e:
+            print(f"✗ {backend.name} recognition error: {e}")
+            if breaker:
+                breaker.record_failure()
+            with self.lock:
+                self.stats[backend.name].record(time.perf_counter() - started, ok=False)
+            return None
+
+        if breaker:
+            breaker.record_success()
+        with self.lock:
+            stats = self.stats[backend.name]
+            stats.record(transcript.latency)
+            if transcript.text is None:
+                stats.unrecognized += 1
+            else:
+                stats.confidences.append(transcript.confidence)
+                del stats.confidences[:-stats.window]
+            results.append(transcript)
+        return transcript if transcript.text else None
+
+    def confident(self, transcript):
+        return transcript is not None and (transcript.confidence is None or
+                                           transcript.confidence >= self.min_confidence)
+
+    def recognize(self, audio):
+        """Best Transcript for the utterance, or None when no backend understood it"""
+        results = []
+        if self.race:
+            winner = self.recognize_race(audio, results)
+        else:
+            winner = self.recognize_in_order(audio, results)
+        if winner:
+            with self.lock:
+                self.stats[winner.backend].wins += 1
+        self.log(winner, results)
+        return winner
+
+    def recognize_in_order(self, audio, results):
+        best = None
+        for backend in self.backends:
+            if not self.usable(backend):
+                continue
+            transcript = self.run_backend(backend, audio, results)
+            if self.confident(transcript):
+                return transcript
+            best = self.more_confident(best, transcript)
+        return best
+
+    def recognize_race(self, audio, results):
+        pending = {self.executor.submit(self.run_backend, backend, audio, results)
+                   for backend in self.backends if self.usable(backend)}
+        deadline = time.monotonic() + self.race_timeout
+        best = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                                 return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                transcript = future.result()
+                if self.confident(transcript):
+                    return transcript
+                best = self.more_confident(best, transcript)
+        return best
+
+    @staticmethod
+    def more_confident(best, transcript):
+        if transcript is None:
+            return best
+        if best is None or (transcript.confidence or 0) > (best.confidence or 0):
+            return transcript
+        return best
+
+    def log(self, winner, results):
+        """One line per utterance: latency and confidence of every backend finished so far, and the winner"""
+        with self.lock:
+            results = list(results)
+        parts = []
+        for transcript in results:
+            if transcript.text is None:
+                detail = "no match"
+            elif transcript.confidence is None:
+                detail = "?"
+            else:
+                detail = f"{transcript.confidence:.0%}"
+            parts.append(f"{transcript.backend} {transcript.latency * 1000:.0f}ms ({detail})")
+        if parts:
+            print(f"⏱ Recognition: {', '.join(parts)}" + (f" → {winner.backend}" if winner else ""))
+
+    def summary(self):
+        """Per-backend counters, latency percentiles and mean confidence"""
+        with self.lock:
+            return {name: stats.summary() for name, stats in self.stats.items()}
+
+    def report(self):
+        """Print per-backend statistics for the session"""
+        summary = self.summary()
+        if not any(entry['requests'] for entry in summary.values()):
+            return
+        print("🔍 Speech recognition this session:")
+        for name, entry in summary.items():
+            confidence = f"{entry['mean_confidence']:.0%}" if entry['mean_confidence'] is not None else "?"
+            print(f"   {name:<8} {entry['requests']:4} utterances, {entry['wins']:4} used, "
+                  f"p50 {entry['p50_ms']:.0f}ms, p95 {entry['p95_ms']:.0f}ms, "
+                  f"confidence {confidence}, {entry['errors']} errors")
+
+    def shutdown(self):
+        if self.executor:
+            self.executor.shutdown(wait=False)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Streaming speech helpers for Gemini replies
+Features: Incremental sentence splitting, speak-while-generating, time-to-first-audio tracking
+"""
+
+import re
+import time
+import queue
+import threading
+
+# A sentence ends with ., ! or ? followed by whitespace, or at a line break
+SENTENCE_END = re.compile(r'(?<=[.!?])["\')\]]*\s+|\n+')
+
+# Spoken when a reply stream finishes without any text
+EMPTY_REPLY = "Sorry, I don't have an answer to that."
+
+# Markdown that Gemini likes to emit but that sounds wrong when spoken
+MARKDOWN_NOISE = re.compile(r'[*#`_>]+')
+
+
+def clean_for_speech(text):
+    """Strip markdown symbols and collapse whitespace before speaking"""
+    return ' '.join(MARKDOWN_NOISE.sub('', text).split())
+
+
+class SentenceSplitter:
+    """Incrementally split streamed text into complete sentences"""
+
+    def __init__(self, min_length=20):
+        # Very short fragments ("Dr.", "1.") are merged into the next sentence
+        self.min_length = min_length
+        self.buffer = ""
+
+    def feed(self, chunk):
+        """Add a chunk of text and return the sentences it completed"""
+        self.buffer += chunk
+        sentences = []
+        while True:
+            match = SENTENCE_END.search(self.buffer, self.min_length)
+            if not match:
+                break
+            sentence = clean_for_speech(self.buffer[:match.end()])
+            self.buffer = self.buffer[match.end():]
+            if sentence:
+                sentences.append(sentence)
+        return sentences
+
+    def flush(self):
+        """Return whatever is left once the stream has finished"""
+        sentence = clean_for_speech(self.buffer)
+        self.buffer = ""
+        return [sentence] if sentence else []
+
+
+class StreamingSpeaker:
+    """Speak a reply sentence by sentence while the rest is still being generated"""
+
+    def __init__(self, speak, history_size=50):
+        self.speak = speak
+        self.history_size = history_size
+        self.first_audio_times = {'stream': [], 'blocking': []}
+
+    def first_audio(self, mode, started_at):
+        """on_start callback for speak() that records the time to first audio once playback begins"""
+        return lambda: self.record_first_audio(mode, started_at)
+
+    def record_first_audio(self, mode, started_at):
+        """Record the delay between the request and the first spoken word"""
+        elapsed = time.perf_counter() - started_at
+        history = self.first_audio_times.setdefault(mode, [])
+        history.append(elapsed)
+        del history[:-self.history_size]
+        average = sum(history) / len(history)
+        print(f"⏱ Time to first audio ({mode}): {elapsed:.2f}s (avg {average:.2f}s over {len(history)})")
+        return elapsed
+
+    def speak_stream(self, chunks, started_at=None):
+        """Consume text chunks in a background thread and speak each sentence as it completes
+
+        Returns (reply_text, complete). Errors raised before anything was spoken are
+        re-raised so the caller can fall back; later errors end the reply early and
+        are reported as complete=False.
+        """
+        started_at = started_at or time.perf_counter()
+        sentences = queue.Queue()
+        parts = []
+
+        def produce():
+            splitter = SentenceSplitter()
+            try:
+                for chunk in chunks:
+                    parts.append(chunk)
+                    for sentence in splitter.feed(chunk):
+                        sentences.put(sentence)
+                for sentence in splitter.flush():
+                    sentences.put(sentence)
+            except Exception as e:
+                sentences.put(e)
+            finally:
+                sentences.put(None)
+
+        threading.Thread(target=produce, daemon=True).start()
+
+        spoken = False
+        complete = True
+        while True:
+            item = sentences.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                if not spoken:
+                    raise item
+                print(f"✗ Streaming reply ended early: {item}")
+                complete = False
+                break
+            if spoken:
+                self.speak(item)
+            else:
+                self.speak(item, on_start=self.first_audio('stream', started_at))
+                spoken = True
+
+        return "".join(parts).strip(), complete
+
+    def summary(self):
+        """Return average time-to-first-audio per mode"""
+        return {
+            mode: round(sum(times) / len(times), 3)
+            for mode, times in self.first_audio_times.items() if times
+        }
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Concurrent startup for the assistants
+Features: Setup steps run in parallel on a small thread pool, readiness futures
+so callers wait only for what they need, per-subsystem startup-time breakdown
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Startup:
+    """Run setup steps concurrently and report how long each one took"""
+
+    def __init__(self, max_workers=4):
+        self.started_at = time.perf_counter()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='startup')
+        self.lock = threading.Lock()
+        self.futures = {}
+        self.timings = {}  # name -> (started, finished, error), seconds since startup began
+        self.sealed = False  # set once every background step has been submitted
+        self.reported = False
+        self.logged_failures = set()
+
+    def now(self):
+        return time.perf_counter() - self.started_at
+
+    def timed(self, name, setup):
+        """Call setup() and record when it started and finished"""
+        started = self.now()
+        error = None
+        try:
+            return setup()
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            with self.lock:
+                self.timings[name] = (started, self.now(), error)
+
+    def run(self, name, setup):
+        """Run a setup step right here, e.g. one whose objects must stay on the main thread"""
+        return self.timed(name, setup)
+
+    def submit(self, name, setup):
+        """Start a setup step in the background"""
+        with self.lock:
+            future = self.executor.submit(self.timed, name, setup)
+            self.futures[name] = future
+        future.add_done_callback(lambda _: self.report_when_done())
+        return future
+
+    def ready(self, name, timeout=None):
+        """Block until a background step has finished and return its result
+
+        Exceptions raised by the step are re-raised here.
+        """
+        with self.lock:
+            future = self.futures.get(name)
+        if future is None:
+            raise KeyError(f"Unknown startup step: {name}")
+        return future.result(timeout)
+
+    def is_ready(self, name):
+        with self.lock:
+            future = self.futures.get(name)
+        return future is not None and future.done()
+
+    def wait_all(self, timeout=None):
+        """Block until every background step has finished"""
+        with self.lock:
+            names = list(self.futures)
+        for name in names:
+            self.ready(name, timeout)
+
+    def settle(self, timeout=None):
+        """Block until every background step has finished, without raising
+
+        A failed step is logged the first time it is seen and its name returned
+        in the set of failures; callers carry on and the features that need it
+        degrade on their own.
+        """
+        with self.lock:
+            futures = list(self.futures.items())
+        failed = set()
+        for name, future in futures:
+            error = future.exception(timeout)
+            if error is None:
+                continue
+            failed.add(name)
+            with self.lock:
+                first = name not in self.logged_failures
+                self.logged_failures.add(name)
+            if first:
+                print(f"✗ Startup step '{name}' failed, continuing without it: {error}")
+        return failed
+
+    def seal(self):
+        """Declare that all background steps have been submitted
+
+        The report is printed (and the pool released) only after this, so fast
+        steps finishing before the next submit() cannot end startup early.
+        """
+        with self.lock:
+            self.sealed = True
+        self.report_when_done()
+
+    def report_when_done(self):
+        with self.lock:
+            if not self.sealed or self.reported or not all(future.done() for future in self.futures.values()):
+                return
+            self.reported = True
+        self.executor.shutdown(wait=False)
+        self.report()
+
+    def report(self):
+        """Print the per-subsystem startup-time breakdown"""
+        with self.lock:
+            timings = sorted(self.timings.items(), key=lambda item: item[1][0])
+        ready_at = max((finished for _, finished, _ in self.timings.values()), default=0.0)
+        busy = sum(finished - started for started, finished, _ in self.timings.values())
+
+        print(f"⏱ Startup ready in {ready_at:.2f}s ({busy:.2f}s of setup work)")
+        for name, (started, finished, error) in timings:
+            status = f"✗ {error}" if error else "✓"
+            print(f"   {name:<20} {finished - started:6.2f}s  (+{started:.2f}s → +{finished:.2f}s) {status}")
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+SQLite storage for reminders, notes, preferences and the caches
+Features: WAL journal so reads never wait for writes, one writer thread that
+commits queued writes in batches, a read connection per thread, schema
+versioning with ordered migrations
+"""
+
+import os
+import time
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+from metrics import Metrics
+
+# (version, what it does, statements); applied in order, each in one transaction
+MIGRATIONS = [
+    (1, "reminders, notes and preferences tables", [
+        '''CREATE TABLE IF NOT EXISTS reminders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            datetime TEXT NOT NULL,
+            completed INTEGER DEFAULT 0
+        )''',
+        '''CREATE TABLE IF NOT EXISTS notes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            content TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT
+        )''',
+        '''CREATE TABLE IF NOT EXISTS user_preferences (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )''',
+    ]),
+    (2, "indexes for pending reminders and recent notes", [
+        'CREATE INDEX IF NOT EXISTS idx_reminders_pending ON reminders(completed, datetime)',
+        'CREATE INDEX IF NOT EXISTS idx_notes_created_at ON notes(created_at)',
+    ]),
+    (3, "AI response cache and weather/news lookup cache tables", [
+        '''CREATE TABLE IF NOT EXISTS llm_cache (
+            key TEXT PRIMARY KEY,
+            prompt TEXT NOT NULL,
+            model TEXT NOT NULL,
+            response TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            last_used REAL NOT NULL,
+            hits INTEGER DEFAULT 0
+        )''',
+        'CREATE INDEX IF NOT EXISTS idx_llm_cache_last_used ON llm_cache(last_used)',
+        '''CREATE TABLE IF NOT EXISTS lookup_cache (
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            fetched_at REAL NOT NULL,
+            PRIMARY KEY (namespace, key)
+        )''',
+    ]),
+]
+
+
+class Storage:
+    """Thread-safe access to the assistant database
+
+    Writes from any thread are queued for one writer thread, which runs
+    everything queued (up to batch_size statements) in one transaction, so
+    concurrent writers share a commit instead of each paying for one.
+    execute() waits for its commit and returns the new row id; submit()
+    returns at once with a Future. Reads run on a connection owned by the
+    calling thread and, with WAL, see the last commit without blocking on
+    the writer.
+    """
+
+    def __init__(self, db_path='assistant_data.db', batch_size=256, metrics=None):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.metrics = metrics or Metrics(enabled=False)
+        self.local = threading.local()
+        self.readers = []
+        self.readers_lock = threading.Lock()
+        self.writes = queue.Queue()
+        self.stats = {'writes': 0, 'batches': 0, 'max_batch': 0, 'failed': 0, 'reads': 0, 'commit_seconds': 0.0}
+
+        # Autocommit mode: the writer opens and commits its transactions itself
+        self.writer_conn = self.connect()
+        self.writer_conn.execute('PRAGMA journal_mode=WAL')
+        self.version = self.migrate()
+        self.writer = threading.Thread(target=self.write_loop, name='storage-writer', daemon=True)
+        self.writer.start()
+
+    @classmethod
+    def from_env(cls, db_path='assistant_data.db', metrics=None):
+        return cls(db_path, batch_size=int(os.getenv('STORAGE_BATCH_SIZE', 256)), metrics=metrics)
+
+    def connect(self):
+        conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA busy_timeout=5000')
+        # Safe with WAL: a power loss can only lose the last commits, never corrupt the file
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def migrate(self):
+        """Apply the migrations newer than the database's user_version; returns the schema version"""
+        conn = self.writer_conn
+        current = conn.execute('PRAGMA user_version').fetchone()[0]
+        for version, description, statements in MIGRATIONS:
+            if version <= current:
+                continue
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                for statement in statements:
+                    conn.execute(statement)
+                conn.execute(f'PRAGMA user_version = {version}')
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            print(f"📦 Database migrated to schema v{version}: {description}")
+            current = version
+        return current
+
+    def reader(self):
+        """This thread's read connection"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = self.local.conn = self.connect()
+            conn.execute('PRAGMA query_only=1')
+            with self.readers_lock:
+                self.readers.append(conn)
+        return conn
+
+    def query(self, sql, params=()):
+        """All rows of a read"""
+        self.stats['reads'] += 1
+        return self.reader().execute(sql, params).fetchall()
+
+    def query_one(self, sql, params=()):
+        self.stats['reads'] += 1
+        return self.reader().execute(sql, params).fetchone()
+
+    def submit(self, sql, params=(), many=False):
+        """Queue a write; the Future resolves to the row id once it is committed"""
+        future = Future()
+        self.writes.put((sql, params, many, future))
+        self.metrics.gauge('db_write_queue', self.writes.qsize())
+        return future
+
+    def execute(self, sql, params=()):
+        """Write and wait for the commit; returns the new row id"""
+        return self.submit(sql, params).result()
+
+    def execute_many(self, sql, rows):
+        """Write many rows in one statement and wait for the commit"""
+        return self.submit(sql, rows, many=True).result()
+
+    def flush(self):
+        """Wait until every write queued so far is committed"""
+        self.submit(None).result()
+
+    def write_loop(self):
+        while True:
+            item = self.writes.get()
+            if item is None:
+                return
+            batch = [item]
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self.writes.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self.commit(batch)
+            if stop:
+                return
+
+    def commit(self, batch):
+        """Run a batch of writes in one transaction; a failing statement fails only its own Future"""
+        conn = self.writer_conn
+        started = time.perf_counter()
+        results = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for sql, params, many, future in batch:
+                if sql is None:
+                    results.append((future, None, None))
+                    continue
+                try:
+                    cursor = conn.executemany(sql, params) if many else conn.execute(sql, params)
+                    results.append((future, cursor.lastrowid, None))
+                except sqlite3.Error as e:
+                    results.append((future, None, e))
+            conn.execute('COMMIT')
+        except sqlite3.Error as e:
+            print(f"✗ Database commit failed: {e}")
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            results = [(future, None, e) for _, _, _, future in batch]
+
+        elapsed = time.perf_counter() - started
+        failed = sum(1 for _, _, error in results if error is not None)
+        writes = sum(1 for sql, _, _, _ in batch if sql is not None)
+        self.stats['writes'] += writes
+        self.stats['batches'] += 1
+        self.stats['max_batch'] = max(self.stats['max_batch'], len(batch))
+        self.stats['failed'] += failed
+        self.stats['commit_seconds'] += elapsed
+        self.metrics.observe('db_commit', elapsed, ok=not failed)
+        self.metrics.increment('db_writes', writes)
+        for future, row_id, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(row_id)
+
+    def close(self):
+        """Commit what is queued, stop the writer and close every connection"""
+        if self.writer.is_alive():
+            self.writes.put(None)
+            self.writer.join(timeout=10)
+        self.writer_conn.close()
+        with self.readers_lock:
+            for conn in self.readers:
+                conn.close()
+            self.readers = []
+
+    def summary(self):
+        """Writes, commits, average and largest batch, reads"""
+        stats = dict(self.stats)
+        batches = stats['batches'] or 1
+        return dict(stats, version=self.version, avg_batch=round(stats['writes'] / batches, 1),
+                    avg_commit_ms=round(stats['commit_seconds'] * 1000 / batches, 2))
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Persistent text-to-speech worker
+Features: One long-lived thread owns the pyttsx3 engine, prioritized utterance queue,
+urgent messages jump the queue, barge-in cancellation of the current speech,
+background rendering and playback of cached phrases
+"""
+
+import time
+import queue
+import itertools
+import threading
+
+import pyttsx3
+
+from metrics import Metrics
+
+URGENT = 0
+NORMAL = 1
+RENDER = 2    # phrase cache warm-up only runs when nothing is waiting to be said
+SHUTDOWN = 3  # sorts after everything else, so queued speech is finished first
+
+
+class TTSWorker:
+    """Speak queued utterances on a dedicated engine thread"""
+
+    def __init__(self, name='Assistant', rate=200, volume=0.9, voice_gender='female',
+                 urgent_rate=250, driver='sapi5', echo=True, phrase_cache=None, engine_factory=None,
+                 metrics=None):
+        self.name = name
+        self.echo = echo  # print each utterance as it is spoken
+        self.driver = driver
+        self.engine_factory = engine_factory or (lambda: pyttsx3.init(self.driver))  # called on the engine thread
+        self.urgent_rate = urgent_rate
+        self.phrase_cache = phrase_cache
+        self.metrics = metrics or Metrics(enabled=False)
+        self.properties = {'rate': rate, 'volume': volume, 'voice_gender': voice_gender}
+        self.properties_changed = True
+
+        self.utterances = queue.PriorityQueue()
+        self.order = itertools.count()  # keeps FIFO order within a priority
+        self.lock = threading.Lock()
+        self.generation = 0  # bumped by interrupt() so queued items are dropped
+        self.cancel_current = False
+        self.speaking = False
+        self.playback_cancelled = threading.Event()  # wakes the engine thread out of a cached phrase
+        self.on_start = None  # called once when the current utterance starts playing
+        self.pending = 0  # queued utterances, not counting phrase renders
+
+        self.engine = None
+        self.voices = []
+        self.ready = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """Start the engine thread"""
+        self.thread = threading.Thread(target=self.run, name="tts-worker", daemon=True)
+        self.thread.start()
+        return self
+
+    def run(self):
+        """Engine loop; the engine is created here because SAPI5 is bound to its thread"""
+        try:
+            self.engine = self.engine_factory()
+            self.voices = self.engine.getProperty('voices')
+            self.engine.connect('started-word', self.on_word)
+            print("✓ Text-to-speech worker started")
+        except Exception as e:
+            print(f"✗ Error initializing voice engine: {e}")
+            self.engine = None
+        if self.engine:
+            try:
+                # Sets the phrase cache profile, so warming can start before anything is said
+                self.apply_properties(urgent=False)
+            except Exception as e:
+                print(f"✗ Error applying voice settings: {e}")
+        self.ready.set()
+
+        while True:
+            priority, _, generation, text, on_start = self.utterances.get()
+            try:
+                if priority == SHUTDOWN:
+                    break
+                if priority == RENDER:
+                    self.render_phrase(text)
+                    continue
+                self.speak_now(text, priority == URGENT, on_start, generation)
+                with self.lock:
+                    self.pending -= 1
+            finally:
+                self.utterances.task_done()
+
+    def apply_properties(self, urgent):
+        """Push rate, volume and voice changes to the engine from the engine thread"""
+        if self.properties_changed:
+            self.properties_changed = False
+            gender = self.properties['voice_gender']
+            if gender == 'female' and len(self.voices) > 1:
+                self.engine.setProperty('voice', self.voices[1].id)
+            elif gender == 'male' and len(self.voices) > 0:
+                self.engine.setProperty('voice', self.voices[0].id)
+            self.engine.setProperty('volume', float(self.properties['volume']))
+            self.update_phrase_profile()
+        rate = self.urgent_rate if urgent else int(self.properties['rate'])
+        self.engine.setProperty('rate', rate)
+
+    def update_phrase_profile(self):
+        """Point the phrase cache at the renders for the current voice settings"""
+        if not self.phrase_cache or not self.phrase_cache.available:
+            return
+        profile = (self.engine.getProperty('voice'), int(self.properties['rate']),
+                   float(self.properties['volume']))
+        if self.phrase_cache.set_profile(*profile):
+            # Voice settings changed: everything registered must be rendered again
+            self.warm_phrases(self.phrase_cache.registered())
+
+    def render_phrase(self, phrase):
+        """Render one phrase to the cache with the normal (non-urgent) voice settings"""
+        if not self.engine or not self.phrase_cache:
+            return
+        try:
+            self.apply_properties(urgent=False)
+            self.phrase_cache.render(self.engine, phrase)
+        except Exception as e:
+            print(f"✗ Error rendering cached phrase: {e}")
+
+    def speak_now(self, text, urgent=False, on_start=None, generation=None):
+        """Say one utterance and block the engine thread until it finishes or is cancelled
+
+        on_start() is called when the first word is heard, not when the text was queued.
+        Text queued before the last interrupt() (an older generation) is dropped.
+        """
+        with self.lock:
+            # Checked under the lock interrupt() takes, so it either drops this text or sees it speaking
+            if generation is not None and generation != self.generation:
+                return
+            self.cancel_current = False
+            self.playback_cancelled.clear()
+            self.speaking = True
+            self.on_start = on_start
+        if self.echo:
+            label = "🚨" if urgent else "🎵"
+            print(f"{label} {self.name}: {text}")
+        try:
+            if not self.engine:
+                return
+            with self.metrics.span('tts'):
+                self.apply_properties(urgent)
+                cached = None if urgent or not self.phrase_cache else self.phrase_cache.get(text)
+                if cached:
+                    self.started()
+                    # Played asynchronously so interrupt() can stop it like engine speech
+                    if self.playback_cancelled.wait(self.phrase_cache.play(cached)):
+                        self.phrase_cache.stop()
+                else:
+                    self.engine.say(text)
+                    self.engine.runAndWait()
+        except Exception as e:
+            print(f"✗ Error in text-to-speech: {e}")
+        finally:
+            with self.lock:
+                self.speaking = False
+                self.on_start = None
+
+    def started(self):
+        """Report that the current utterance is playing, once"""
+        on_start, self.on_start = self.on_start, None
+        if on_start:
+            try:
+                on_start()
+            except Exception as e:
+                print(f"✗ Error in speech start callback: {e}")
+
+    def on_word(self, name, location, length):
+        """Engine callback; stopping from inside the loop is the thread-safe way to cancel"""
+        self.started()
+        if self.cancel_current:
+            self.engine.stop()
+
+    def say(self, text, urgent=False, on_start=None):
+        """Queue text without waiting for playback; urgent text jumps the queue
+
+        on_start() is called from the engine thread when the text starts playing.
+        """
+        priority = URGENT if urgent else NORMAL
+        with self.lock:
+            self.pending += 1
+            self.utterances.put((priority, next(self.order), self.generation, text, on_start))
+
+    def warm_phrases(self, phrases):
+        """Register phrases with the phrase cache and render missing ones in the background"""
+        if not self.phrase_cache or not self.phrase_cache.available:
+            return
+        missing = self.phrase_cache.add(phrases)
+        if self.phrase_cache.profile_dir is None:
+            return  # rendered once the engine has set the voice profile (update_phrase_profile)
+        for phrase in missing:
+            self.utterances.put((RENDER, next(self.order), self.generation, phrase, None))
+
+    def interrupt(self):
+        """Barge-in: cut off the current utterance and drop everything queued"""
+        with self.lock:
+            self.generation += 1
+            if self.speaking:
+                self.cancel_current = True
+                self.playback_cancelled.set()
+
+    def set_properties(self, **properties):
+        """Change rate, volume or voice_gender; applied before the next utterance"""
+        self.properties.update(properties)
+        self.properties_changed = True
+
+    def is_busy(self):
+        """True while anything is being spoken or waiting to be spoken"""
+        return self.speaking or self.pending > 0
+
+    def wait_until_idle(self, timeout=None):
+        """Wait until all queued speech has been played"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.is_busy():
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def shutdown(self, timeout=10):
+        """Finish queued speech, then stop the engine thread"""
+        self.wait_until_idle(timeout)
+        with self.lock:
+            self.utterances.put((SHUTDOWN, next(self.order), self.generation, None, None))
+        if self.thread:
+            self.thread.join(timeout)
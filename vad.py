@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Voice activity detection
+Features: Vectorized per-frame energy and zero-crossing features, onset
+debouncing and hangover smoothing, and a streaming endpointer whose trailing
+silence adapts to the utterance length (short commands end fast, dictation
+may pause)
+"""
+
+import numpy as np
+
+
+def frame_length_for(sample_rate, frame_ms=20):
+    return max(1, sample_rate * frame_ms // 1000)
+
+
+def frame_features(samples, frame_length):
+    """Per-frame RMS energy and zero-crossing rate (crossings per sample) of int16 audio"""
+    count = len(samples) // frame_length
+    if not count:
+        empty = np.empty(0, dtype=np.float32)
+        return empty, empty
+    frames = samples[:count * frame_length].reshape(count, frame_length).astype(np.float32)
+    energy = np.sqrt((frames ** 2).mean(axis=1))
+    signs = np.signbit(frames)
+    zcr = (signs[:, 1:] != signs[:, :-1]).mean(axis=1)
+    return energy, zcr
+
+
+def speech_frames(energy, zcr, threshold, zcr_max=0.35, loud_ratio=3.0):
+    """Raw per-frame decision
+
+    A frame is speech when it is above the energy threshold and not noise-like
+    (broadband hiss and clicks cross zero far more often than voiced speech),
+    or when it is so loud that the zero-crossing rate does not matter.
+    """
+    return ((energy > threshold) & (zcr < zcr_max)) | (energy > threshold * loud_ratio)
+
+
+def speech_mask(samples, sample_rate, threshold, frame_ms=20, start_frames=3, hangover_frames=15, **options):
+    """Smoothed speech/non-speech decision for every frame of a whole recording
+
+    Runs shorter than start_frames are dropped and every remaining speech frame
+    keeps the following hangover_frames marked as speech.
+    """
+    energy, zcr = frame_features(samples, frame_length_for(sample_rate, frame_ms))
+    raw = speech_frames(energy, zcr, threshold, **options)
+    if not len(raw):
+        return raw
+
+    # Keep only runs of at least start_frames speech frames
+    window = np.ones(start_frames, dtype=int)
+    full = np.convolve(raw.astype(int), window, mode='valid') == start_frames
+    kept = np.convolve(full.astype(int), window, mode='full')[:len(raw)] > 0
+
+    # Hangover: frames within hangover_frames after the last kept speech frame
+    index = np.arange(len(kept))
+    last_speech = np.maximum.accumulate(np.where(kept, index, -hangover_frames - 1))
+    return index - last_speech <= hangover_frames
+
+
+class Endpointer:
+    """Streaming utterance start/end detection over chunks of int16 audio
+
+    Offsets are in samples since the last reset(). After an utterance has
+    ended, onset and end hold its boundaries until the next reset().
+    """
+
+    def __init__(self, sample_rate, frame_ms=20, start_frames=3, min_hangover=0.3, max_hangover=0.8,
+                 hangover_growth=0.15, max_utterance=30.0, **options):
+        self.sample_rate = sample_rate
+        self.frame_length = frame_length_for(sample_rate, frame_ms)
+        self.start_frames = start_frames
+        self.min_hangover = min_hangover
+        self.max_hangover = max_hangover
+        self.hangover_growth = hangover_growth
+        self.max_utterance = int(max_utterance * sample_rate)
+        self.options = options
+        self.reset()
+
+    def reset(self):
+        self.pending = np.empty(0, dtype=np.int16)
+        self.offset = 0  # samples consumed as whole frames
+        self.run = 0
+        self.onset = None
+        self.last_voice = None
+        self.end = None
+
+    @property
+    def ended(self):
+        return self.end is not None
+
+    def hangover(self):
+        """Trailing silence that ends the current utterance, in samples"""
+        spoken = (self.last_voice - self.onset) / self.sample_rate
+        seconds = min(self.max_hangover, self.min_hangover + self.hangover_growth * spoken)
+        return int(seconds * self.sample_rate)
+
+    def feed(self, samples, threshold):
+        """Process a chunk; returns True once the utterance has ended"""
+        if self.ended:
+            return True
+        samples = np.concatenate([self.pending, samples]) if len(self.pending) else samples
+        usable = len(samples) // self.frame_length * self.frame_length
+        self.pending = samples[usable:]
+        energy, zcr = frame_features(samples[:usable], self.frame_length)
+        decisions = speech_frames(energy, zcr, threshold, **self.options)
+
+        for speech in decisions:
+            frame_start = self.offset
+            self.offset += self.frame_length
+            if self.onset is None:
+                self.run = self.run + 1 if speech else 0
+                if self.run >= self.start_frames:
+                    self.onset = frame_start - (self.start_frames - 1) * self.frame_length
+                    self.last_voice = self.offset
+                continue
+            if speech:
+                self.last_voice = self.offset
+            elif self.offset - self.last_voice >= self.hangover():
+                self.end = self.last_voice
+                return True
+            if self.offset - self.onset >= self.max_utterance:
+                self.end = self.offset
+                return True
+        return False
+
+    def latency(self):
+        """Seconds between the last voiced frame and the end decision"""
+        if not self.ended:
+            return None
+        return (self.offset - self.end) / self.sample_rate
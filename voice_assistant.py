@@ -17,81 +17,236 @@ from pathlib import Path
 
 # Core libraries
 import speech_recognition as sr
-import pyttsx3
 import psutil
 from dotenv import load_dotenv
 
 # AI and web libraries
 import google.generativeai as genai
-import wikipedia
-import pywhatkit
-import pyautogui
 import requests
 from datetime import timedelta
 
 # Improved importing and environment setup
 import logging
 
+from speech_streaming import StreamingSpeaker, EMPTY_REPLY
+from assistant_pipeline import AssistantPipeline
+from tts_worker import TTSWorker
+from phrase_cache import PhraseCache, expand_templates
+from intent_router import IntentRouter, IntentMatch, REST
+from response_cache import ResponseCache
+from storage import Storage
+from startup import Startup
+from skills import SkillRegistry
+from metrics import Metrics, traced
+from speech_backends import SpeechRecognizer, create_backends
+from gemini_gateway import GeminiGateway, RateLimited, BUSY_REPLY, UNAVAILABLE_REPLY
+from circuit_breaker import Breakers, CircuitOpen
+from conversation import ConversationContext
+from model_router import ModelRouter, DeadlineExceeded, SLOW_REPLY
+
 # Load environment variables
 load_dotenv()
 
+# Training phrases for the local intent classifier, found even when started from another directory
+INTENT_EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'intent_examples.json')
+
+# Intent table for process_command; the highest priority wins when several intents match
+VOICE_INTENTS = [
+    {'name': 'exit', 'phrases': ['exit', 'quit', 'goodbye', 'bye'], 'priority': 100},
+    {'name': 'performance', 'phrases': ['performance report', 'performance stats', 'latency report'],
+     'priority': 95},
+    {'name': 'time', 'phrases': ['time'], 'priority': 90},
+    {'name': 'date', 'phrases': ['date'], 'priority': 80},
+    {'name': 'open', 'phrases': ['open'], 'priority': 70,
+     'slots': {'site': REST}, 'fillers': ['the', 'website', 'site']},
+    {'name': 'search', 'phrases': ['search'], 'priority': 60, 'modules': ['pywhatkit'],
+     'slots': {'query': REST, 'target': {'youtube': 'youtube'}}, 'fillers': ['for', 'on', 'youtube']},
+    {'name': 'play', 'phrases': ['play'], 'priority': 50, 'modules': ['pywhatkit'], 'slots': {'query': REST}},
+    {'name': 'wikipedia', 'phrases': ['wikipedia'], 'priority': 40, 'modules': ['wikipedia'],
+     'slots': {'query': REST}, 'fillers': ['search', 'on', 'about']},
+    {'name': 'screenshot', 'phrases': ['screenshot'], 'priority': 30, 'modules': ['pyautogui']},
+    {'name': 'system_info', 'phrases': ['system info', 'system status', 'battery'], 'priority': 20},
+    {'name': 'shutdown', 'phrases': ['shutdown', 'shut down'], 'priority': 10},
+    {'name': 'restart', 'phrases': ['restart'], 'priority': 10},
+]
+
 class VoiceAssistant:
     def __init__(self):
         """Initialize the voice assistant with all necessary components"""
-        self.setup_ai()
-        self.setup_voice()
-        self.setup_speech_recognition()
+        self.metrics = Metrics.from_env().start()
+        # Dependencies that keep failing are skipped for a while instead of timing out on every command
+        self.breakers = Breakers.from_env(self.metrics)
+        # Recent turns, a running summary and relevant preferences, within a token budget per prompt
+        self.conversation = ConversationContext.from_env(self.metrics, self.summarize_conversation)
+        # Slow subsystems start in the background; startup.ready(name) waits for one of them
+        self.startup = Startup()
         self.load_config()
         self.command_history = []  # Store past commands for context-based processing
         self.start_time = datetime.datetime.now()  # Track assistant runtime
+        self.streaming_speaker = StreamingSpeaker(self.speak)
+        self.pipeline = None  # Set while run_pipelined() is active
+
+        self.skills = SkillRegistry(VOICE_INTENTS)
+
+        self.startup.submit('voice', self.setup_voice)
+        self.startup.submit('speech_recognition', self.setup_speech_recognition)
+        self.startup.submit('ai', self.setup_ai)
+        self.startup.submit('response_cache', self.setup_response_cache)
+        self.startup.submit('intents', self.setup_intents)
+        self.startup.seal()
+        self.skills.prewarm([skill.strip() for skill in os.getenv('PREWARM_SKILLS', '').split(',')])
         
     def setup_ai(self):
         """Configure Gemini AI"""
+        self.model_name = os.getenv('GEMINI_MODEL', 'gemini-1.5-flash')
         try:
             genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-            self.model = genai.GenerativeModel('gemini-1.5-flash')
+            # Every caller of a model goes through one limiter so bursts queue instead of exhausting
+            # its quota; the router picks the model per question and hedges slow requests
+            self.model = ModelRouter.from_env(
+                lambda name: GeminiGateway.from_env(genai.GenerativeModel(name), self.metrics,
+                                                    self.breakers.get('gemini')),
+                self.model_name, self.metrics)
             print("✓ Gemini AI configured successfully")
         except Exception as e:
             print(f"✗ Error configuring Gemini AI: {e}")
             self.model = None
     
     def setup_voice(self):
-        """Initialize text-to-speech engine"""
-        try:
-            self.engine = pyttsx3.init('sapi5')
-            voices = self.engine.getProperty('voices')
-            
-            # Set voice properties
-            if len(voices) > 1:
-                self.engine.setProperty('voice', voices[1].id)  # Female voice
-            
-            self.engine.setProperty('rate', int(os.getenv('VOICE_RATE', 200)))
-            self.engine.setProperty('volume', float(os.getenv('VOICE_VOLUME', 0.9)))
-            print("✓ Text-to-speech engine initialized")
-        except Exception as e:
-            print(f"✗ Error initializing voice engine: {e}")
-            self.engine = None
+        """Start the text-to-speech worker that owns the engine"""
+        phrase_cache = None
+        if os.getenv('PHRASE_CACHE', 'true').lower() == 'true':
+            phrase_cache = PhraseCache(os.getenv('PHRASE_CACHE_DIR', 'tts_cache'))
+        self.tts = TTSWorker(
+            name=os.getenv('ASSISTANT_NAME', 'Jarvis'),
+            rate=int(os.getenv('VOICE_RATE', 200)),
+            volume=float(os.getenv('VOICE_VOLUME', 0.9)),
+            voice_gender='female',
+            phrase_cache=phrase_cache,
+            metrics=self.metrics
+        ).start()
+        self.tts.warm_phrases(self.cached_phrases())
     
     def setup_speech_recognition(self):
         """Initialize speech recognition"""
+        self.calibration = None
+        self.mic_stream = None
+        self.wake_word = None
+        self.speech = None
         try:
             self.recognizer = sr.Recognizer()
             self.microphone = sr.Microphone()
-            
-            # Adjust for ambient noise
-            with self.microphone as source:
-                self.recognizer.adjust_for_ambient_noise(source, duration=1)
+            self.setup_speech_backends()
+            self.setup_noise_calibration()
+            self.start_mic_stream()
             print("✓ Speech recognition initialized")
         except Exception as e:
             print(f"✗ Error initializing speech recognition: {e}")
             self.recognizer = None
     
+    def setup_speech_backends(self):
+        """Recognition backends in preference order, e.g. google,vosk to fall back to offline"""
+        names = os.getenv('SPEECH_BACKENDS', 'google').split(',')
+        self.speech = SpeechRecognizer(
+            create_backends(names, self.recognizer, os.getenv('SPEECH_LANGUAGE', 'en-US'),
+                            os.getenv('VOSK_MODEL', 'vosk-model')),
+            race=os.getenv('SPEECH_RACE', 'false').lower() == 'true',
+            min_confidence=float(os.getenv('SPEECH_MIN_CONFIDENCE', 0.6)),
+            breakers=self.breakers
+        )
+        mode = 'racing' if self.speech.race else 'in order'
+        print(f"✓ Speech backends: {', '.join(backend.name for backend in self.speech.backends)} ({mode})")
+
+    def setup_noise_calibration(self):
+        """Start from this microphone's saved threshold, or a default for a new one; never blocks to calibrate"""
+        calibration = self.skills.module('noise_calibration')
+        store = calibration.CalibrationStore(os.getenv('MIC_CALIBRATION_FILE', 'mic_calibration.json'))
+        self.calibration = calibration.AmbientCalibration(
+            store, calibration.device_key(self.microphone),
+            self.microphone.SAMPLE_RATE, self.microphone.SAMPLE_WIDTH
+        )
+        # Captured audio keeps refining the threshold instead of the recognizer's own adjustment
+        self.recognizer.energy_threshold = self.calibration.threshold
+        self.recognizer.dynamic_energy_threshold = False
+        origin = 'saved' if self.calibration.loaded else 'default for a new device'
+        print(f"✓ Microphone threshold {self.calibration.threshold:.0f} ({origin})")
+
+    def adapt_energy_threshold(self, data):
+        """Refine the speech threshold from captured audio"""
+        if self.calibration:
+            self.recognizer.energy_threshold = self.calibration.observe(data)
+
+    def start_mic_stream(self):
+        """Keep the microphone open for the whole session, feeding the noise estimate as it goes"""
+        if os.getenv('MIC_STREAM', 'true').lower() != 'true':
+            return
+        audio_capture = self.skills.module('audio_capture')
+        vad = self.skills.module('vad')
+        # Short commands end after a short pause; longer dictation may pause for longer
+        endpointer = vad.Endpointer(
+            self.microphone.SAMPLE_RATE,
+            min_hangover=float(os.getenv('VAD_MIN_PAUSE', 0.3)),
+            max_hangover=float(os.getenv('VAD_MAX_PAUSE', 0.8)),
+            max_utterance=float(os.getenv('MAX_UTTERANCE_SECONDS', 30))
+        )
+        self.mic_stream = audio_capture.MicrophoneStream(
+            self.microphone,
+            buffer_seconds=float(os.getenv('MIC_BUFFER_SECONDS', 30)),
+            pre_roll=float(os.getenv('MIC_PRE_ROLL', 0.3)),
+            endpointer=endpointer
+        )
+        self.mic_stream.add_listener(self.adapt_energy_threshold)
+        self.mic_stream.start()
+        self.setup_wake_word()
+
+    def setup_wake_word(self):
+        """Match utterances against the enrolled wake word locally before any recognition"""
+        self.wake_word = None
+        if os.getenv('WAKE_WORD', 'false').lower() != 'true':
+            return
+        path = os.getenv('WAKE_WORD_MODEL', 'wake_word.npz')
+        try:
+            self.wake_word = self.skills.module('wake_word').WakeWordDetector.load(path)
+            print(f"✓ Wake word mode: say '{self.assistant_name}' before a command")
+        except Exception as e:
+            print(f"✗ Wake word model not loaded ({e}); enroll with: python wake_word.py enroll --record 3")
+
+    def close_audio(self):
+        """Stop capturing, keep the latest calibration for next time and report recognition stats"""
+        if self.mic_stream:
+            self.mic_stream.stop()
+        if self.calibration:
+            self.calibration.save()
+        if self.speech:
+            self.speech.report()
+            self.speech.shutdown()
+
+    def setup_response_cache(self):
+        """Open the persistent AI response cache"""
+        self.storage = None
+        self.response_cache = None
+        if os.getenv('AI_CACHE', 'true').lower() != 'true':
+            return
+        try:
+            self.storage = Storage.from_env('assistant_data.db', self.metrics)
+            self.response_cache = ResponseCache(
+                self.storage,
+                max_entries=int(os.getenv('AI_CACHE_SIZE', 5000)),
+                ttl=int(os.getenv('AI_CACHE_TTL', 24 * 3600))
+            )
+            print("✓ AI response cache ready")
+        except Exception as e:
+            print(f"✗ Error opening AI response cache: {e}")
+    
     def load_config(self):
         """Load configuration from environment variables"""
         self.assistant_name = os.getenv('ASSISTANT_NAME', 'Jarvis')
         self.music_dir = os.getenv('MUSIC_DIR', 'C:\\Music')
         self.downloads_dir = os.getenv('DOWNLOADS_DIR', 'C:\\Users\\nanda\\Downloads')
         self.documents_dir = os.getenv('DOCUMENTS_DIR', 'C:\\Users\\nanda\\Documents')
+        self.stream_responses = os.getenv('STREAM_AI_RESPONSES', 'true').lower() == 'true'
+        # How much louder than the speech threshold the user must be to talk over the assistant; 0 waits
+        self.barge_in_level = float(os.getenv('BARGE_IN_LEVEL', 3.0))
         
         # Application mappings
         self.app_mappings = {
@@ -109,59 +264,270 @@ class VoiceAssistant:
             'instagram': 'https://www.instagram.com'
         }
     
-    def speak(self, text):
-        """Convert text to speech"""
-        if self.engine:
-            try:
-                print(f"🎵 {self.assistant_name}: {text}")
-                self.engine.say(text)
-                self.engine.runAndWait()
-            except Exception as e:
-                print(f"✗ Error in text-to-speech: {e}")
-        else:
-            print(f"{self.assistant_name}: {text}")
-    
-    def listen(self, timeout=5):
-        """Listen for voice input"""
-        if not self.recognizer:
+    def intent_handler_table(self):
+        """Map intent names to handlers bound to this assistant"""
+        return {
+            'exit': self.handle_exit,
+            'time': lambda command, slots: self.get_current_time(),
+            'date': lambda command, slots: self.get_current_date(),
+            'open': self.handle_open,
+            'search': self.handle_search,
+            'play': lambda command, slots: self.search_youtube(slots.get('query', '')),
+            'wikipedia': lambda command, slots: self.get_wikipedia_info(slots.get('query', '')),
+            'screenshot': lambda command, slots: self.take_screenshot(),
+            'system_info': lambda command, slots: self.get_system_info(),
+            'shutdown': self.handle_shutdown,
+            'restart': self.handle_restart,
+            'performance': lambda command, slots: self.report_performance()
+        }
+
+    def setup_intents(self):
+        """Compile the intent table once and map intents to their handlers"""
+        self.router = IntentRouter(self.skills.intent_table())
+        self.intent_handlers = self.intent_handler_table()
+
+        # Local classifier for skill-shaped phrasings the keyword table misses
+        self.intent_confidence = float(os.getenv('INTENT_CONFIDENCE', 0.6))
+        try:
+            # numpy is only imported here, off the main thread
+            load_or_train = self.skills.module('intent_classifier').load_or_train
+            self.classifier = load_or_train(os.getenv('INTENT_MODEL', 'intent_model.npz'), INTENT_EXAMPLES)
+            print("✓ Local intent classifier loaded")
+        except Exception as e:
+            print(f"✗ Error loading intent classifier: {e}")
+            self.classifier = None
+
+    def classify_intent(self, command):
+        """Route confident local predictions straight to a skill; None means ask the LLM"""
+        if not self.classifier:
             return None
-            
+        started = time.perf_counter()
+        label, confidence = self.classifier.classify(command)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if label not in self.intent_handlers or confidence < self.intent_confidence:
+            return None
+        print(f"🧭 Classified as '{label}' ({confidence:.0%}, {elapsed_ms:.1f}ms)")
+        return IntentMatch(label, self.router.extract_slots(label, command), None)
+    
+    def speak(self, text, urgent=False, on_start=None):
+        """Queue text for the speech worker without waiting for playback"""
+        self.tts.say(text, urgent, on_start)
+    
+    @traced('capture')
+    def capture_audio(self, timeout=5):
+        """Capture one utterance from the microphone"""
+        if self.barge_in_level <= 0 and self.tts:
+            self.tts.wait_until_idle()  # barge-in off: never record while the assistant talks
+        if self.mic_stream:
+            data = self.wait_for_wake_word(timeout) if self.wake_word else self.listen_stream(timeout)
+            if data is None:
+                return None
+            return sr.AudioData(data, self.mic_stream.sample_rate, self.mic_stream.sample_width)
+
+        threshold = self.recognizer.energy_threshold
         try:
             with self.microphone as source:
                 print("🎤 Listening...")
+                self.recognizer.energy_threshold = self.listening_threshold()
                 audio = self.recognizer.listen(source, timeout=timeout)
-                
-            print("🔍 Recognizing...")
-            command = self.recognizer.recognize_google(audio, language='en-US')
-            print(f"👤 User said: {command}")
-            return command.lower()
-            
-        except sr.UnknownValueError:
+        except sr.WaitTimeoutError:
+            print("⏰ Listening timeout")
+            return None
+        finally:
+            self.recognizer.energy_threshold = threshold
+        self.adapt_energy_threshold(audio.get_raw_data())
+        return audio
+
+    def listening_threshold(self):
+        """Energy an utterance must start above
+
+        While the assistant is talking the microphone also hears the speaker, so
+        only speech barge_in_level times louder than usual counts; otherwise the
+        assistant would interrupt itself and take its own words as a command.
+        """
+        threshold = self.recognizer.energy_threshold
+        if self.tts and self.barge_in_level > 0 and self.tts.is_busy():
+            return threshold * self.barge_in_level
+        return threshold
+
+    def listen_stream(self, timeout):
+        """Raw bytes of the next utterance from the open stream"""
+        print("🎤 Listening...")
+        data = self.mic_stream.listen(self.listening_threshold, timeout)
+        if data is None:
+            print("⏰ Listening timeout")
+            return None
+        # None when the stream stopped mid-utterance rather than on silence
+        if self.mic_stream.endpoint_latency is not None:
+            print(f"⏱ End of speech detected after {self.mic_stream.endpoint_latency * 1000:.0f}ms of silence")
+        return data
+
+    def wait_for_wake_word(self, timeout):
+        """Drop utterances locally until one starts with the wake word; return the command audio"""
+        print(f"💤 Waiting for '{self.assistant_name}'...")
+        while not self.mic_stream.stopped.is_set():
+            data = self.mic_stream.listen(self.listening_threshold)
+            command = self.wake_word.strip(data, self.mic_stream.sample_rate) if data else None
+            if command is None:
+                continue
+            print("✓ Wake word detected")
+            # "Jarvis, what time is it" in one breath, or the name alone and then the command
+            return command or self.listen_stream(timeout)
+        return None
+
+    @traced('recognition')
+    def recognize_audio(self, audio):
+        """Convert captured audio to lowercase text"""
+        print("🔍 Recognizing...")
+        transcript = self.speech.recognize(audio)
+        if not transcript:
             print("❌ Could not understand audio")
             return None
-        except sr.RequestError as e:
-            print(f"❌ Error with speech recognition service: {e}")
+        print(f"👤 User said: {transcript.text}")
+        return transcript.text.lower()
+
+    def listen(self, timeout=5):
+        """Listen for voice input"""
+        self.startup.ready('speech_recognition')
+        if not self.recognizer:
             return None
-        except sr.WaitTimeoutError:
-            print("⏰ Listening timeout")
+        if self.speech.unavailable():
+            # Recognition services are down; fall back to typed commands without recording
+            print("🔌 Speech recognition is unavailable right now")
             return None
+
+        audio = self.capture_audio(timeout)
+        if audio is None:
+            return None
+        return self.recognize_audio(audio)
     
-    def get_ai_response(self, prompt, context=None):
+    def build_ai_prompt(self, prompt, context=None):
+        """Build the full Gemini prompt: the conversation so far and the question"""
+        instructions = f"You are {self.assistant_name}, a helpful voice assistant. Use full context and respond: {prompt}"
+        return self.conversation.prompt(instructions, prompt, extra=context)
+
+    def ai_cache_context(self, prompt, context=None):
+        """Context fragment that distinguishes cached replies: extra context and, for follow-ups, the conversation"""
+        return f"{context or ''} {self.conversation.cache_key(prompt)}"
+
+    def summarize_conversation(self, text, words):
+        """Condense earlier turns for the conversation context (CONTEXT_SUMMARIZER=gemini)"""
+        response = self.model.generate_content(
+            f"Summarize this conversation between a user and their voice assistant in at most {words} words, "
+            f"keeping names, places and facts the user may refer back to:\n{text}")
+        return response.text
+
+    def reply_model(self, prompt):
+        """Name of the model that answers prompt, which the cached reply belongs to"""
+        return self.model.choose(prompt).model_name if self.model else self.model_name
+
+    def get_cached_reply(self, prompt, context=None):
+        """Look up a previous AI reply for the same question"""
+        if not self.response_cache:
+            return None
+        try:
+            cached = self.response_cache.get(prompt, self.reply_model(prompt), self.ai_cache_context(prompt, context))
+        except Exception as e:
+            print(f"✗ Error reading AI response cache: {e}")
+            return None
+        if cached:
+            print("⚡ Answering from the AI response cache")
+        return cached
+
+    def cache_reply(self, prompt, context, reply):
+        """Remember a successful AI reply"""
+        if not self.response_cache or not reply:
+            return
+        try:
+            self.response_cache.put(prompt, self.reply_model(prompt), reply, self.ai_cache_context(prompt, context))
+        except Exception as e:
+            print(f"✗ Error writing AI response cache: {e}")
+
+    @traced('gemini')
+    def get_ai_response(self, prompt, context=None, fresh=False):
         """Get response from Gemini AI"""
+        if not fresh:
+            cached = self.get_cached_reply(prompt, context)
+            if cached:
+                self.conversation.remember(prompt, cached)
+                return cached
+
         if not self.model:
             return "AI service is not available."
 
-        if context:
-            prompt = context + " " + prompt
         try:
-            full_prompt = f"You are {self.assistant_name}, a helpful voice assistant. Use full context and respond: {prompt}"
-            response = self.model.generate_content(full_prompt)
-            return response.text.strip()
+            started = time.perf_counter()
+            full_prompt = self.build_ai_prompt(prompt, context)
+            response = self.model.generate_content(full_prompt, query=prompt)
+            reply = response.text.strip()
+            self.cache_reply(prompt, context, reply)
+            self.conversation.remember(prompt, reply, time.perf_counter() - started)
+            return reply
+        except RateLimited as e:
+            print(f"✗ Gemini rate limited: {e}")
+            return BUSY_REPLY
+        except CircuitOpen as e:
+            print(f"🔌 {e}")
+            return UNAVAILABLE_REPLY
+        except DeadlineExceeded as e:
+            print(f"⏱ {e}")
+            return SLOW_REPLY
         except Exception as e:
             print(f"✗ Error with Gemini AI: {e}")
             return "I'm having trouble processing your request right now."
 
-    
+    def stream_ai_response(self, prompt, context=None):
+        """Yield the Gemini reply text chunk by chunk as it is generated"""
+        response = self.model.generate_content(self.build_ai_prompt(prompt, context), stream=True,
+                                               query=prompt)
+        for chunk in response:
+            yield chunk.text
+
+    def respond_with_ai(self, prompt, context=None, fresh=False):
+        """Speak the AI reply, streaming it sentence by sentence when enabled"""
+        started_at = time.perf_counter()
+        cached = None if fresh else self.get_cached_reply(prompt, context)
+        if cached:
+            self.speak(cached, on_start=self.streaming_speaker.first_audio('cache', started_at))
+            self.conversation.remember(prompt, cached)
+            return cached
+
+        if self.stream_responses and self.model:
+            try:
+                with self.metrics.span('gemini'):
+                    reply, complete = self.streaming_speaker.speak_stream(
+                        self.stream_ai_response(prompt, context), started_at)
+                if not reply:
+                    # The stream finished without text (e.g. a blocked answer); asking again would double the wait
+                    print("✗ Gemini returned an empty reply")
+                    self.speak(EMPTY_REPLY)
+                    return EMPTY_REPLY
+                if complete:
+                    self.cache_reply(prompt, context, reply)
+                self.conversation.remember(prompt, reply, time.perf_counter() - started_at)
+                return reply
+            except RateLimited as e:
+                # Retries were already spent; a blocking request would only wait again
+                print(f"✗ Gemini rate limited: {e}")
+                self.speak(BUSY_REPLY)
+                return BUSY_REPLY
+            except CircuitOpen as e:
+                print(f"🔌 {e}")
+                self.speak(UNAVAILABLE_REPLY)
+                return UNAVAILABLE_REPLY
+            except DeadlineExceeded as e:
+                # The deadline is spent; a blocking request would start another one
+                print(f"⏱ {e}")
+                self.speak(SLOW_REPLY)
+                return SLOW_REPLY
+            except Exception as e:
+                print(f"✗ Error streaming Gemini AI response: {e}")
+
+        # The cache was already checked above
+        response = self.get_ai_response(prompt, context, fresh=True)
+        self.speak(response, on_start=self.streaming_speaker.first_audio('blocking', started_at))
+        return response
+
     def log_command(self, command):
         logging.info(f"Processing command: {command}")
 
@@ -169,10 +535,8 @@ class VoiceAssistant:
         if self.command_history.count(command) > 2:
             self.speak("You've requested this several times. Would you like to set this as a routine?")
     
-    def wish_user(self):
-        """Greet the user based on time of day"""
-        hour = datetime.datetime.now().hour
-        
+    def welcome_message(self, hour):
+        """Build the greeting for a given hour of the day"""
         if 0 <= hour < 12:
             greeting = "Good morning!"
         elif 12 <= hour < 18:
@@ -180,8 +544,26 @@ class VoiceAssistant:
         else:
             greeting = "Good evening!"
             
-        welcome_message = f"{greeting} I'm {self.assistant_name}, your voice assistant. How can I help you today?"
-        self.speak(welcome_message)
+        return f"{greeting} I'm {self.assistant_name}, your voice assistant. How can I help you today?"
+
+    def wish_user(self):
+        """Greet the user based on time of day"""
+        self.startup.ready('voice')
+        self.speak(self.welcome_message(datetime.datetime.now().hour))
+
+    def cached_phrases(self):
+        """Fixed and templated phrases worth pre-rendering"""
+        phrases = [self.welcome_message(hour) for hour in (0, 12, 18)]
+        phrases += [
+            "Goodbye! Have a great day!",
+            "Goodbye!",
+            "Searching Wikipedia...",
+            "According to Wikipedia:",
+            "Please specify a website to open.",
+            "I encountered an unexpected error. Please try again."
+        ]
+        phrases += expand_templates({"Opening {site}": self.app_mappings})
+        return phrases
     
     def get_current_time(self):
         """Get and announce current time"""
@@ -212,6 +594,7 @@ class VoiceAssistant:
     def search_web(self, query):
         """Search the web using pywhatkit"""
         try:
+            pywhatkit = self.skills.module('pywhatkit', 'search')
             pywhatkit.search(query)
             self.speak(f"Searching for {query}")
         except Exception as e:
@@ -221,17 +604,32 @@ class VoiceAssistant:
     def search_youtube(self, query):
         """Search YouTube"""
         try:
+            pywhatkit = self.skills.module('pywhatkit', 'play')
             pywhatkit.playonyt(query)
             self.speak(f"Playing {query} on YouTube")
         except Exception as e:
             print(f"Error searching YouTube: {e}")
             self.speak("I couldn't search YouTube right now")
     
+    @traced('wikipedia')
     def get_wikipedia_info(self, query):
         """Get information from Wikipedia"""
+        try:
+            wikipedia = self.skills.module('wikipedia', 'wikipedia')
+        except ImportError as e:
+            print(f"Error loading Wikipedia: {e}")
+            self.speak("I couldn't get Wikipedia information right now")
+            return
+
+        if self.breakers.is_open('wikipedia'):
+            self.speak("Wikipedia is unreachable right now. Please try again in a minute.")
+            return
+
         try:
             self.speak("Searching Wikipedia...")
-            result = wikipedia.summary(query, sentences=3)
+            result = self.breakers.call('wikipedia', wikipedia.summary, query, sentences=3,
+                                        ignore=(wikipedia.exceptions.DisambiguationError,
+                                                wikipedia.exceptions.PageError))
             self.speak("According to Wikipedia:")
             self.speak(result)
         except wikipedia.exceptions.DisambiguationError as e:
@@ -246,6 +644,7 @@ class VoiceAssistant:
         """Take a screenshot"""
         try:
             screenshot_path = os.path.join(self.downloads_dir, f"screenshot_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.png")
+            pyautogui = self.skills.module('pyautogui', 'screenshot')
             screenshot = pyautogui.screenshot()
             screenshot.save(screenshot_path)
             self.speak("Screenshot taken and saved to downloads")
@@ -312,13 +711,23 @@ class VoiceAssistant:
             self.speak("You've been interacting for over 2 hours. Consider taking a break.")
 
     
+    @traced('dispatch')
     def process_command(self, command):
         """Process and manage voice commands"""
         if not command:
             return True
 
         command = command.lower().strip()
+
+        # "ask fresh ..." skips the AI response cache
+        fresh = command.startswith('ask fresh')
+        if fresh:
+            command = command[len('ask fresh'):].strip()
+
         self.command_history.append(command)
+
+        # The first command may arrive before Gemini, the cache or the intent model are ready
+        self.startup.settle()
         self.log_command(command)
         self.handle_repetitive_commands(command)
         self.track_session_duration()
@@ -332,81 +741,53 @@ class VoiceAssistant:
         if session_duration > timedelta(hours=2):
             self.speak("You've been interacting for over 2 hours. Consider taking a break.")
 
-        # Exit commands
-        if any(word in command for word in ['exit', 'quit', 'goodbye', 'bye']):
-            self.speak("Goodbye! Have a great day!")
-            return False
-
-        # Time and date
-        elif 'time' in command:
-            self.get_current_time()
+        match = self.router.route(command) or self.classify_intent(command)
+        handler = self.intent_handlers.get(match.name) if match else None
+        if handler:
+            return handler(command, match.slots) is not False
 
-        elif 'date' in command:
-            self.get_current_date()
-
-        # Web browsing
-        elif 'open' in command:
-            # Extract the site name
-            site_name = self.extract_site_name(command)
-            if site_name:
-                self.open_website(site_name)
-            else:
-                self.speak("Please specify a website to open.")
+        # AI chat
+        self.respond_with_ai(command, fresh=fresh)
+        return True
 
-        # Search commands
-        elif 'search' in command:
-            if 'youtube' in command:
-                query = command.replace('search', '').replace('youtube', '').replace('on', '').replace('for', '').strip()
-                self.search_youtube(query)
-            else:
-                query = command.replace('search', '').replace('for', '').strip()
-                self.search_web(query)
+    def report_performance(self):
+        """Print recent latencies per stage and speak a short summary"""
+        self.metrics.report()
+        self.speak(self.metrics.describe())
+
+    def handle_exit(self, command, slots):
+        """Exit commands"""
+        self.speak("Goodbye! Have a great day!")
+        return False
+
+    def handle_open(self, command, slots):
+        """Open the website named in the command"""
+        site_name = slots.get('site')
+        if site_name:
+            self.open_website(site_name)
+        else:
+            self.speak("Please specify a website to open.")
 
-        elif 'play' in command:
-            query = command.replace('play', '').strip()
+    def handle_search(self, command, slots):
+        """Search the web, or YouTube when it is mentioned"""
+        query = slots.get('query', '')
+        if slots.get('target') == 'youtube':
             self.search_youtube(query)
-
-        # Wikipedia
-        elif 'wikipedia' in command:
-            query = command.replace('wikipedia', '').strip()
-            self.get_wikipedia_info(query)
-
-        # System commands
-        elif 'screenshot' in command:
-            self.take_screenshot()
-
-        elif 'system info' in command or 'system status' in command or 'battery' in command:
-            self.get_system_info()
-
-        elif 'shutdown' in command:
-            self.handle_shutdown(command)
-
-        elif 'restart' in command:
-            self.handle_restart(command)
-
-        # AI chat
         else:
-            response = self.get_ai_response(command, "Use advanced logic")
-            self.speak(response)
+            self.search_web(query)
 
-        return True
-    
-    def handle_shutdown(self, command):
+    def handle_shutdown(self, command, slots=None):
         """Handle smart shutdown logic"""
         numbers = self.extract_numbers(command)
         delay = int(numbers[0]) if numbers else 10
         self.shutdown_system(delay)
 
-    def handle_restart(self, command):
+    def handle_restart(self, command, slots=None):
         """Handle smart restart logic"""
         numbers = self.extract_numbers(command)
         delay = int(numbers[0]) if numbers else 10
         self.restart_system(delay)
 
-    def extract_site_name(self, command):
-        """Custom extraction to identify website URLs"""
-        return command.replace('open', '').strip()
-
     def run(self):
         """Main loop for the voice assistant"""
         print("🚀 Starting Voice Assistant...")
@@ -422,6 +803,8 @@ class VoiceAssistant:
                 command = self.listen()
 
                 if command:
+                    # A new command cuts off whatever is still being said
+                    self.tts.interrupt()
                     # Process the command
                     should_continue = self.process_command(command)
                     if not should_continue:
@@ -437,23 +820,65 @@ class VoiceAssistant:
                         self.speak("Goodbye!")
                         break
                     elif text_input:
+                        self.tts.interrupt()
                         should_continue = self.process_command(text_input)
                         if not should_continue:
                             break
 
             except KeyboardInterrupt:
                 print("\n🛑 Interrupted by user")
+                self.tts.interrupt()
                 self.speak("Goodbye!")
                 break
             except Exception as e:
                 print(f"❌ Unexpected error: {e}")
                 self.speak("I encountered an unexpected error. Please try again.")
 
+        # Let the goodbye finish playing before exiting
+        self.tts.shutdown()
+        self.skills.report()
+        self.close_audio()
+        self.metrics.close()
+        if self.storage:
+            self.storage.close()  # commits cache writes still queued
+
+    def run_pipelined(self):
+        """Main loop with overlapping listen, recognize, act and speak stages"""
+        print("🚀 Starting Voice Assistant (pipelined)...")
+        print("=" * 50)
+
+        # Greet while speech recognition is still being set up
+        self.wish_user()
+        self.startup.ready('speech_recognition')
+        self.pipeline = AssistantPipeline(self.capture_audio, self.recognize_audio,
+                                          self.process_command, self.tts)
+        self.pipeline.start(voice_input=self.recognizer is not None)
+
+        try:
+            self.pipeline.wait()
+        except KeyboardInterrupt:
+            print("\n🛑 Interrupted by user")
+            self.pipeline.stop()
+            self.speak("Goodbye!")
+        finally:
+            self.pipeline = None
+            self.tts.shutdown()
+            self.skills.report()
+            self.close_audio()
+            self.metrics.close()
+            if self.storage:
+                self.storage.close()  # commits cache writes still queued
+
 def main():
     """Main function to run the voice assistant"""
+    # LOG_LEVEL=INFO logs each command's per-stage breakdown
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'WARNING'), format='%(asctime)s %(levelname)s %(message)s')
     try:
         assistant = VoiceAssistant()
-        assistant.run()
+        if os.getenv('PIPELINE_MODE', 'false').lower() == 'true':
+            assistant.run_pipelined()
+        else:
+            assistant.run()
     except Exception as e:
         print(f"❌ Failed to start voice assistant: {e}")
         print("Please check your configuration and try again.")
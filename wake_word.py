@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Local wake-word detection
+Features: Log-mel features and template matching (DTW) against a few enrolled
+recordings of the assistant's name. It only runs on short bursts the VAD has
+already found, so waiting for the wake word costs almost no CPU and no
+recognition calls.
+
+Usage:
+    python wake_word.py enroll jarvis1.wav jarvis2.wav jarvis3.wav
+    python wake_word.py enroll --record 3
+    python wake_word.py test recording.wav
+"""
+
+import os
+import sys
+import argparse
+
+import numpy as np
+
+from noise_calibration import read_wav
+
+MIN_WAKE_SECONDS = 0.25
+MAX_WAKE_SECONDS = 1.5
+MAX_COMMAND_SECONDS = 8.0  # seconds of command after the wake word in one utterance; longer audio is skipped unscored
+MIN_THRESHOLD = 0.4  # near-identical enrollment recordings would otherwise reject any natural variation
+
+
+def mel_filterbank(sample_rate, n_fft, bands=24, fmax=4000.0):
+    """Triangular mel filters as a (bands, n_fft // 2 + 1) matrix"""
+    def to_mel(hz):
+        return 2595 * np.log10(1 + hz / 700)
+
+    def to_hz(mel):
+        return 700 * (10 ** (mel / 2595) - 1)
+
+    fmax = min(fmax, sample_rate / 2)
+    edges = to_hz(np.linspace(to_mel(80.0), to_mel(fmax), bands + 2))
+    bins = np.fft.rfftfreq(n_fft, 1 / sample_rate)
+    lower, center, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    rising = (bins - lower) / (center - lower)
+    falling = (upper - bins) / (upper - center)
+    return np.maximum(0, np.minimum(rising, falling))
+
+
+def log_mel(samples, sample_rate, frame_ms=25, hop_ms=10, bands=24, dynamic_range=4.0):
+    """Log-mel features, one row per 10ms hop
+
+    Each frame is floored at dynamic_range below its loudest band and has its
+    mean removed, so loudness and background noise change the features little.
+    """
+    frame = int(sample_rate * frame_ms / 1000)
+    hop = int(sample_rate * hop_ms / 1000)
+    if len(samples) < frame:
+        return np.empty((0, bands), dtype=np.float32)
+    count = 1 + (len(samples) - frame) // hop
+    index = np.arange(frame)[None, :] + hop * np.arange(count)[:, None]
+    frames = samples[index].astype(np.float32) * np.hamming(frame).astype(np.float32)
+    n_fft = 1 << (frame - 1).bit_length()
+    power = np.abs(np.fft.rfft(frames, n_fft)) ** 2
+    features = np.log(power @ mel_filterbank(sample_rate, n_fft, bands).T + 1e-3)
+    features = np.maximum(features, features.max(axis=1, keepdims=True) - dynamic_range)
+    return (features - features.mean(axis=1, keepdims=True)).astype(np.float32)
+
+
+def voiced_bounds(samples, sample_rate, frame_ms=10, floor=0.1):
+    """(start, end) sample indexes without the leading and trailing audio quieter than floor times the loudest frame"""
+    frame = max(1, int(sample_rate * frame_ms / 1000))
+    count = len(samples) // frame
+    if not count:
+        return 0, len(samples)
+    energy = np.sqrt((samples[:count * frame].reshape(count, frame).astype(np.float32) ** 2).mean(axis=1))
+    loud = np.flatnonzero(energy > floor * energy.max())
+    return loud[0] * frame, (loud[-1] + 1) * frame
+
+
+def trim_silence(samples, sample_rate):
+    start, end = voiced_bounds(samples, sample_rate)
+    return samples[start:end]
+
+
+def dtw_distance(template, candidate, free_start=20, repeat_penalty=1.0):
+    """Average frame distance of the best alignment of template within candidate
+
+    Every template frame advances the candidate by one or two frames (or
+    stays on the same frame, at a penalty), which keeps the alignment
+    between half and double speed and lets each row be computed with NumPy.
+    The match may start in the first free_start candidate frames (the cut
+    at the first voiced frame is not exact) and end anywhere, so a command
+    following the name is ignored.
+    Returns (distance, index of the candidate frame where the match ends).
+    """
+    if not len(template) or not len(candidate):
+        return float('inf'), 0
+    cost = np.sqrt(((template[:, None, :] - candidate[None, :, :]) ** 2).mean(axis=2))
+    previous = np.full(len(candidate), np.inf, dtype=np.float32)
+    previous[:free_start] = cost[0, :free_start]
+    for row in cost[1:]:
+        shifted_one = np.concatenate([[np.inf], previous[:-1]])
+        shifted_two = np.concatenate([[np.inf, np.inf], previous[:-2]])
+        previous = row + np.minimum(np.minimum(shifted_one, shifted_two), previous + repeat_penalty)
+    end = int(np.argmin(previous))
+    return float(previous[end] / len(template)), end
+
+
+class WakeWordDetector:
+    """Match short utterances against enrolled recordings of the wake word"""
+
+    def __init__(self, templates, threshold, hop_ms=10):
+        self.templates = templates
+        self.threshold = threshold
+        self.hop_ms = hop_ms
+        self.stats = {'candidates': 0, 'skipped': 0, 'triggers': 0}
+
+    @classmethod
+    def enroll(cls, recordings, margin=1.3):
+        """Build a detector from (samples, sample_rate) recordings of the wake word
+
+        The threshold is the largest distance between two enrollment recordings,
+        times a margin, and at least MIN_THRESHOLD.
+        """
+        templates = [log_mel(trim_silence(samples, rate), rate) for samples, rate in recordings]
+        templates = [template for template in templates if len(template)]
+        if len(templates) < 2:
+            raise ValueError("Need at least two recordings of the wake word")
+        distances = [dtw_distance(a, b)[0] for i, a in enumerate(templates)
+                     for j, b in enumerate(templates) if i != j]
+        return cls(templates, max(max(distances) * margin, MIN_THRESHOLD))
+
+    def save(self, path):
+        np.savez(path, threshold=np.array(self.threshold), count=np.array(len(self.templates)),
+                 **{f"template_{i}": template for i, template in enumerate(self.templates)})
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        templates = [data[f"template_{i}"] for i in range(int(data['count']))]
+        return cls(templates, float(data['threshold']))
+
+    def detect(self, samples, sample_rate):
+        """Return (triggered, distance, seconds into the audio where the wake word ends)
+
+        Audio too short to be the wake word, or too long to start with it and
+        a short command, is rejected without computing any features.
+        """
+        seconds = len(samples) / sample_rate
+        self.stats['candidates'] += 1
+        if seconds < MIN_WAKE_SECONDS or seconds > MAX_WAKE_SECONDS + MAX_COMMAND_SECONDS:
+            self.stats['skipped'] += 1
+            return False, float('inf'), 0.0
+
+        # Skip the pre-roll; only the start of a long utterance can hold the wake word
+        start, _ = voiced_bounds(samples, sample_rate)
+        head = samples[start:start + int((MAX_WAKE_SECONDS + 0.5) * sample_rate)]
+        features = log_mel(head, sample_rate)
+        best, best_end = float('inf'), 0
+        for template in self.templates:
+            distance, end = dtw_distance(template, features)
+            if distance < best:
+                best, best_end = distance, end
+        triggered = best <= self.threshold
+        if triggered:
+            self.stats['triggers'] += 1
+        return triggered, best, start / sample_rate + (best_end + 1) * self.hop_ms / 1000
+
+    def strip(self, data, sample_rate, min_command=0.5):
+        """For raw int16 utterance bytes: None without the wake word, else the command audio after it
+
+        The command is empty when less than min_command seconds follow the wake word.
+        """
+        triggered, _, end = self.detect(np.frombuffer(data, dtype=np.int16), sample_rate)
+        if not triggered:
+            return None
+        command = data[int(end * sample_rate) * 2:]
+        return command if len(command) >= min_command * sample_rate * 2 else b''
+
+
+def load_recording(path):
+    data, sample_rate, _ = read_wav(path)
+    return np.frombuffer(data, dtype=np.int16), sample_rate
+
+
+def record_utterances(count):
+    """Record count utterances from the default microphone"""
+    import speech_recognition as sr
+    from audio_capture import MicrophoneStream
+    from noise_calibration import NoiseFloorEstimator
+
+    microphone = sr.Microphone()
+    estimator = NoiseFloorEstimator(microphone.SAMPLE_RATE)
+    stream = MicrophoneStream(microphone)
+    stream.add_listener(estimator.update)
+    stream.start()
+    recordings = []
+    try:
+        while len(recordings) < count:
+            print(f"🎤 Say the wake word ({len(recordings) + 1}/{count})...")
+            data = stream.listen(estimator.threshold or 300, timeout=10)
+            if data:
+                recordings.append((np.frombuffer(data, dtype=np.int16), stream.sample_rate))
+    finally:
+        stream.stop()
+    return recordings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Enroll or test the local wake-word detector")
+    parser.add_argument('action', choices=['enroll', 'test'])
+    parser.add_argument('wavs', nargs='*')
+    parser.add_argument('--record', type=int, default=0, help="record this many enrollment samples")
+    parser.add_argument('--margin', type=float, default=1.3, help="threshold relative to the enrollment spread")
+    parser.add_argument('--model', default=os.getenv('WAKE_WORD_MODEL', 'wake_word.npz'))
+    args = parser.parse_args()
+
+    if args.action == 'enroll':
+        recordings = [load_recording(path) for path in args.wavs]
+        if args.record:
+            recordings += record_utterances(args.record)
+        detector = WakeWordDetector.enroll(recordings, args.margin)
+        detector.save(args.model)
+        print(f"✓ Enrolled {len(detector.templates)} recordings, threshold {detector.threshold:.2f}, saved to {args.model}")
+        return 0
+
+    detector = WakeWordDetector.load(args.model)
+    for path in args.wavs:
+        triggered, distance, end = detector.detect(*load_recording(path))
+        print(f"{path}: {'✓ wake word' if triggered else '✗ no wake word'} (distance {distance:.2f}, ends at {end:.2f}s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())